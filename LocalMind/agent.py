@@ -0,0 +1,281 @@
+import asyncio, json, os, time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from LocalMind.llm.async_client import AsyncOllama
+from LocalMind.llm.tool_calls import extract_tool_invocations, message_of
+from LocalMind import metrics, prefetch, tool_select, trace
+from LocalMind.mcp_server import dispatch_tool_call_async, tool_label
+from LocalMind.router import Router, get_router
+from LocalMind.guards.limits import compact_tool_result
+from LocalMind.tool_spec import TOOL_SPEC
+
+# The one agent loop behind the CLI and the server: model, tools, model, ...
+# until the model answers, bounded by a wall-clock budget for the whole turn
+# and a cap on tool rounds. The transcript is always left well-formed: every
+# tool call gets a tool message and the turn ends with an assistant message.
+#
+# Agent.run() yields events as the turn progresses:
+#   {"type": "token",       "round", "content"}
+#   {"type": "tool_start",  "round", "id", "name", "arguments"}
+#   {"type": "tool_result", "round", "id", "name", "ok", "elapsed_ms", "bytes", "tokens", "tokens_saved"}
+#   {"type": "done",        "answer", "stopped": "answer" | "max_rounds" | "deadline", "timing"}
+# A question the router recognises (see router.py) starts at its tool instead
+# of a model call; timing["route"] then says which intent and how it was answered.
+# A tool call is started as soon as the stream has its complete arguments
+# (LOCALMIND_EARLY_TOOLS), so its tool_start can arrive between tokens of the
+# same round; the finished message is still checked and mismatches are redone.
+# With LOCALMIND_TOOL_SELECT=1 a conversation is offered only the tools its
+# questions need (tool_select.py), plus any the model asks for unoffered.
+
+TURN_BUDGET = float(os.getenv("LOCALMIND_TURN_BUDGET", "180"))        # seconds per user turn
+MAX_TOOL_ROUNDS = int(os.getenv("LOCALMIND_MAX_TOOL_ROUNDS", "6"))
+EARLY_TOOLS = os.getenv("LOCALMIND_EARLY_TOOLS", "1") == "1"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+def _drop(early: Dict[str, Any]) -> None:
+    for _, fut, _ in early.values():
+        fut.cancel()
+    early.clear()
+
+
+class Agent:
+    def __init__(self, client: Optional[AsyncOllama] = None, tools: Optional[List[Dict[str, Any]]] = None,
+                 budget_s: float = TURN_BUDGET, max_rounds: int = MAX_TOOL_ROUNDS, use_cache: bool = True,
+                 dispatch: Optional[Callable[..., Any]] = None, router: Optional[Router] = None,
+                 prefetch_tools: Optional[bool] = None, select_tools: Optional[bool] = None):
+        self.client = client or AsyncOllama()
+        self.router = router or get_router()
+        self.dispatch = dispatch or dispatch_tool_call_async   # trace replay swaps in recorded results
+        self.tools = TOOL_SPEC if tools is None else tools
+        self.budget_s = budget_s
+        self.max_rounds = max(0, max_rounds)
+        self.use_cache = use_cache
+        self.prefetch_tools = prefetch.ENABLED if prefetch_tools is None else prefetch_tools
+        self.select_tools = tool_select.ENABLED if select_tools is None else select_tools
+
+    async def _llm(self, messages, tools, deadline: float, timing: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """chat_stream with the turn deadline applied to every chunk."""
+        it = self.client.chat_stream(messages, tools=tools).__aiter__()
+        t0 = time.perf_counter()
+        try:
+            while True:
+                try:
+                    ev = await asyncio.wait_for(it.__anext__(), max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    timing["llm"].append({"prefill_ms": None, "generation_ms": None,
+                                          "total_ms": _ms(time.perf_counter() - t0), "timed_out": True})
+                    raise
+                if ev["type"] == "done":
+                    t = ev.get("timing") or {}
+                    total = t.get("total_ms", _ms(time.perf_counter() - t0))
+                    entry = {"prefill_ms": t.get("ttft_ms"), "total_ms": total,
+                             "generation_ms": round(total - t.get("ttft_ms", total), 1)}
+                    if t.get("backend"):
+                        entry["backend"] = t["backend"]
+                    if t.get("start") == "cold":
+                        entry["cold"] = True   # the model had to be loaded first (see llm/lifecycle.py)
+                    if ev["response"].get("usage"):
+                        entry["usage"] = ev["response"]["usage"]
+                    timing["llm"].append(entry)
+                yield ev
+        finally:
+            await it.aclose()
+
+    async def _dispatch_one(self, tc: Dict[str, Any], deadline: float,
+                            pf: Optional[prefetch.Prefetch] = None):
+        """(result, prefetched) for one call; served from a matching prefetch of pf when there is one."""
+        serve = pf.take(tc["name"], tc.get("arguments") or "{}") if pf else None
+        if serve:
+            return await serve(), True
+        return await self.dispatch(tc["name"], tc.get("arguments") or "{}", self.use_cache,
+                                   max_timeout=deadline - time.monotonic()), False
+
+    async def _run_tools(self, calls: List[Dict[str, Any]], rnd: int, deadline: float, timing: Dict[str, Any],
+                         tr, append: Callable[[Dict[str, Any]], Any], pf: Optional[prefetch.Prefetch] = None,
+                         started: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        One round's tool calls, run concurrently and each capped at what is left of
+        the deadline; results are reported as they finish but appended in call order.
+        Calls matching one of pf's prefetches are served from it. started maps the
+        ids of calls already running (dispatched mid-stream) to (future, head start ms).
+        """
+        started = started or {}
+        for tc in calls:
+            if tc["id"] not in started:
+                yield {"type": "tool_start", "round": rnd, "id": tc["id"], "name": tc["name"],
+                       "arguments": tc.get("arguments") or "{}"}
+
+        async def _run(i: int, tc: Dict[str, Any]):
+            if tc["id"] in started:
+                return (i, *await started[tc["id"]][0])
+            return (i, *await self._dispatch_one(tc, deadline, pf))
+
+        contents: List[str] = [""] * len(calls)
+        for fut in asyncio.as_completed([_run(i, tc) for i, tc in enumerate(calls)]):
+            i, out, prefetched = await fut
+            tc = calls[i]
+            tr.tool(rnd, tc, out)
+            t0 = time.perf_counter()
+            contents[i], cstats = compact_tool_result(tc["name"], out)
+            timing["normalization_ms"] += _ms(time.perf_counter() - t0)
+            metrics.TOOL_RESULT_BYTES.observe(cstats["bytes_in"], tool=tool_label(tc["name"]), stage="raw")
+            metrics.TOOL_RESULT_BYTES.observe(cstats["bytes_out"], tool=tool_label(tc["name"]), stage="sent")
+            ok = not (isinstance(out, dict) and out.get("ok") is False)
+            timing["tools"].append({"round": rnd, "id": tc["id"], "name": tc["name"], "ok": ok,
+                                    "elapsed_ms": out.get("elapsed_ms"),
+                                    "cached": "cached_age_seconds" in out, "prefetched": prefetched,
+                                    "early_ms": started[tc["id"]][1] if tc["id"] in started else None})
+            yield {"type": "tool_result", "round": rnd, "id": tc["id"], "name": tc["name"], "ok": ok,
+                   "elapsed_ms": out.get("elapsed_ms"), "bytes": cstats["bytes_out"],
+                   "tokens": cstats["tokens_out"], "tokens_saved": cstats["tokens_saved"], "result": out}
+        for tc, content in zip(calls, contents):
+            append({"role": "tool", "tool_call_id": tc["id"], "name": tc["name"], "content": content})
+
+    async def run(self, messages: List[Dict[str, Any]],
+                  append: Optional[Callable[[Dict[str, Any]], Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        One user turn on messages (which must already end with the user message).
+        New messages go through append (default messages.append), so a caller can
+        route them into its own store.
+        """
+        pf = prefetch.Prefetch(self.dispatch, self.use_cache) if self.prefetch_tools else None
+        try:
+            async for ev in self._turn(messages, append or messages.append, pf):
+                yield ev
+        finally:
+            if pf:
+                pf.discard()   # also when the caller abandons the turn
+
+    async def _turn(self, messages: List[Dict[str, Any]], append: Callable[[Dict[str, Any]], Any],
+                    pf: Optional[prefetch.Prefetch]) -> AsyncIterator[Dict[str, Any]]:
+        started, deadline = time.perf_counter(), time.monotonic() + self.budget_s
+        timing: Dict[str, Any] = {"llm": [], "tools": [], "normalization_ms": 0.0}
+        rounds, stopped, answer = 0, "answer", ""
+        tr = trace.start_turn(messages, self.tools, self.budget_s, self.max_rounds)
+        offered = tool_select.select(messages, self.tools) if self.select_tools else self.tools
+        n_offered, widened = len(offered), False
+
+        def _close(note: str) -> None:
+            nonlocal answer
+            answer = note
+            append({"role": "assistant", "content": note})
+
+        # fast path: a routed question runs its tool before any model call
+        route = self.router.route(messages) if self.max_rounds else None
+        summarize, fell_back = False, False
+        if pf and not route and messages and messages[-1].get("role") == "user":
+            # likely tools start now and overlap the first model call
+            pf.start(messages[-1].get("content") or "", {t["function"]["name"] for t in offered},
+                     max_timeout=deadline - time.monotonic())
+        if route:
+            call = {"id": f"route_{route.intent}", "name": route.tool, "arguments": json.dumps(route.args)}
+            append({"role": "assistant", "content": "", "tool_calls": [
+                {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}]})
+            out: Dict[str, Any] = {}
+            async for ev in self._run_tools([call], 0, deadline, timing, tr, append):
+                out = ev.pop("result", out)
+                yield ev
+            rounds = 1
+            text = route.render(out, route.args) if self.router.mode == "template" else None
+            if text is not None:
+                answer = text
+                append({"role": "assistant", "content": text})
+                yield {"type": "token", "round": rounds, "content": text}
+            else:
+                summarize, fell_back = True, self.router.mode == "template"
+
+        while not route or summarize:
+            last = rounds >= self.max_rounds or summarize   # ask for an answer with no tools offered
+            resp, sent, n_llm = None, len(messages), len(timing["llm"])
+            first = pf if pf and rounds == 0 else None
+            early: Dict[str, Any] = {}   # id -> (call, future, started at) for calls dispatched mid-stream
+            try:
+                if time.monotonic() >= deadline:
+                    raise asyncio.TimeoutError
+                async for ev in self._llm(messages, [] if last else offered, deadline, timing):
+                    if ev["type"] == "token":
+                        yield {"type": "token", "round": rounds, "content": ev["content"]}
+                    elif ev["type"] == "tool_call":
+                        tc = ev["call"]
+                        if last or not EARLY_TOOLS or tc["id"] in early:
+                            continue
+                        early[tc["id"]] = (tc, asyncio.ensure_future(self._dispatch_one(tc, deadline, first)),
+                                           time.perf_counter())
+                        yield {"type": "tool_start", "round": rounds, "id": tc["id"], "name": tc["name"],
+                               "arguments": tc["arguments"]}
+                    else:
+                        resp = ev["response"]
+            except BaseException as e:
+                _drop(early)
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                if len(timing["llm"]) > n_llm:   # the call was made and cut off
+                    tr.llm(rounds, sent, None, timing["llm"][n_llm], error="timeout")
+                if time.monotonic() < deadline:
+                    raise   # an HTTP timeout from the client, not our budget
+                stopped = "deadline"
+                _close(f"(Stopped: this turn ran out of time after {self.budget_s:g}s.)")
+                break
+            tr.llm(rounds, sent, resp, timing["llm"][n_llm] if len(timing["llm"]) > n_llm else None)
+
+            msg = message_of(resp or {})
+            calls = extract_tool_invocations(resp or {})
+            # early dispatches stand only if the finished message asked for exactly that call
+            ended, running = time.perf_counter(), {}
+            for tc in calls:
+                hit = early.pop(tc["id"], None)
+                if hit and (hit[0]["name"], hit[0]["arguments"]) == (tc["name"], tc.get("arguments") or "{}"):
+                    running[tc["id"]] = (hit[1], _ms(ended - hit[2]))
+                elif hit:
+                    hit[1].cancel()
+            _drop(early)
+            if last and calls:
+                # the model still wants tools; keep it out of the transcript and say why we stopped
+                stopped = "max_rounds"
+                _close(f"(Stopped: reached the limit of {self.max_rounds} tool rounds for one question.)")
+                break
+            append(msg)
+            if not calls:
+                stopped = "max_rounds" if last and rounds and not summarize else "answer"
+                answer = (msg.get("content") or "").strip()
+                break
+
+            missed = {tc["name"] for tc in calls} - {t["function"]["name"] for t in offered}
+            if offered is not self.tools and missed:
+                tool_select.fallback()   # the selection missed: offer those tools from the next round on
+                offered, widened = tool_select.widen(offered, self.tools, missed), True
+            if first:
+                first.first_round(len(calls))
+            async for ev in self._run_tools(calls, rounds, deadline, timing, tr, append, first, running):
+                ev.pop("result", None)
+                yield ev
+            if first:
+                first.discard()
+            rounds += 1
+
+        timing["normalization_ms"] = round(timing["normalization_ms"], 1)
+        timing.update(rounds=rounds, total_ms=_ms(time.perf_counter() - started))
+        if self.select_tools:
+            timing["tool_select"] = {"offered": n_offered, "of": len(self.tools), "widened": widened}
+        if self.router.enabled:
+            saved = self.router.record_turn(timing, route, len(timing["llm"]), fell_back)
+            if route:
+                timing["route"] = {"intent": route.intent, "mode": "summarize" if summarize else "template",
+                                   "llm_ms_saved_est": saved}
+        metrics.TURN_SECONDS.observe(time.perf_counter() - started, stopped=stopped)
+        metrics.TURN_ROUNDS.observe(rounds)
+        tr.done(stopped, answer, timing)
+        yield {"type": "done", "answer": answer, "stopped": stopped, "timing": timing}
+
+    async def complete(self, messages: List[Dict[str, Any]],
+                       append: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """Run a turn to the end and return its done event."""
+        done: Dict[str, Any] = {}
+        async for ev in self.run(messages, append):
+            done = ev
+        return done
@@ -1,2 +1,207 @@
+import json, math, os, threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from LocalMind.utils import columnar
+from LocalMind import metrics
+
 def cap_rows(items, max_rows: int):
-    return items[:max_rows] if isinstance(items, list) else items
\ No newline at end of file
+    return items[:max_rows] if isinstance(items, list) else items
+
+# ---------- token-budgeted compaction of tool results ----------
+# Tool messages are prefill for the model; on CPU-only boxes prefill dominates
+# turn latency. Instead of cutting the JSON string at a byte offset, shrink the
+# result structurally until it fits the budget: drop diagnostics and low-value
+# fields, then keep only the leading rows of each row list and replace the rest
+# with a one-line summary. The tools already sort their rows by value (CPU,
+# memory, size, match confidence then recency), so leading rows are the ones
+# worth keeping. The output is always valid JSON.
+
+TOOL_TOKEN_BUDGET = int(os.getenv("LOCALMIND_TOOL_TOKEN_BUDGET", "2000"))
+CHARS_PER_TOKEN = 3.5     # rough for JSON (digits/punctuation tokenize densely)
+MAX_STR = 300             # long strings are clipped before anything else
+
+# rows: where the row lists live ("result" = the tool returned a bare list)
+# drop: row fields removed, in order, before any row is cut
+# noun/sum/count: how the tail summary names and totals the omitted rows
+# (noun defaults to the list's key; a dict maps keys to nouns)
+COMPACT_RULES: Dict[str, Dict[str, Any]] = {
+    "list_processes":      {"rows": ["result"], "drop": ["cmdline", "exe", "user"], "noun": "processes",
+                            "sum": {"memory_mb": ("MB", "RSS"), "cpu_percent": ("%", "CPU")}},
+    "network_activity":    {"rows": ["result"], "noun": "connections", "count": "process_name"},
+    "startup_items":       {"rows": ["result"], "drop": ["location"], "noun": "startup items"},
+    "find_files":          {"rows": ["results"], "drop_top": ["walk", "index", "roots"], "noun": "files",
+                            "sum": {"size_bytes": ("bytes", "")}},
+    "list_large_files":    {"rows": ["files", "folders"], "drop_top": ["scan", "params"],
+                            "drop": ["modified_utc"], "sum": {"size_bytes": ("bytes", "")}},
+    "list_scheduled_tasks":{"rows": ["tasks"], "drop_top": ["params"], "noun": "tasks",
+                            "drop": ["Description", "Triggers", "Author"], "count": "State"},
+    "wifi_info":           {"rows": ["networks"], "drop": ["bssids"], "noun": "networks"},
+    "process_detail":      {"rows": ["open_files", "connections", "children_pids"],
+                            "noun": {"open_files": "open files", "children_pids": "child processes"}},
+}
+
+_STATS = {"messages": 0, "compacted": 0, "bytes_in": 0, "bytes_out": 0, "tokens_in": 0, "tokens_out": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _clip_strings(obj: Any, limit: int) -> Any:
+    if isinstance(obj, str):
+        return obj if len(obj) <= limit else obj[:limit] + "…"
+    if isinstance(obj, list):
+        return [_clip_strings(v, limit) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _clip_strings(v, limit) for k, v in obj.items()}
+    return obj
+
+def _human(n: float, unit: str) -> str:
+    if unit == "bytes":
+        for u in ("B", "KB", "MB", "GB", "TB"):
+            if abs(n) < 1024 or u == "TB":
+                return f"{n:.1f} {u}"
+            n /= 1024
+    if unit == "MB" and n >= 1024:
+        return f"{n / 1024:.1f} GB"
+    return f"{n:.1f}{unit}" if unit == "%" else f"{n:.1f} {unit}"
+
+def _tail_summary(key: str, rows: List[Any], rule: Dict[str, Any]) -> str:
+    noun = rule.get("noun") or {}
+    if isinstance(noun, dict):
+        noun = noun.get(key) or ("items" if key == "result" else key.replace("_", " "))
+    parts = [f"+{len(rows)} more {noun}"]
+    dicts = [r for r in rows if isinstance(r, dict)]
+    for field, (unit, label) in (rule.get("sum") or {}).items():
+        total = sum(r.get(field) or 0 for r in dicts if isinstance(r.get(field) or 0, (int, float)))
+        parts.append(f"total {_human(total, unit)}" + (f" {label}" if label else ""))
+    if rule.get("count") and dicts:
+        counts: Dict[str, int] = {}
+        for r in dicts:
+            k = str(r.get(rule["count"]))
+            counts[k] = counts.get(k, 0) + 1
+        top = sorted(counts.items(), key=lambda kv: -kv[1])[:5]
+        parts.append("; ".join(f"{k} ×{v}" for k, v in top))
+    return ", ".join(parts)
+
+def _row_lists(data: Any, rule: Dict[str, Any]) -> List[str]:
+    if not isinstance(data, dict):
+        return []
+    keys = [k for k in rule.get("rows", []) if isinstance(data.get(k), list)]
+    # unknown tools: every top-level list is a row list
+    return keys or [k for k, v in data.items() if isinstance(v, list) and v]
+
+def _cut(data: Dict[str, Any], full: Dict[str, list], keys: List[str], frac: float,
+         rule: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(data)
+    for k in keys:
+        rows = full[k]
+        keep = max(1, int(len(rows) * frac)) if rows else 0
+        out[k] = rows[:keep]
+        out.pop(f"{k}_omitted", None)
+        if keep < len(rows):
+            out[f"{k}_omitted"] = _tail_summary(k, rows[keep:], rule)
+    return out
+
+
+def compact_tool_result(name: str, out: Any, budget: Optional[int] = None,
+                        columnar_mode: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    JSON text for a tool message, at most ~budget tokens, plus a stats dict
+    (bytes/tokens before and after, rows kept/omitted). Row lists are sent
+    header + rows when utils/columnar.py says so (columnar_mode overrides
+    LOCALMIND_COLUMNAR).
+    """
+    budget = budget or TOOL_TOKEN_BUDGET
+    rule = COMPACT_RULES.get(name, {})
+    serialize = lambda obj: _dumps(columnar.encode(obj, columnar_mode))
+    raw = _dumps(out)
+    stats = {"bytes_in": len(raw.encode("utf-8")), "tokens_in": estimate_tokens(raw), "compacted": False}
+    encoded = columnar.encode(out, columnar_mode)
+    stats["columnar"] = encoded != out
+    text = _dumps(encoded)
+
+    if estimate_tokens(text) > budget:
+        stats["compacted"] = True
+        text = _shrink(out, rule, budget, stats, serialize)
+
+    stats["bytes_out"] = len(text.encode("utf-8"))
+    stats["tokens_out"] = estimate_tokens(text)
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+    stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+    with _STATS_LOCK:
+        _STATS["messages"] += 1
+        _STATS["compacted"] += int(stats["compacted"])
+        _STATS["bytes_in"] += stats["bytes_in"]
+        _STATS["bytes_out"] += stats["bytes_out"]
+        _STATS["tokens_in"] += stats["tokens_in"]
+        _STATS["tokens_out"] += stats["tokens_out"]
+    return text, stats
+
+def _shrink(out: Any, rule: Dict[str, Any], budget: int, stats: Dict[str, Any],
+            serialize: Callable[[Any], str]) -> str:
+    fits = lambda obj: estimate_tokens(serialize(obj)) <= budget
+
+    # a bare list from the tool is wrapped by dispatch as {"ok": True, "result": [...]}
+    data = out if isinstance(out, dict) else {"result": out}
+
+    # 1) diagnostics nobody needs to answer the question
+    data = {k: v for k, v in data.items() if k not in (rule.get("drop_top") or [])}
+    # 2) clip long strings
+    data = _clip_strings(data, MAX_STR)
+    keys = _row_lists(data, rule)
+    # 3) low-value row fields, one at a time
+    for field in rule.get("drop") or []:
+        if fits(data):
+            break
+        for k in keys:
+            data[k] = [{c: v for c, v in r.items() if c != field} if isinstance(r, dict) else r
+                       for r in data[k]]
+
+    rows_total = sum(len(data[k]) for k in keys)
+    if fits(data) or not keys:
+        result = data
+    else:
+        # 4) keep the leading fraction of every row list; binary search the largest that fits
+        full = {k: data[k] for k in keys}
+        lo, hi = 0.0, 1.0
+        result = _cut(data, full, keys, 0.0, rule)
+        for _ in range(12):
+            mid = (lo + hi) / 2
+            cand = _cut(data, full, keys, mid, rule)
+            if fits(cand):
+                lo, result = mid, cand
+            else:
+                hi = mid
+
+    kept = sum(len(result[k]) for k in keys if isinstance(result.get(k), list))
+    stats["rows_kept"], stats["rows_omitted"] = kept, rows_total - kept
+
+    text = serialize(result)
+    if estimate_tokens(text) > budget:
+        # 5) still too big (huge scalar fields): valid JSON with a clipped preview
+        limit = int(budget * CHARS_PER_TOKEN) - 200
+        text = _dumps({"ok": data.get("ok", True) if isinstance(data, dict) else True,
+                       "truncated": True, "preview": text[:max(limit, 0)]})
+    return text
+
+def compaction_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        s = dict(_STATS)
+    s["bytes_saved"] = s["bytes_in"] - s["bytes_out"]
+    s["tokens_saved"] = s["tokens_in"] - s["tokens_out"]
+    return s
+
+def _collect():
+    s = compaction_stats()
+    return [
+        ("localmind_tool_messages_total", "counter", "Tool results sent to the model, by whether they were compacted.",
+         [({"compacted": "true"}, s["compacted"]), ({"compacted": "false"}, s["messages"] - s["compacted"])]),
+        ("localmind_tool_result_tokens_total", "counter", "Estimated tool result tokens before and after compaction.",
+         [({"stage": "raw"}, s["tokens_in"]), ({"stage": "sent"}, s["tokens_out"])]),
+    ]
+
+metrics.register_collector(_collect)
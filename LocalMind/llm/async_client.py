@@ -0,0 +1,150 @@
+import asyncio, contextlib, json, time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from LocalMind import metrics
+from LocalMind.llm import pool as backend_pool
+from LocalMind.llm.lifecycle import get_lifecycle
+from LocalMind.llm.ollama_client import MODEL
+from LocalMind.llm.pool import Backend, affinity_key, get_pool
+from LocalMind.llm.tool_calls import ToolCallStream
+
+# Model client of the agent loop (CLI and server). Requests go to a backend of the
+# pool (llm/pool.py), each backend with one pooled aiohttp session so
+# connections to Ollama are kept alive instead of being re-opened per call.
+# (aiohttp rather than httpx: httpcore's pool bookkeeping is quadratic in
+# open connections and became the bottleneck under load.)
+
+# failures to reach a backend at all; the request is safe to send elsewhere
+_UNREACHABLE = (aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError, aiohttp.ServerTimeoutError)
+
+
+async def aclose() -> None:
+    await get_pool().aclose()
+
+
+def _outcome(e: BaseException) -> str:
+    # cancelled: turn deadline, client disconnect or an abandoned stream
+    return "cancelled" if isinstance(e, (asyncio.CancelledError, GeneratorExit)) else "error"
+
+
+@contextlib.asynccontextmanager
+async def _post(path: str, payload: Dict[str, Any]) -> AsyncIterator[Tuple[Backend, aiohttp.ClientResponse]]:
+    """
+    POST to a backend picked for the conversation and yield (backend, response)
+    once the headers are in. Unreachable backends and full queues are retried
+    on another backend; the outcome feeds that backend's circuit breaker.
+    """
+    pool, key, tried = get_pool(), affinity_key(payload.get("messages") or []), []
+    for attempt in range(backend_pool.RETRIES + 1):
+        b = pool.acquire(key, tried)
+        try:
+            r = await b.http().post(path, json=payload)
+        except _UNREACHABLE:
+            pool.release(b, False)
+            if attempt == backend_pool.RETRIES:
+                raise
+            pool.retried(b)
+            tried.append(b)
+            continue
+        except Exception:
+            pool.release(b, False)
+            raise
+        except BaseException:
+            pool.release(b, None)
+            raise
+        if r.status in backend_pool.RETRY_STATUS and attempt < backend_pool.RETRIES:
+            r.close()
+            pool.release(b, False)
+            pool.retried(b)
+            tried.append(b)
+            continue
+        ok: Optional[bool] = None   # stays None when the caller abandons the request
+        try:
+            async with r:
+                yield b, r
+            ok = r.status < 500
+        except aiohttp.ClientResponseError as e:
+            ok = e.status < 500
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            pool.release(b, ok)
+        return
+
+
+class AsyncOllama:
+    def __init__(self, model: str = MODEL):
+        self.model = model
+
+    def _payload(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": "auto",
+            "temperature": 0.0,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+
+    async def chat_stream(self, messages: List[Dict[str, Any]],
+                          tools: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream one completion: token events, then {"type": "done", "response": resp,
+        "timing": {"ttft_ms", "total_ms"}}. ttft_ms is the time to the first streamed chunk
+        (request + prompt prefill, and a model load when start is "cold"; see lifecycle.py);
+        the rest of total_ms is generation. In between,
+        {"type": "tool_call", "call": {"id", "name", "arguments"}} is yielded as soon as a
+        call's arguments are complete, possibly well before the message ends.
+        """
+        content: List[str] = []
+        parser = ToolCallStream()
+        finish, usage, ttft = None, None, None
+        t0 = time.perf_counter()
+        metrics.LLM_IN_FLIGHT.inc()
+        try:
+            async with _post("/v1/chat/completions", self._payload(messages, tools)) as (b, r):
+                start = get_lifecycle(b.url).request_started()
+                r.raise_for_status()
+                async for raw in r.content:
+                    line = raw.decode("utf-8").strip()
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if ttft is None:
+                        ttft = time.perf_counter() - t0
+                        metrics.LLM_TTFT_SECONDS.observe(ttft, start=start)
+                    usage = chunk.get("usage") or usage
+                    choice = (chunk.get("choices") or [{}])[0]
+                    delta = choice.get("delta") or {}
+                    finish = choice.get("finish_reason") or finish
+                    if delta.get("content"):
+                        content.append(delta["content"])
+                        yield {"type": "token", "content": delta["content"]}
+                    for call in parser.feed(delta):
+                        yield {"type": "tool_call", "call": call}
+        except BaseException as e:
+            metrics.observe_llm("stream", _outcome(e), time.perf_counter() - t0)
+            raise
+        finally:
+            metrics.LLM_IN_FLIGHT.dec()
+
+        for call in parser.finish():
+            yield {"type": "tool_call", "call": call}
+        message: Dict[str, Any] = {"role": "assistant", "content": "".join(content), **parser.message_fields()}
+        resp: Dict[str, Any] = {"choices": [{"index": 0, "message": message, "finish_reason": finish}]}
+        if usage:
+            resp["usage"] = usage
+        total = time.perf_counter() - t0
+        metrics.observe_llm("stream", "ok", total, usage)
+        get_lifecycle(b.url).request_finished()
+        yield {"type": "done", "response": resp,
+               "timing": {"ttft_ms": round((total if ttft is None else ttft) * 1000, 1),
+                          "total_ms": round(total * 1000, 1), "start": start, "backend": b.url}}
@@ -0,0 +1,204 @@
+import asyncio, os, re, time
+from typing import Any, Dict, Optional
+
+from LocalMind import metrics
+
+# Model residency for the server. Ollama loads a model on its first request
+# and unloads it after keep_alive of idleness (OLLAMA_KEEP_ALIVE, 5 min by
+# default); whoever asks next pays the full load on top of inference. At
+# startup the server warms the model with one native /api/chat call that
+# carries the system prompt and the tools block turns start with (TOOL_SPEC,
+# or its CORE head with tool selection on), so the load is paid up front and
+# that shared prompt prefix is already in the KV cache for the first real
+# request. Afterwards a keeper re-pins the model every LOCALMIND_KEEP_ALIVE_CHECK
+# seconds (the /v1 API cannot send keep_alive, so every chat resets the
+# timer to the server default) and reloads it if /api/ps shows it gone.
+#
+# Every chat request is classified warm, cold or unknown when it starts, and
+# its TTFT is recorded under that label, so cold starts stand out in /metrics.
+# Residency is per backend: each Ollama of the pool (llm/pool.py) has its own
+# ModelLifecycle.
+#   LOCALMIND_WARMUP=0            no warmup or keeper (requests are still classified)
+#   LOCALMIND_KEEP_ALIVE=30m      keep_alive sent when pinning; "-1" never unloads
+
+WARMUP = os.getenv("LOCALMIND_WARMUP", "1") == "1"
+KEEP_ALIVE = os.getenv("LOCALMIND_KEEP_ALIVE", "30m")
+CHECK_INTERVAL = float(os.getenv("LOCALMIND_KEEP_ALIVE_CHECK", "60"))
+WARMUP_TIMEOUT = float(os.getenv("LOCALMIND_WARMUP_TIMEOUT", "600"))     # a large model from disk can take minutes
+DEBUG = os.getenv("LOCALMIND_DEBUG", "0") == "1"
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(value: Any) -> float:
+    """Seconds for an Ollama keep_alive ("30m", "1h30m", 300, "-1"); negative means forever."""
+    text = str(value).strip()
+    try:
+        n = float(text)
+        return float("inf") if n < 0 else n
+    except ValueError:
+        pass
+    if text.startswith("-"):
+        return float("inf")
+    parts = _DURATION.findall(text)
+    if not parts:
+        raise ValueError(f"not a keep_alive duration: {value!r}")
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+# what a /v1 request leaves the model pinned for: the Ollama server's own default
+DEFAULT_KEEP_ALIVE_S = keep_alive_seconds(os.getenv("OLLAMA_KEEP_ALIVE", "5m"))
+
+
+def model_tag(name: Any) -> str:
+    """Ollama's full name for a model: "llama3.1" is "llama3.1:latest" in /api/ps."""
+    name = str(name or "").strip()
+    return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+
+class ModelLifecycle:
+    def __init__(self, model: str, url: str, keep_alive: str = KEEP_ALIVE, interval: float = CHECK_INTERVAL):
+        self.model, self.url, self.keep_alive, self.interval = model, url, keep_alive, interval
+        self.resident: Optional[bool] = None     # None until a warmup, check or request says otherwise
+        self.expires: Optional[float] = None     # monotonic time Ollama may unload the model after
+        self._task: Optional["asyncio.Task"] = None
+        self._stats: Dict[str, Any] = {"loads": 0, "last_load_ms": None, "last_prefill_ms": None,
+                                       "prefix_tokens": None, "unloads_seen": 0, "checks": 0, "errors": 0,
+                                       "requests": {"warm": 0, "cold": 0, "unknown": 0}}
+
+    # ---- request classification (called by the chat clients) ----
+
+    def request_started(self) -> str:
+        """"warm", "cold" or "unknown" for a request about to be sent."""
+        if self.resident is False or (self.expires is not None and time.monotonic() > self.expires):
+            state = "cold"
+        else:
+            state = "warm" if self.resident else "unknown"
+        self._stats["requests"][state] += 1
+        return state
+
+    def request_finished(self) -> None:
+        """A chat completed: the model is loaded, pinned for the server's default keep_alive."""
+        self.resident = True
+        self.expires = time.monotonic() + DEFAULT_KEEP_ALIVE_S
+
+    # ---- warmup and keeper ----
+
+    def _http(self):
+        from LocalMind.llm.pool import get_pool
+        return get_pool().backend(self.url).http()
+
+    def _pinned(self) -> None:
+        self.resident = True
+        self.expires = time.monotonic() + keep_alive_seconds(self.keep_alive)
+
+    async def warmup(self, reason: str = "startup") -> Dict[str, Any]:
+        """
+        Load the model and prefill the system prompt + tools prefix with one
+        generated token. Returns load_ms (Ollama's load_duration when reported),
+        prefill_ms and the prefix size in tokens.
+        """
+        import aiohttp
+        from LocalMind import tool_select
+        from LocalMind.tool_spec import SYSTEM_PROMPT, TOOL_SPEC
+        body = {"model": self.model, "stream": False, "keep_alive": self.keep_alive,
+                "tools": tool_select.warm_tools(TOOL_SPEC),
+                "messages": [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "Hi"}],
+                "options": {"num_predict": 1, "temperature": 0.0}}
+        t0 = time.perf_counter()
+        async with self._http().post("/api/chat", json=body, timeout=aiohttp.ClientTimeout(total=WARMUP_TIMEOUT)) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+        wall = time.perf_counter() - t0
+        load_s = data["load_duration"] / 1e9 if data.get("load_duration") else None
+        prefill_s = data["prompt_eval_duration"] / 1e9 if data.get("prompt_eval_duration") else None
+        if load_s is not None:
+            metrics.MODEL_LOAD_SECONDS.observe(load_s, reason=reason)
+        self._pinned()
+        st = self._stats
+        st["loads"] += 1
+        st["last_load_ms"] = None if load_s is None else round(load_s * 1000, 1)
+        st["last_prefill_ms"] = None if prefill_s is None else round(prefill_s * 1000, 1)
+        st["prefix_tokens"] = data.get("prompt_eval_count")
+        return {"reason": reason, "wall_ms": round(wall * 1000, 1), "load_ms": st["last_load_ms"],
+                "prefill_ms": st["last_prefill_ms"], "prefix_tokens": st["prefix_tokens"]}
+
+    async def check(self) -> None:
+        """Re-pin the model if it is loaded, reload it if it is not."""
+        self._stats["checks"] += 1
+        async with self._http().get("/api/ps") as r:
+            r.raise_for_status()
+            loaded = {model_tag(m.get(k)) for m in (await r.json(content_type=None)).get("models") or []
+                      for k in ("name", "model") if m.get(k)}
+        if model_tag(self.model) not in loaded:
+            if self.resident:
+                self._stats["unloads_seen"] += 1
+                metrics.MODEL_UNLOADS.inc()
+            self.resident = False
+            await self.warmup("reload")
+            return
+        body = {"model": self.model, "keep_alive": self.keep_alive}   # no prompt: only resets the timer
+        async with self._http().post("/api/generate", json=body) as r:
+            r.raise_for_status()
+            await r.read()
+        self._pinned()
+
+    async def _run(self) -> None:
+        try:
+            info = await self.warmup("startup")
+            if DEBUG:
+                print(f"[lifecycle] {self.model} warm on {self.url}: {info}")
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"[warning] Warmup of {self.model} on {self.url} failed: {e!r}")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:   # Ollama down or restarting: try again next interval
+                self._stats["errors"] += 1
+                self.resident = None
+                if DEBUG:
+                    print(f"[lifecycle] keep-alive check failed: {e!r}")
+
+    def start(self) -> None:
+        """Warm up in the background (the server accepts requests meanwhile) and keep the model loaded."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        exp = self.expires
+        return {"model": self.model, "url": self.url, "keep_alive": self.keep_alive, "resident": self.resident,
+                "expires_in_s": None if exp is None else round(exp - time.monotonic(), 1),
+                **self._stats, "requests": dict(self._stats["requests"])}
+
+
+_LIFECYCLES: Dict[str, ModelLifecycle] = {}
+
+def get_lifecycle(url: Optional[str] = None) -> ModelLifecycle:
+    """The lifecycle of the backend at url (default: the first backend of the pool)."""
+    from LocalMind.llm.ollama_client import MODEL
+    from LocalMind.llm.pool import get_pool
+    url = get_pool().backend(url).url
+    lc = _LIFECYCLES.get(url)
+    if lc is None:
+        lc = _LIFECYCLES[url] = ModelLifecycle(MODEL, url)
+    return lc
+
+def _collect():
+    samples = [({"model": lc.model, "backend": lc.url}, int(lc.resident))
+               for lc in list(_LIFECYCLES.values()) if lc.resident is not None]
+    if not samples:
+        return []
+    return [("localmind_model_resident", "gauge", "Whether the model is believed loaded in Ollama.", samples)]
+
+metrics.register_collector(_collect)
@@ -0,0 +1,225 @@
+import asyncio, hashlib, json, os, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from LocalMind import metrics
+
+# The Ollama backends LocalMind spreads model calls over. OLLAMA_URLS is a
+# comma-separated list (OLLAMA_URL alone is a pool of one). Each call goes to
+# a backend picked by:
+#   affinity    the backend that served this conversation before, so its KV
+#               cache still holds the prompt prefix, unless it is unavailable
+#               or has more than AFFINITY_SLACK requests above the least busy
+#   least busy  otherwise, the backend with the fewest outstanding requests
+# A backend's circuit opens after MAX_FAILURES consecutive failures
+# (connection errors, 5xx) or a failed health check; it gets no traffic for
+# COOLDOWN seconds, then one trial request (half-open) decides whether it
+# closes again. A passing health check closes it too. With every circuit
+# open the least recently opened backend is tried anyway, so a pool of one
+# behaves as it did without the pool.
+#
+# Requests that could not reach a backend (refused, dropped before the
+# response, 503 from a full Ollama queue) are retried on another one, up to
+# RETRIES times; streams are only retried before their first chunk.
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
+OLLAMA_URLS = [u.strip().rstrip("/") for u in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()]
+MAX_FAILURES = int(os.getenv("LOCALMIND_BACKEND_MAX_FAILURES", "3"))
+COOLDOWN = float(os.getenv("LOCALMIND_BACKEND_COOLDOWN", "10"))             # seconds an open circuit rests
+HEALTH_INTERVAL = float(os.getenv("LOCALMIND_BACKEND_HEALTH_INTERVAL", "5"))
+RETRIES = int(os.getenv("LOCALMIND_BACKEND_RETRIES", "2"))
+AFFINITY_SLACK = int(os.getenv("LOCALMIND_AFFINITY_SLACK", "2"))
+AFFINITY_MAX = 10000                                                         # conversations remembered
+
+# one connection per admitted chat (see LOCALMIND_MAX_CONCURRENT in server.py)
+MAX_CONNECTIONS = int(os.getenv("LOCALMIND_OLLAMA_CONNECTIONS", os.getenv("LOCALMIND_MAX_CONCURRENT", "64")))
+
+RETRY_STATUS = {503}   # Ollama's answer when its request queue is full
+
+
+def affinity_key(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    A conversation's key: its messages up to and including the first user
+    message, which stay the same for every call of the conversation. Two
+    conversations opening with the same question share a prefix, and a backend.
+    """
+    for i, m in enumerate(messages):
+        if m.get("role") == "user":
+            head = json.dumps(messages[:i + 1], sort_keys=True, ensure_ascii=False)
+            return hashlib.blake2b(head.encode("utf-8"), digest_size=8).hexdigest()
+    return None
+
+
+class Backend:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.state = "closed"            # closed | open | half_open
+        self.failures = 0                # consecutive
+        self.opened_at = 0.0
+        self.healthy: Optional[bool] = None
+        self.stats = {"requests": 0, "ok": 0, "failed": 0, "abandoned": 0, "retried_away": 0, "opened": 0}
+        self._http = None
+
+    def http(self):
+        """This backend's pooled aiohttp session (created in the running event loop)."""
+        import aiohttp
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                base_url=self.url,
+                timeout=aiohttp.ClientTimeout(total=120, sock_connect=5),
+                connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=300),
+            )
+        return self._http
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"url": self.url, "state": self.state, "outstanding": self.outstanding,
+                "healthy": self.healthy, "failures": self.failures, **self.stats}
+
+
+class BackendPool:
+    def __init__(self, urls: Iterable[str] = OLLAMA_URLS):
+        self.backends = [Backend(u) for u in urls]
+        if not self.backends:
+            raise ValueError("OLLAMA_URLS lists no backend")
+        self._by_url = {b.url: b for b in self.backends}
+        self._affinity: "OrderedDict[str, Backend]" = OrderedDict()
+        self._lock = threading.Lock()      # stats() is also read by the metrics collector
+        self._health: Optional["asyncio.Task"] = None
+        self._stats = {"affinity_hits": 0, "affinity_moves": 0, "retries": 0}
+
+    def backend(self, url: Optional[str] = None) -> Backend:
+        return self._by_url[url.rstrip("/")] if url else self.backends[0]
+
+    def acquire(self, key: Optional[str] = None, exclude: Iterable[Backend] = ()) -> Backend:
+        """Pick a backend for one request and count it outstanding; pair with release()."""
+        now = time.monotonic()
+        with self._lock:
+            excluded = set(exclude)
+            pool = [b for b in self.backends if b not in excluded] or self.backends
+            ready = [b for b in pool if b.state == "closed"]
+            rested = [b for b in pool if b.state == "open" and now - b.opened_at >= COOLDOWN]
+            if rested:
+                pick = rested[0]        # this request is the trial
+                pick.state = "half_open"
+            elif ready:
+                pick = min(ready, key=lambda b: b.outstanding)
+            else:   # nothing closed: the oldest open circuit, or one already on trial
+                pick = min(pool, key=lambda b: (b.state != "half_open", b.opened_at))
+            if key is not None and not rested:
+                sticky = self._affinity.get(key)
+                if sticky in ready and sticky.outstanding <= pick.outstanding + AFFINITY_SLACK:
+                    pick = sticky
+                    self._stats["affinity_hits"] += 1
+                elif sticky is not None:
+                    self._stats["affinity_moves"] += 1
+                self._affinity[key] = pick
+                self._affinity.move_to_end(key)
+                while len(self._affinity) > AFFINITY_MAX:
+                    self._affinity.popitem(last=False)
+            pick.outstanding += 1
+            pick.stats["requests"] += 1
+        return pick
+
+    def release(self, b: Backend, ok: Optional[bool]) -> None:
+        """
+        End a request on b. ok=False counts towards opening its circuit; None
+        (the caller abandoned the request) says nothing about the backend, and
+        a half-open trial that was abandoned leaves the circuit open as before.
+        """
+        with self._lock:
+            b.outstanding -= 1
+            if ok is None:
+                b.stats["abandoned"] += 1
+                if b.state == "half_open":
+                    b.state = "open"      # opened_at kept: the next request is the trial
+            elif ok:
+                b.stats["ok"] += 1
+                b.failures = 0
+                b.state = "closed"
+            else:
+                b.stats["failed"] += 1
+                b.failures += 1
+                if b.state == "half_open" or b.failures >= MAX_FAILURES:
+                    self._open(b)
+        outcome = "abandoned" if ok is None else "ok" if ok else "error"
+        metrics.BACKEND_REQUESTS.inc(backend=b.url, outcome=outcome)
+
+    def retried(self, b: Backend) -> None:
+        with self._lock:
+            b.stats["retried_away"] += 1
+            self._stats["retries"] += 1
+        metrics.BACKEND_REQUESTS.inc(backend=b.url, outcome="retried")
+
+    def _open(self, b: Backend) -> None:
+        if b.state != "open":
+            b.stats["opened"] += 1
+        b.state, b.opened_at = "open", time.monotonic()
+
+    # ---- health checks ----
+
+    async def check(self, b: Backend) -> bool:
+        import aiohttp
+        try:
+            async with b.http().get("/api/version", timeout=aiohttp.ClientTimeout(total=2)) as r:
+                ok = r.status == 200
+                await r.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        with self._lock:
+            b.healthy = ok
+            if ok and b.state != "closed" and not b.outstanding:
+                b.state, b.failures = "closed", 0
+            elif not ok:
+                self._open(b)
+        return ok
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(b) for b in self.backends))
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    def start(self) -> None:
+        """Start the periodic health checks (only worth it with more than one backend)."""
+        if self._health is None or self._health.done():
+            self._health = asyncio.ensure_future(self._health_loop())
+
+    async def aclose(self) -> None:
+        if self._health is not None:
+            self._health.cancel()
+            try:
+                await self._health
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._health = None
+        for b in self.backends:
+            if b._http is not None:
+                await b._http.close()
+                b._http = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "conversations": len(self._affinity),
+                    "backends": [b.snapshot() for b in self.backends]}
+
+
+_POOL: Optional[BackendPool] = None
+
+def get_pool() -> BackendPool:
+    global _POOL
+    if _POOL is None:
+        _POOL = BackendPool()
+    return _POOL
+
+_STATE = {"closed": 0, "half_open": 1, "open": 2}
+
+def _collect():
+    if _POOL is None:
+        return []
+    backends = _POOL.stats()["backends"]
+    return [("localmind_backend_outstanding", "gauge", "Model requests in flight per Ollama backend.",
+             [({"backend": b["url"]}, b["outstanding"]) for b in backends]),
+            ("localmind_backend_circuit_state", "gauge", "Backend circuit: 0 closed, 1 half-open, 2 open.",
+             [({"backend": b["url"]}, _STATE[b["state"]]) for b in backends])]
+
+metrics.register_collector(_collect)
@@ -0,0 +1,218 @@
+import json, re
+from typing import Any, Dict, List, Optional, Union
+
+# Tool-call extraction shared by the agent loop (CLI and server), for whole
+# responses (extract_tool_invocations) and for streams (ToolCallStream, which
+# reports each call as soon as its arguments are complete so the agent can
+# start it while the model is still generating).
+#
+# Three shapes are understood, in order of preference:
+#   OpenAI tool_calls    message.tool_calls[].function.{name, arguments}
+#   legacy function_call message.function_call.{name, arguments}
+#   inline JSON          {"name": ..., "parameters"|"arguments": {...}} objects in the text,
+#                        or {"function": {"name", "arguments"}}; several objects give several calls
+# Inline JSON is found with a brace-balanced scanner (JsonObjects), not a
+# regex: it is linear in the text, respects strings and escapes, and
+# separates consecutive objects.
+
+_SPECIAL = re.compile(r'[{}"\\]')
+
+
+class JsonObjects:
+    """Splits top-level {...} objects out of text fed in arbitrary chunks."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_str = False
+        self._skip = -1          # offset, in the next chunk, of a character escaped by a backslash
+        self._cur: List[str] = []
+
+    def feed(self, text: str) -> List[str]:
+        done: List[str] = []
+        pos = 0
+        if self.depth == 0:
+            pos = text.find("{")   # prose between objects is skipped wholesale
+            if pos < 0:
+                self._skip = -1
+                return done
+        start, skip, self._skip = pos, self._skip, -1
+        for m in _SPECIAL.finditer(text, pos):
+            i, c = m.start(), m.group()
+            if i == skip:
+                continue
+            if self.in_str:
+                if c == "\\":
+                    skip = i + 1
+                elif c == '"':
+                    self.in_str = False
+            elif self.depth == 0:
+                if c == "{":
+                    self.depth, start = 1, i
+            elif c == '"':
+                self.in_str = True
+            elif c == "{":
+                self.depth += 1
+            elif c == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._cur.append(text[start:i + 1])
+                    done.append("".join(self._cur))
+                    self._cur = []
+        if self.depth:
+            self._cur.append(text[start:])
+        if skip == len(text):
+            self._skip = 0
+        return done
+
+
+def _as_call(obj: Any) -> Optional[Dict[str, Any]]:
+    """{"name", "arguments"} for an inline object shaped like a tool call, else None."""
+    if not isinstance(obj, dict):
+        return None
+    if isinstance(obj.get("function"), dict):
+        obj = obj["function"]
+    name = obj.get("name")
+    if not isinstance(name, str) or not name or not ({"parameters", "arguments"} & obj.keys() or len(obj) == 1):
+        return None
+    args = obj.get("parameters", obj.get("arguments")) or {}
+    return {"name": name, "arguments": args if isinstance(args, str) else json.dumps(args)}
+
+def inline_calls(text: str) -> List[Dict[str, Any]]:
+    """Tool calls written as JSON objects in message text, in order, with ids text_0, text_1, ..."""
+    out = []
+    for blob in JsonObjects().feed(text):
+        try:
+            call = _as_call(json.loads(blob))
+        except ValueError:
+            continue
+        if call:
+            out.append({"id": f"text_{len(out)}", **call})
+    return out
+
+
+def message_of(resp_json: Dict[str, Any]) -> Dict[str, Any]:
+    return (resp_json.get("choices", [{}])[0] or {}).get("message", {})
+
+def extract_tool_invocations(resp_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Return a list of {"id": str, "name": str, "arguments": str} from different response shapes.
+    """
+    invocations = []
+    msg = message_of(resp_json)
+
+    # 1) OpenAI multi-tool format
+    tc = msg.get("tool_calls") or []
+    for i, t in enumerate(tc):
+        fn = t.get("function", {})
+        args = fn.get("arguments") or "{}"
+        invocations.append({
+            "id": t.get("id", f"tool_{i}"),
+            "name": fn.get("name"),
+            "arguments": args if isinstance(args, str) else json.dumps(args),
+        })
+    if invocations:
+        return invocations
+
+    # 2) Older single function_call format
+    fc = msg.get("function_call")
+    if fc and isinstance(fc, dict) and fc.get("name"):
+        invocations.append({
+            "id": "func_0",
+            "name": fc["name"],
+            "arguments": fc.get("arguments") or "{}",
+        })
+        return invocations
+
+    # 3) Plain-text fallback: {"name": "...", "parameters": {...}} objects in content
+    content = msg.get("content") or ""
+    if '"name"' in content:
+        invocations = inline_calls(content)
+    return invocations
+
+
+class _Slot:
+    """One streamed structured call (a tool_calls index, or the function_call)."""
+
+    def __init__(self, call_id: str):
+        self.id, self.name, self.args = call_id, "", []
+        self.scanner = JsonObjects()
+        self.complete = self.emitted = False
+
+    def add(self, name: Optional[str], args: Union[str, Dict[str, Any], None]) -> None:
+        self.name += name or ""
+        if isinstance(args, dict):   # some servers send the arguments object itself
+            self.args, self.complete = [json.dumps(args)], True
+        elif args:
+            self.args.append(args)
+            if self.scanner.feed(args):
+                self.complete = True   # the arguments object just closed
+
+    def call(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "arguments": "".join(self.args) or "{}"}
+
+
+class ToolCallStream:
+    """
+    Incremental counterpart of extract_tool_invocations over streamed chat deltas.
+    feed(delta) returns the calls completed by that delta; finish() returns the
+    rest once the stream ends. Calls come out with the ids extract_tool_invocations
+    gives the reassembled message, so early and final views of a call match.
+    Inline JSON in content is only looked at while no structured call has appeared.
+    """
+
+    def __init__(self):
+        self.slots: Dict[Any, _Slot] = {}
+        self.text = JsonObjects()
+        self.inline: List[Dict[str, Any]] = []
+
+    def _ready(self, final: bool = False) -> List[Dict[str, Any]]:
+        out = []
+        for slot in self.slots.values():
+            if not slot.emitted and slot.name and (slot.complete or final):
+                slot.emitted = True
+                out.append(slot.call())
+        return out
+
+    def feed(self, delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+        for i, tc in enumerate(delta.get("tool_calls") or []):
+            idx = tc.get("index", i)
+            if idx not in self.slots:
+                for slot in self.slots.values():
+                    slot.complete = True   # a new index starts: the earlier calls are finished
+                self.slots[idx] = _Slot(f"call_{idx}")
+            slot = self.slots[idx]
+            slot.id = tc.get("id") or slot.id
+            fn = tc.get("function") or {}
+            slot.add(fn.get("name"), fn.get("arguments"))
+        fc = delta.get("function_call")
+        if isinstance(fc, dict):
+            self.slots.setdefault("function_call", _Slot("func_0")).add(fc.get("name"), fc.get("arguments"))
+        out = self._ready()
+        content = delta.get("content")
+        if content and not self.slots:
+            for blob in self.text.feed(content):
+                try:
+                    call = _as_call(json.loads(blob))
+                except ValueError:
+                    continue
+                if call:
+                    call = {"id": f"text_{len(self.inline)}", **call}
+                    self.inline.append(call)
+                    out.append(call)
+        return out
+
+    def finish(self) -> List[Dict[str, Any]]:
+        return self._ready(final=True)
+
+    def message_fields(self) -> Dict[str, Any]:
+        """tool_calls / function_call for the reassembled assistant message."""
+        fields: Dict[str, Any] = {}
+        calls = [s.call() for k, s in sorted(((k, s) for k, s in self.slots.items() if k != "function_call"),
+                                             key=lambda kv: kv[0])]
+        if calls:
+            fields["tool_calls"] = [{"id": c["id"], "type": "function",
+                                     "function": {"name": c["name"], "arguments": c["arguments"]}} for c in calls]
+        if "function_call" in self.slots:
+            c = self.slots["function_call"].call()
+            fields["function_call"] = {"name": c["name"], "arguments": c["arguments"]}
+        return fields
@@ -1,40 +1,73 @@
-import os, json, ast
-from typing import Any, Dict, List
+import os, json, ast, importlib, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 
 from LocalMind.utils.arg_normalize import normalize_args
+from LocalMind.utils import tool_cache
+from LocalMind import metrics
 
-from LocalMind.tools.system_overview import get_system_overview
-from LocalMind.tools.processes import list_processes, process_detail
-from LocalMind.tools.disks import disk_usage
-from LocalMind.tools.network import network_activity
-from LocalMind.tools.startup import startup_items
-from LocalMind.tools.file_search import find_files
-from LocalMind.tools.large_files import list_large_files
-from LocalMind.tools.wifi import wifi_info
-from LocalMind.tools.system_info import get_system_info
-from LocalMind.tools.scheduled_tasks import list_scheduled_tasks
-
-
-TOOLS = {
-    "get_system_overview": lambda args: get_system_overview(**args),
-    "list_processes":      lambda args: list_processes(**args),
-    "process_detail":      lambda args: process_detail(**args),
-    "disk_usage":          lambda args: disk_usage(**args),
-    "network_activity":    lambda args: network_activity(**args),
-    "startup_items":       lambda args: startup_items(**args),
-    "find_files":          lambda args: find_files(**args),
-    "list_large_files":    lambda args: list_large_files(**args),
-    "wifi_info":           lambda args: wifi_info(**args),
-    "get_system_info":     lambda args: get_system_info(**args),
-    "list_scheduled_tasks":lambda args: list_scheduled_tasks(**args),
+
+# Tool registry: "module:function" targets are imported on first dispatch, so
+# importing the dispatcher (CLI/server startup) loads no tool module, psutil
+# or winreg. A plain callable may be registered too.
+TOOLS: Dict[str, Any] = {
+    "get_system_overview": "LocalMind.tools.system_overview:get_system_overview",
+    "list_processes":      "LocalMind.tools.processes:list_processes",
+    "process_detail":      "LocalMind.tools.processes:process_detail",
+    "disk_usage":          "LocalMind.tools.disks:disk_usage",
+    "network_activity":    "LocalMind.tools.network:network_activity",
+    "startup_items":       "LocalMind.tools.startup:startup_items",
+    "find_files":          "LocalMind.tools.file_search:find_files",
+    "list_large_files":    "LocalMind.tools.large_files:list_large_files",
+    "wifi_info":           "LocalMind.tools.wifi:wifi_info",
+    "get_system_info":     "LocalMind.tools.system_info:get_system_info",
+    "list_scheduled_tasks":"LocalMind.tools.scheduled_tasks:list_scheduled_tasks",
 }
 
-def dispatch_tool_call(name: str, arguments_json_or_dict: Any) -> Dict[str, Any]:
-    fn = TOOLS.get(name)
-    if not fn:
-        return {"ok": False, "error": f"unknown tool: {name}"}
+_LOADED: Dict[str, Callable[..., Any]] = {}
+_LOAD_LOCK = threading.Lock()
 
-    # 1) Parse arguments from various shapes the model may emit
+def load_tool(name: str) -> Optional[Callable[..., Any]]:
+    """The tool function for name, importing its module on first use."""
+    fn = _LOADED.get(name)
+    if fn is not None:
+        return fn
+    target = TOOLS.get(name)
+    if target is None:
+        return None
+    with _LOAD_LOCK:
+        if callable(target):
+            fn = target
+        else:
+            module, attr = target.split(":")
+            fn = getattr(importlib.import_module(module), attr)
+        _LOADED[name] = fn
+    return fn
+
+# Bounded pool for blocking tool work when called from async code (server)
+TOOL_WORKERS = int(os.getenv("LOCALMIND_TOOL_WORKERS", "8"))
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="localmind-tool")
+
+# Per-call wall-clock limits (seconds). Tools that take timeout_seconds get at
+# least the value they will run with (after normalization and defaults) plus
+# TIMEOUT_GRACE, so their own partial results win over a hard timeout.
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("LOCALMIND_TOOL_TIMEOUT", "30"))
+TIMEOUT_GRACE = 5.0
+TOOL_TIMEOUTS = {
+    "get_system_overview": 10,
+    "list_processes":      10,
+    "process_detail":      10,
+    "disk_usage":          10,
+    "network_activity":    15,
+    "startup_items":       20,
+    "wifi_info":           15,
+    "get_system_info":     20,
+    "list_scheduled_tasks":30,
+    "find_files":          20,   # default timeout_seconds 8
+    "list_large_files":    20,   # default timeout_seconds 15 (arg_normalize)
+}
+
+def _parse_args(arguments_json_or_dict: Any) -> Dict[str, Any]:
     args: Dict[str, Any] = {}
     if isinstance(arguments_json_or_dict, dict):
         args = arguments_json_or_dict
@@ -55,6 +88,46 @@ def dispatch_tool_call(name: str, arguments_json_or_dict: Any) -> Dict[str, Any]
                 args = {}
     else:
         args = {}
+    return args
+
+def tool_label(name: str) -> str:
+    # metric label for a tool name; names the model made up share one series
+    return name if name in TOOLS else "unknown"
+
+def tool_timeout(name: str, arguments_json_or_dict: Any = None) -> float:
+    args = canonical_args(name, arguments_json_or_dict) or {}
+    limit = float(TOOL_TIMEOUTS.get(name, DEFAULT_TOOL_TIMEOUT))
+    t = args.get("timeout_seconds")
+    if isinstance(t, (int, float)) and not isinstance(t, bool):
+        return max(limit, float(t) + TIMEOUT_GRACE)
+    return limit
+
+def canonical_args(name: str, arguments_json_or_dict: Any) -> Optional[Dict[str, Any]]:
+    """
+    The arguments a call actually runs with: parsed, normalized and with the
+    tool's defaults filled in, so {} and {"top_n": 200} compare equal for
+    list_processes. None for unknown tools or arguments that do not normalize.
+    """
+    fn = load_tool(name)
+    if fn is None:
+        return None
+    try:
+        args = normalize_args(name, _parse_args(arguments_json_or_dict))
+    except Exception:
+        return None
+    import inspect
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return args
+    return {**{p.name: p.default for p in params if p.default is not inspect.Parameter.empty}, **args}
+
+def dispatch_tool_call(name: str, arguments_json_or_dict: Any, use_cache: bool = True) -> Dict[str, Any]:
+    if name not in TOOLS:
+        return {"ok": False, "error": f"unknown tool: {name}"}
+
+    # 1) Parse arguments from various shapes the model may emit
+    args = _parse_args(arguments_json_or_dict)
 
     # 2) Normalize/coerce types & clean paths (roots, booleans, ints, etc.)
     try:
@@ -66,9 +139,13 @@ def dispatch_tool_call(name: str, arguments_json_or_dict: Any) -> Dict[str, Any]
     if os.getenv("LOCALMIND_DEBUG", "0") == "1":
         print(f"[dispatch] {name} <- {args}")
 
-    # 3) Call the tool
+    # 3) Call the tool (memoized per tool TTL, see utils/tool_cache.py)
+    return tool_cache.get_tool_cache().get_or_call(
+        name, args, lambda: _invoke(name, args), use_cache=use_cache and tool_cache.ENABLED)
+
+def _invoke(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        out = fn(args)
+        out = load_tool(name)(**args)
 
         # If tool already returns a dict with ok/result/error, pass it through
         if isinstance(out, dict) and ("ok" in out or "result" in out or "error" in out):
@@ -77,4 +154,38 @@ def dispatch_tool_call(name: str, arguments_json_or_dict: Any) -> Dict[str, Any]
         # Otherwise, wrap the raw return
         return {"ok": True, "result": out}
     except Exception as e:
-        return {"ok": False, "error": f"{name} failed: {e.__class__.__name__}: {e}"}
\ No newline at end of file
+        return {"ok": False, "error": f"{name} failed: {e.__class__.__name__}: {e}"}
+
+def _timed_call(name: str, arguments_json_or_dict: Any, use_cache: bool = True) -> Dict[str, Any]:
+    t0, label = time.perf_counter(), tool_label(name)
+    with metrics.TOOLS_IN_FLIGHT.track(tool=label):
+        out = dispatch_tool_call(name, arguments_json_or_dict, use_cache)
+    if not isinstance(out, dict):
+        out = {"ok": True, "result": out}
+    elapsed = time.perf_counter() - t0
+    out["elapsed_ms"] = round(elapsed * 1000, 1)
+    result = "error" if out.get("ok") is False else "cached" if "cached_age_seconds" in out else "ok"
+    metrics.TOOL_SECONDS.observe(elapsed, tool=label, result=result)
+    return out
+
+def _timed_out(name: str, timeout: float) -> Dict[str, Any]:
+    # the worker thread cannot be killed; it finishes in the background and its result is dropped
+    metrics.TOOL_TIMEOUTS.inc(tool=tool_label(name))
+    return {"ok": False, "error": f"{name} timed out after {timeout:g}s", "elapsed_ms": round(timeout * 1000, 1)}
+
+async def dispatch_tool_call_async(name: str, arguments_json_or_dict: Any, use_cache: bool = True,
+                                   max_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    dispatch_tool_call on TOOL_EXECUTOR, so scans never block the event loop; timed and time-limited.
+    max_timeout caps the per-tool timeout (e.g. to what is left of a turn's deadline).
+    """
+    import asyncio   # only the agent loop needs it; keeps CLI startup light
+    loop = asyncio.get_running_loop()
+    timeout = tool_timeout(name, arguments_json_or_dict)
+    if max_timeout is not None:
+        timeout = max(0.0, min(timeout, max_timeout))
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(TOOL_EXECUTOR, _timed_call, name, arguments_json_or_dict, use_cache), timeout)
+    except asyncio.TimeoutError:
+        return _timed_out(name, timeout)
@@ -0,0 +1,207 @@
+import bisect, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# In-process metrics rendered in the Prometheus text exposition format
+# (server.py serves them on /metrics); no client library or push gateway.
+# Hot paths only touch a dict and a lock. Stats that already live elsewhere
+# (cache hit counters, session store) are read at scrape time by collectors
+# registered with register_collector().
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ROUND_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10)
+
+# collector() -> [(name, type, help, [(labels, value), ...]), ...]
+Sample = Tuple[Dict[str, Any], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+_METRICS: List["_Metric"] = []
+_COLLECTORS: List[Callable[[], List[Family]]] = []
+_REG_LOCK = threading.Lock()
+
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(pairs: Sequence[Tuple[str, Any]]) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._series: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        with _REG_LOCK:
+            _METRICS.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = self._header()
+        for key, v in series:
+            lines.append(f"{self.name}{_labels(list(zip(self.labelnames, key)))} {_num(v)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._series[k] = self._series.get(k, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._series[k] = self._series.get(k, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """In-flight count for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        k = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)   # first bucket with le >= value
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, ([*s[0]], s[1], s[2])) for k, s in self._series.items())
+        lines = self._header()
+        for key, (counts, total, n) in series:
+            pairs = list(zip(self.labelnames, key))
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _num(le))])} {acc}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_num(round(total, 6))}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {n}")
+        return lines
+
+
+def register_collector(fn: Callable[[], List[Family]]) -> None:
+    with _REG_LOCK:
+        if fn not in _COLLECTORS:
+            _COLLECTORS.append(fn)
+
+def render() -> str:
+    with _REG_LOCK:
+        metrics, collectors = list(_METRICS), list(_COLLECTORS)
+    lines: List[str] = []
+    for m in metrics:
+        lines += m.render()
+    for fn in collectors:
+        try:
+            families = fn()
+        except Exception:
+            continue   # a broken collector must not take /metrics down
+        for name, kind, help, samples in families:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(sorted(labels.items()))} {_num(v)}"
+                      for labels, v in samples if v is not None]
+    return "\n".join(lines) + "\n"
+
+
+# ---- hot-path metrics -------------------------------------------------------
+
+TOOL_SECONDS = Histogram("localmind_tool_seconds", "Tool dispatch latency (cache hits included).",
+                         ("tool", "result"))
+TOOL_TIMEOUTS = Counter("localmind_tool_timeouts_total", "Tool calls abandoned at their timeout.", ("tool",))
+TOOLS_IN_FLIGHT = Gauge("localmind_tools_in_flight", "Tool calls currently executing.", ("tool",))
+TOOL_RESULT_BYTES = Histogram("localmind_tool_result_bytes", "Tool result size before (raw) and after (sent) compaction.",
+                              ("tool", "stage"), buckets=BYTES_BUCKETS)
+
+LLM_SECONDS = Histogram("localmind_llm_seconds", "LLM request latency.", ("mode", "outcome"))
+LLM_TTFT_SECONDS = Histogram("localmind_llm_ttft_seconds", "Time to first streamed chunk (prompt prefill), by whether"
+                             " the model was expected loaded (warm), unloaded (cold) or unknown.", ("start",))
+LLM_IN_FLIGHT = Gauge("localmind_llm_requests_in_flight", "LLM requests currently open.")
+LLM_TOKENS = Counter("localmind_llm_tokens_total", "Tokens reported by the model server.", ("kind",))
+
+BACKEND_REQUESTS = Counter("localmind_backend_requests_total", "Model requests per Ollama backend by outcome"
+                           " (retried: sent to another backend; abandoned: cancelled by the caller).",
+                           ("backend", "outcome"))
+
+MODEL_LOAD_SECONDS = Histogram("localmind_model_load_seconds", "Model load time reported by Ollama for warmups.",
+                               ("reason",))
+MODEL_UNLOADS = Counter("localmind_model_unloads_total", "Times the keep-alive check found the model unloaded.")
+
+TURN_SECONDS = Histogram("localmind_turn_seconds", "Agent turn latency by how the turn ended.", ("stopped",))
+TURN_ROUNDS = Histogram("localmind_turn_tool_rounds", "Tool rounds per agent turn.", buckets=ROUND_BUCKETS)
+
+ROUTER_DECISIONS = Counter("localmind_router_decisions_total", "Questions the fast-path router answered (hit) or passed on.",
+                           ("outcome",))
+ROUTER_LLM_CALLS_SAVED = Counter("localmind_router_llm_calls_saved_total", "Model calls skipped by routed turns.")
+
+PREFETCH_RESULTS = Counter("localmind_prefetch_results_total", "Speculative tool prefetches by whether a call used them.",
+                           ("tool", "outcome"))
+
+TOOLS_OFFERED = Histogram("localmind_tools_offered", "Tool schemas offered to the model per turn.",
+                          buckets=(1, 2, 3, 4, 5, 6, 8, 10, 12, 16))
+TOOL_SELECT_FALLBACKS = Counter("localmind_tool_select_fallbacks_total",
+                                "Turns widened to the full tool set after the model asked for a tool it was not offered.")
+
+CHATS_IN_FLIGHT = Gauge("localmind_chats_in_flight", "Chat turns holding a concurrency slot.")
+CHATS_QUEUED = Gauge("localmind_chats_queued", "Chat turns waiting for a concurrency slot.")
+CHATS_REJECTED = Counter("localmind_chats_rejected_total", "Chat turns rejected with 503 after the queue timeout.")
+
+
+def observe_llm(mode: str, outcome: str, seconds: float, usage: Optional[Dict[str, Any]] = None) -> None:
+    LLM_SECONDS.observe(seconds, mode=mode, outcome=outcome)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and isinstance(usage.get(kind), (int, float)):
+            LLM_TOKENS.inc(usage[kind], kind=kind.split("_")[0])
@@ -0,0 +1,160 @@
+import asyncio, os, re, threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from LocalMind import metrics
+from LocalMind.mcp_server import canonical_args
+
+# Speculative tool prefetch. The model's first call for most questions only
+# picks a tool, and the likely ones are cheap and read-only, so the agent
+# starts them from the question text while that call is in flight. When the
+# model then asks for a tool whose canonical arguments (see
+# mcp_server.canonical_args) match a prefetch, the call is served from it;
+# prefetches the model did not ask for are dropped at the end of the turn.
+#
+# Cost is bounded three ways: only the tools below are ever prefetched, at
+# most PREFETCH_MAX per turn, and at most PREFETCH_CONCURRENCY across all
+# turns at once (a busy server simply stops speculating).
+
+ENABLED = os.getenv("LOCALMIND_PREFETCH", "1") == "1"
+PREFETCH_MAX = int(os.getenv("LOCALMIND_PREFETCH_MAX", "2"))
+PREFETCH_CONCURRENCY = int(os.getenv("LOCALMIND_PREFETCH_CONCURRENCY", "4"))
+
+# (tool, args, question pattern), most likely first; args are what the model
+# usually sends for such a question
+PREFETCH_RULES: List[Tuple[str, Dict[str, Any], str]] = [
+    ("disk_usage",          {},                                  r"\b(disks?|drives?|storage|space|ssd|hdd|full)\b"),
+    ("list_processes",      {"sort_by": "mem"},                  r"\b(memory|ram)\b"),
+    ("list_processes",      {"sort_by": "cpu"},                  r"\b(cpu|process(es)?|slow|lag(gy)?|hot|fans?)\b"),
+    ("get_system_overview", {},                                  r"\b(overview|health|status|performance|how is|doing)\b"),
+    ("network_activity",    {},                                  r"\b(network|connections?|internet|bandwidth|sockets?|online)\b"),
+    ("get_system_info",     {},                                  r"\b(specs|hardware|gpu|graphics|uptime|version)\b"),
+]
+_COMPILED = [(tool, args, re.compile(p, re.IGNORECASE)) for tool, args, p in PREFETCH_RULES]
+
+# row-list tools whose top_n=N result also answers any smaller top_n (rows are sorted)
+_TRUNCATABLE = {"list_processes", "network_activity", "get_system_overview"}
+
+_STATS = {"turns": 0, "started": 0, "used": 0, "wasted": 0, "skipped_busy": 0, "first_round_calls": 0}
+_STATS_LOCK = threading.Lock()
+_IN_FLIGHT = 0   # prefetches running across all turns (one event loop per process)
+
+
+def predict(question: str, limit: int = PREFETCH_MAX) -> List[Tuple[str, Dict[str, Any]]]:
+    """Candidate (tool, args) for a question, best first, without duplicates."""
+    out: List[Tuple[str, Dict[str, Any]]] = []
+    for tool, args, rx in _COMPILED:
+        if len(out) >= limit:
+            break
+        if rx.search(question) and (tool, args) not in out:
+            out.append((tool, args))
+    return out
+
+
+def _count(**delta: int) -> None:
+    with _STATS_LOCK:
+        for k, v in delta.items():
+            _STATS[k] += v
+
+
+class Prefetch:
+    """The prefetches of one turn."""
+
+    def __init__(self, dispatch: Callable[..., Any], use_cache: bool = True):
+        self.dispatch, self.use_cache = dispatch, use_cache
+        self.tasks: List[Tuple[str, Dict[str, Any], "asyncio.Task"]] = []
+        self.used: List[str] = []
+
+    def start(self, question: str, offered: Optional[Set[str]] = None, max_timeout: Optional[float] = None) -> None:
+        """Launch the predictions for question, limited to the tools the model is offered."""
+        global _IN_FLIGHT
+        _count(turns=1)
+        for tool, args in predict(question):
+            if offered is not None and tool not in offered:
+                continue
+            if _IN_FLIGHT >= PREFETCH_CONCURRENCY:
+                _count(skipped_busy=1)
+                break
+            canon = canonical_args(tool, args)
+            if canon is None:
+                continue
+            _IN_FLIGHT += 1
+            task = asyncio.ensure_future(self.dispatch(tool, canon, self.use_cache, max_timeout=max_timeout))
+            task.add_done_callback(_finished)
+            self.tasks.append((tool, canon, task))
+        _count(started=len(self.tasks))
+
+    def take(self, name: str, arguments: Any) -> Optional[Callable[[], Any]]:
+        """
+        An awaitable factory serving this call from a matching prefetch (which may
+        still be running), or None. Each prefetch serves at most one call.
+        """
+        want = canonical_args(name, arguments)
+        if want is None:
+            return None
+        for i, (tool, canon, task) in enumerate(self.tasks):
+            if tool != name or task.cancelled():
+                continue
+            n = want.get("top_n")
+            if canon == want:
+                cut = None
+            elif (tool in _TRUNCATABLE and isinstance(n, int) and isinstance(canon.get("top_n"), int)
+                  and canon["top_n"] >= n and {**canon, "top_n": n} == want):
+                cut = n
+            else:
+                continue
+            del self.tasks[i]
+            self.used.append(name)
+            _count(used=1)
+            metrics.PREFETCH_RESULTS.inc(tool=name, outcome="used")
+
+            async def _serve(task=task, cut=cut) -> Dict[str, Any]:
+                out = dict(await task)
+                if cut is not None:
+                    out.update(_truncate(out, cut))
+                return out
+            return _serve
+        return None
+
+    def first_round(self, calls: int) -> None:
+        _count(first_round_calls=calls)
+
+    def discard(self) -> None:
+        """Drop the prefetches nobody asked for (their tool threads finish in the background)."""
+        for tool, _, task in self.tasks:
+            task.cancel()
+            metrics.PREFETCH_RESULTS.inc(tool=tool, outcome="wasted")
+        _count(wasted=len(self.tasks))
+        self.tasks = []
+
+
+def _finished(task: "asyncio.Task") -> None:
+    global _IN_FLIGHT
+    _IN_FLIGHT -= 1
+    if not task.cancelled():
+        task.exception()   # dispatch returns errors as results; this only marks the task as retrieved
+
+def _truncate(out: Dict[str, Any], n: int) -> Dict[str, Any]:
+    r = out.get("result")
+    if isinstance(r, list):
+        return {"result": r[:n]}
+    if isinstance(r, dict):   # get_system_overview: top_cpu_processes / top_mem_processes
+        return {"result": {k: v[:n] if k.startswith("top_") and isinstance(v, list) else v for k, v in r.items()}}
+    return {}
+
+
+def stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        st = dict(_STATS)
+    st["enabled"] = ENABLED
+    st["hit_rate"] = round(st["used"] / st["started"], 3) if st["started"] else None           # prefetches used
+    st["coverage"] = round(st["used"] / st["first_round_calls"], 3) if st["first_round_calls"] else None   # calls served
+    return st
+
+def _collect():
+    st = stats()
+    return [("localmind_prefetch_hit_ratio", "gauge", "Prefetched tool results the model asked for / prefetches started.",
+             [({}, st["hit_rate"])]),
+            ("localmind_prefetch_coverage_ratio", "gauge", "First-round tool calls served from a prefetch.",
+             [({}, st["coverage"])])]
+
+metrics.register_collector(_collect)
@@ -0,0 +1,193 @@
+import os, re, threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from LocalMind import metrics
+
+# Deterministic fast path in front of the agent loop. A short question that
+# matches exactly one intent below unambiguously is answered by running that
+# intent's tool straight away, skipping the model call that would only have
+# picked it. LOCALMIND_ROUTER selects what happens next:
+#   off        every question goes through the agent loop (default)
+#   template   the answer is rendered from the tool result: no model call at all
+#   summarize  one model call, with no tools offered, phrases the answer
+# A template that cannot render the result (tool error, unexpected shape)
+# falls back to summarize. Routed turns leave the same transcript as an agent
+# turn: an assistant tool call, its tool message, then the answer.
+
+MODES = ("off", "template", "summarize")
+ROUTER_MODE = os.getenv("LOCALMIND_ROUTER", "off")
+MAX_WORDS = 14            # longer questions usually carry a condition the patterns cannot see
+DEFAULT_TOP_N = 10
+
+# words that make a question more than a lookup (a reason, an action, a second subject)
+_VETO = re.compile(r"\b(why|should|how (do|can|to)|compare|delete|remove|kill|stop|clean|fix|files?|folders?"
+                   r"|pid|and|or|but|except|instead|those|them|it)\b", re.IGNORECASE)
+_TOP_N = re.compile(r"\btop (\d{1,3})\b", re.IGNORECASE)
+
+
+class Route(NamedTuple):
+    intent: str
+    tool: str
+    args: Dict[str, Any]
+    render: Callable[[Dict[str, Any], Dict[str, Any]], Optional[str]]
+
+
+def _gb(n: float) -> str:
+    return f"{n / 1024 ** 3:.1f} GB"
+
+def _uptime(seconds: int) -> str:
+    d, rem = divmod(int(seconds), 86400)
+    h, m = divmod(rem // 60, 60)
+    return f"{d} d {h} h" if d else f"{h} h {m} min"
+
+
+def _render_disks(out: Dict[str, Any], args: Dict[str, Any]) -> Optional[str]:
+    disks = out.get("result")
+    if out.get("ok") is False or not isinstance(disks, dict) or not disks:
+        return None
+    rows = sorted(disks.items(), key=lambda kv: -kv[1]["percent_used"])
+    mount, top = rows[0]
+    lines = [f"The fullest drive is **{mount}** at {top['percent_used']:.0f}% used "
+             f"({_gb(top['bytes_free'])} free).", "",
+             "| Drive | Used | Free | Total | Used % |", "|---|---:|---:|---:|---:|"]
+    lines += [f"| {m} | {_gb(d['bytes_used'])} | {_gb(d['bytes_free'])} | {_gb(d['bytes_total'])} "
+              f"| {d['percent_used']:.0f}% |" for m, d in rows]
+    return "\n".join(lines)
+
+def _render_processes(out: Dict[str, Any], args: Dict[str, Any]) -> Optional[str]:
+    procs = out.get("result")
+    if out.get("ok") is False or not isinstance(procs, list) or not procs:
+        return None
+    by = "memory" if args["sort_by"] == "mem" else "CPU"
+    lines = [f"Top {len(procs)} processes by {by}:", "",
+             "| Process | PID | Memory | CPU % |", "|---|---:|---:|---:|"]
+    lines += [f"| {p['name']} | {p['pid']} | {p['memory_mb']:.0f} MB | {p['cpu_percent']:.1f} |" for p in procs]
+    return "\n".join(lines)
+
+def _render_specs(out: Dict[str, Any], args: Dict[str, Any]) -> Optional[str]:
+    if out.get("ok") is False or "machine" not in out:
+        return None
+    m, mem, os_ = out["machine"], out["memory"], out["os"]
+    lines = [f"**CPU:** {m['cpu_name'] or 'unknown'} ({m['cpu_physical_cores']} cores, "
+             f"{m['cpu_logical_cores']} threads)"]
+    if m.get("gpus"):
+        lines.append(f"**GPU:** {', '.join(m['gpus'])}")
+    lines += [f"**Memory:** {_gb(mem['total_bytes'])} ({mem['percent_used']:.0f}% in use)",
+              f"**OS:** {os_['system']} {os_['release']} ({os_['version']})",
+              f"**Uptime:** {_uptime(out['uptime']['uptime_seconds'])}"]
+    return "  \n".join(lines)
+
+def _render_uptime(out: Dict[str, Any], args: Dict[str, Any]) -> Optional[str]:
+    if out.get("ok") is False or "uptime" not in out:
+        return None
+    up = out["uptime"]
+    return f"The system has been up for **{_uptime(up['uptime_seconds'])}** (booted {up['boot_time_utc']})."
+
+
+# intent -> (patterns that must all match, tool, args, renderer); args may read the question
+_RULES: List[tuple] = [
+    ("disk_usage", [r"\b(disks?|drives?|ssd|hdd|storage|volumes?|partitions?)\b",
+                    r"\b(full|space|usage|used|free|left|capacity|room)\b"],
+     "disk_usage", lambda q: {}, _render_disks),
+    ("top_memory", [r"\b(memory|ram)\b", r"\b(process(es)?|apps?|programs?|top|most|hogg?(ing)?|eating|using|uses)\b"],
+     "list_processes", lambda q: {"sort_by": "mem", "top_n": _top_n(q)}, _render_processes),
+    ("top_cpu", [r"\bcpu\b", r"\b(process(es)?|apps?|programs?|top|most|hogg?(ing)?|eating|using|uses)\b"],
+     "list_processes", lambda q: {"sort_by": "cpu", "top_n": _top_n(q)}, _render_processes),
+    ("specs", [r"\b(specs|specifications|hardware|system info(rmation)?|what (cpu|gpu|processor|graphics card)"
+               r"|how much (ram|memory) do i have)\b"],
+     "get_system_info", lambda q: {}, _render_specs),
+    ("uptime", [r"\b(uptime|(last|latest) (boot|restart|reboot)|last (booted|restarted|rebooted)"
+                r"|been (up|running|on) for)\b"],
+     "get_system_info", lambda q: {}, _render_uptime),
+]
+_COMPILED = [(intent, [re.compile(p, re.IGNORECASE) for p in pats], tool, args, render)
+             for intent, pats, tool, args, render in _RULES]
+
+def _top_n(question: str) -> int:
+    m = _TOP_N.search(question)
+    return min(50, max(1, int(m.group(1)))) if m else DEFAULT_TOP_N
+
+
+class Router:
+    def __init__(self, mode: str = ROUTER_MODE):
+        self.mode = mode if mode in MODES else "off"
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "fallbacks": 0, "llm_calls_saved": 0,
+                       "routed_turn_ms": 0.0, "saved_ms_est": 0.0}
+        self._per_intent: Dict[str, int] = {}
+        self._llm_call_ms: Optional[float] = None   # moving average of an agent-loop model call
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def match(self, question: str) -> Optional[Route]:
+        """The route for a question, or None unless exactly one intent matches with nothing vetoing it."""
+        q = question.strip()
+        if not q or len(q.split()) > MAX_WORDS or _VETO.search(q):
+            return None
+        hits = [(intent, tool, args, render) for intent, pats, tool, args, render in _COMPILED
+                if all(p.search(q) for p in pats)]
+        if len(hits) != 1:
+            return None
+        intent, tool, args, render = hits[0]
+        return Route(intent, tool, args(q), render)
+
+    def route(self, messages: List[Dict[str, Any]]) -> Optional[Route]:
+        """match() on the turn's question (the last message, when it is the user's)."""
+        if not self.enabled or not messages or messages[-1].get("role") != "user":
+            return None
+        route = self.match(messages[-1].get("content") or "")
+        with self._lock:
+            self._stats["hits" if route else "misses"] += 1
+            if route:
+                self._per_intent[route.intent] = self._per_intent.get(route.intent, 0) + 1
+        metrics.ROUTER_DECISIONS.inc(outcome="hit" if route else "miss")
+        return route
+
+    def record_turn(self, timing: Dict[str, Any], route: Optional[Route], llm_calls: int,
+                    fell_back: bool = False) -> Optional[float]:
+        """
+        Fold a finished turn into the stats. Agent turns update the average model
+        call time; routed turns are credited with the calls they skipped (one to
+        pick the tool, plus the answer call when the template rendered), priced
+        at that average. Returns the estimated saving for a routed turn.
+        """
+        calls = [l["total_ms"] for l in timing.get("llm", []) if l.get("total_ms") and not l.get("timed_out")]
+        with self._lock:
+            if route is None:
+                for ms in calls:
+                    self._llm_call_ms = ms if self._llm_call_ms is None else 0.8 * self._llm_call_ms + 0.2 * ms
+                return None
+            saved_calls = 2 - llm_calls
+            saved = saved_calls * self._llm_call_ms if self._llm_call_ms is not None else None
+            self._stats["fallbacks"] += fell_back
+            self._stats["llm_calls_saved"] += saved_calls
+            self._stats["routed_turn_ms"] += timing.get("total_ms", 0.0)
+            self._stats["saved_ms_est"] += saved or 0.0
+        metrics.ROUTER_LLM_CALLS_SAVED.inc(saved_calls)
+        return None if saved is None else round(saved, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st, per = dict(self._stats), dict(self._per_intent)
+            avg_call = self._llm_call_ms
+        seen = st["hits"] + st["misses"]
+        return {"mode": self.mode, **st, "intents": per,
+                "hit_rate": round(st["hits"] / seen, 3) if seen else None,
+                "routed_turn_ms": round(st["routed_turn_ms"], 1), "saved_ms_est": round(st["saved_ms_est"], 1),
+                "avg_llm_call_ms": None if avg_call is None else round(avg_call, 1)}
+
+
+_ROUTER = Router()
+
+def get_router() -> Router:
+    return _ROUTER
+
+def _collect():
+    st = _ROUTER.stats()
+    return [("localmind_router_hit_ratio", "gauge", "Share of questions answered by the router.", [({}, st["hit_rate"])]),
+            ("localmind_router_saved_seconds_total", "counter", "Estimated model time saved by routed turns.",
+             [({}, st["saved_ms_est"] / 1000)])]
+
+metrics.register_collector(_collect)
@@ -0,0 +1,145 @@
+import asyncio, json, os, sqlite3, threading, time, uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Server-side conversation transcripts, so clients post only the new user turn.
+# A transcript is append-only: the system prompt is written once when the
+# session is created and messages are stored exactly as they were sent to the
+# model, never re-serialized or re-ordered. Every turn therefore starts with a
+# byte-identical prefix and Ollama can reuse its KV cache for it.
+#
+# Sessions live in an in-memory LRU (LOCALMIND_MAX_SESSIONS). With
+# LOCALMIND_SESSION_DB set they are also written to SQLite and reloaded on
+# demand after eviction or a restart.
+
+MAX_SESSIONS = int(os.getenv("LOCALMIND_MAX_SESSIONS", "256"))
+SESSION_DB = os.getenv("LOCALMIND_SESSION_DB", "")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id      TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    body       TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class UnknownSession(KeyError):
+    pass
+
+
+class Session:
+    def __init__(self, sid: str, messages: List[Dict[str, Any]], created: Optional[float] = None):
+        self.id = sid
+        self.messages = messages
+        self.created = created or time.time()
+        self.updated = self.created
+        self.persisted = len(messages)   # messages[:persisted] are already in SQLite
+        self.lock = asyncio.Lock()       # one turn at a time per session
+
+    def view(self) -> List[Dict[str, Any]]:
+        """Transcript without the system prompt, as clients see it."""
+        return self.messages[1:] if self.messages and self.messages[0].get("role") == "system" else self.messages
+
+
+class SessionStore:
+    def __init__(self, system_prompt: str, max_sessions: int = MAX_SESSIONS, db_path: str = SESSION_DB):
+        self.system_prompt = system_prompt
+        self.max_sessions = max(1, max_sessions)
+        self._mem: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+
+    @staticmethod
+    def _freeze(msg: Dict[str, Any]) -> Dict[str, Any]:
+        # a private deep copy: later mutation by callers cannot change the stored prefix
+        return json.loads(json.dumps(msg, ensure_ascii=False))
+
+    def _remember(self, s: Session) -> Session:
+        self._mem[s.id] = s
+        self._mem.move_to_end(s.id)
+        while len(self._mem) > self.max_sessions:
+            self._mem.popitem(last=False)   # still in SQLite when persistence is on
+        return s
+
+    def create(self, history: Optional[List[Dict[str, Any]]] = None, sid: Optional[str] = None) -> Session:
+        """New session (or replace sid) seeded with the system prompt and an optional prior transcript."""
+        history = [self._freeze(m) for m in (history or [])]
+        if history and history[0].get("role") == "system" and history[0].get("content") == self.system_prompt:
+            history = history[1:]   # a transcript we returned earlier; don't add the prompt twice
+        s = Session(sid or uuid.uuid4().hex, [{"role": "system", "content": self.system_prompt}] + history)
+        s.persisted = 0
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM messages WHERE session_id = ?", (s.id,))
+            self._remember(s)
+        self.save(s)
+        return s
+
+    def get(self, sid: str) -> Session:
+        with self._lock:
+            s = self._mem.get(sid)
+            if s is not None:
+                self._mem.move_to_end(sid)
+                return s
+            if self._db is not None:
+                row = self._db.execute("SELECT created FROM sessions WHERE id = ?", (sid,)).fetchone()
+                if row:
+                    msgs = [json.loads(b) for (b,) in self._db.execute(
+                        "SELECT body FROM messages WHERE session_id = ? ORDER BY seq", (sid,))]
+                    return self._remember(Session(sid, msgs, created=row[0]))
+        raise UnknownSession(sid)
+
+    def append(self, s: Session, msg: Dict[str, Any]) -> Dict[str, Any]:
+        msg = self._freeze(msg)
+        s.messages.append(msg)
+        s.updated = time.time()
+        return msg
+
+    def rollback(self, s: Session, length: int) -> None:
+        """Drop messages of a failed turn so the transcript never ends mid tool-call."""
+        del s.messages[max(length, s.persisted):]
+
+    def save(self, s: Session) -> None:
+        if self._db is None:
+            s.persisted = len(s.messages)
+            return
+        with self._lock:
+            new = s.messages[s.persisted:]
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("INSERT OR REPLACE INTO sessions(id, created, updated) VALUES (?, ?, ?)",
+                                 (s.id, s.created, s.updated))
+                self._db.executemany("INSERT OR REPLACE INTO messages(session_id, seq, body) VALUES (?, ?, ?)",
+                                     [(s.id, s.persisted + i, json.dumps(m, ensure_ascii=False))
+                                      for i, m in enumerate(new)])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            s.persisted = len(s.messages)
+
+    def delete(self, sid: str) -> bool:
+        with self._lock:
+            found = self._mem.pop(sid, None) is not None
+            if self._db is not None:
+                found = self._db.execute("DELETE FROM sessions WHERE id = ?", (sid,)).rowcount > 0 or found
+                self._db.execute("DELETE FROM messages WHERE session_id = ?", (sid,))
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_memory": len(self._mem), "max_sessions": self.max_sessions,
+                    "persistent": self._db is not None}
@@ -0,0 +1,134 @@
+import json, os, re, threading
+from typing import Any, Dict, List, Optional, Set
+
+from LocalMind import metrics
+
+# Per-question pruning of the tool schemas sent to the model. TOOL_SPEC is
+# most of the prompt after the history, and it is prefilled again on every
+# model call whose prompt prefix is not cached, so a conversation about disks
+# is offered the disk tools instead of all of them. A conversation is offered:
+#   CORE                  always (the general snapshot covers vague follow-ups)
+#   category matches      the tools of every category its user messages hit
+#   called tools          tools already called in it, offered or not
+# If the first question matches no category, everything: it is open-ended
+# and the model has to see what exists. The set is a function of the
+# transcript that only grows, and subsets keep TOOL_SPEC order (CORE first),
+# so the tools block of a session stays byte-identical from turn to turn
+# until a question brings in a new category; sessions.py relies on that for
+# the KV cache. When the model asks for a tool it was not offered, the agent
+# adds it for the rest of the turn (see agent.py), and it stays as a called
+# tool.
+#
+# Off by default: every session that prunes differently is a different
+# prompt prefix, so with a prefix cache shared across sessions (one model
+# slot, many conversations) selection loses more cache hits than it saves
+# tokens. It pays off when the template renders the tools after the history
+# and nothing is cached anyway. LOCALMIND_TOOL_SELECT=1 turns it on.
+
+ENABLED = os.getenv("LOCALMIND_TOOL_SELECT", "0") == "1"
+
+CORE = {"get_system_overview"}
+
+# category -> (question pattern, tools)
+CATEGORIES: Dict[str, tuple] = {
+    "processes": (r"\b(cpu|memory|ram|process(es)?|apps?|programs?|slow|lag(gy)?|freez\w*|hang\w*|hogg?\w*|pid|fans?|hot)\b",
+                  ["list_processes", "process_detail"]),
+    "disks":     (r"\b(disks?|drives?|ssd|hdd|storage|space|full|volumes?|partitions?)\b",
+                  ["disk_usage", "list_large_files"]),
+    "files":     (r"\b(files?|folders?|director(y|ies)|downloads|documents|desktop|find|search|where is|large|biggest|largest)\b",
+                  ["find_files", "list_large_files"]),
+    "network":   (r"\b(network|internet|connections?|connected|ports?|sockets?|listening|bandwidth|online|ip)\b",
+                  ["network_activity"]),
+    "wifi":      (r"\b(wi-?fi|wireless|ssid|signal|router|access points?)\b",
+                  ["wifi_info", "network_activity"]),
+    "startup":   (r"\b(startup|start-?up|boot|login|log ?on|autostart|auto-?run|runs? at)\b",
+                  ["startup_items", "list_scheduled_tasks"]),
+    "tasks":     (r"\b(scheduled|schedule|tasks?|cron|jobs?|every (day|night|hour|week))\b",
+                  ["list_scheduled_tasks"]),
+    "health":    (r"\b(overview|health|healthy|status|how is|doing|performance|running ok)\b",
+                  ["list_processes", "disk_usage"]),
+    "system":    (r"\b(specs|hardware|gpu|graphics|cpu model|processor|version|windows|os|uptime|reboot(ed)?|restart(ed)?|installed ram)\b",
+                  ["get_system_info"]),
+}
+_COMPILED = [(cat, re.compile(p, re.IGNORECASE), tools) for cat, (p, tools) in CATEGORIES.items()]
+
+_STATS = {"turns": 0, "pruned": 0, "fallbacks": 0, "schema_bytes_sent": 0, "schema_bytes_full": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _name(tool: Dict[str, Any]) -> str:
+    return tool["function"]["name"]
+
+def session_tools(messages: List[Dict[str, Any]]) -> Set[str]:
+    """Names of the tools the conversation has called so far."""
+    used = set()
+    for m in messages:
+        for tc in m.get("tool_calls") or []:
+            name = (tc.get("function") or {}).get("name")
+            if name:
+                used.add(name)
+    return used
+
+def categories(question: str) -> List[str]:
+    return [cat for cat, rx, _ in _COMPILED if rx.search(question)]
+
+def wanted(messages: List[Dict[str, Any]]) -> Optional[Set[str]]:
+    """Tool names the conversation is offered, or None for all of them."""
+    questions = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+    hits = [categories(q) for q in questions]
+    if not hits or not hits[0]:
+        return None
+    names = set(CORE) | session_tools(messages)
+    for cat, _, tools in _COMPILED:
+        if any(cat in h for h in hits):
+            names.update(tools)
+    return names
+
+
+def select(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The part of tools to offer for the turn ending in messages (all of them if the conversation is open-ended)."""
+    names = wanted(messages)
+    chosen = tools if names is None else [t for t in tools if _name(t) in names]
+    full, sent = len(json.dumps(tools)), len(json.dumps(chosen))
+    with _STATS_LOCK:
+        _STATS["turns"] += 1
+        _STATS["pruned"] += len(chosen) < len(tools)
+        _STATS["schema_bytes_full"] += full
+        _STATS["schema_bytes_sent"] += sent
+    metrics.TOOLS_OFFERED.observe(len(chosen))
+    return chosen
+
+def widen(offered: List[Dict[str, Any]], tools: List[Dict[str, Any]], asked: Set[str]) -> List[Dict[str, Any]]:
+    """offered plus the tools the model asked for without being offered them, in TOOL_SPEC order."""
+    names = {_name(t) for t in offered} | asked
+    return [t for t in tools if _name(t) in names]
+
+def warm_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The tools block to prefill at warmup: all of them without selection;
+    with it, the CORE head every selected block starts with.
+    """
+    return [t for t in tools if _name(t) in CORE] if ENABLED else tools
+
+def fallback() -> None:
+    """The model asked for a tool it was not offered; the turn goes on with it added."""
+    with _STATS_LOCK:
+        _STATS["fallbacks"] += 1
+    metrics.TOOL_SELECT_FALLBACKS.inc()
+
+
+def stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        st = dict(_STATS)
+    st["enabled"] = ENABLED
+    st["schema_bytes_saved_ratio"] = (round(1 - st["schema_bytes_sent"] / st["schema_bytes_full"], 3)
+                                      if st["schema_bytes_full"] else None)
+    return st
+
+def _collect():
+    st = stats()
+    return [("localmind_tool_schema_bytes_saved_ratio", "gauge",
+             "Share of tool-schema bytes not sent thanks to per-question selection (first call of each turn).",
+             [({}, st["schema_bytes_saved_ratio"])])]
+
+metrics.register_collector(_collect)
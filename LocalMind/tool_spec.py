@@ -0,0 +1,163 @@
+from pathlib import Path
+
+# System prompt and the OpenAI-style tool schemas sent with every chat request.
+# Shared by the CLI and the server; importing this module loads no tools.
+
+def load_system_prompt(path: str = "system_prompt.txt") -> str:
+    try:
+        return Path(path).read_text(encoding="utf-8").strip()
+    except Exception as e:
+        print(f"[warning] Could not load system prompt from {path}: {e}")
+        return "You are LocalMind, a read-only Windows system assistant."
+
+SYSTEM_PROMPT = load_system_prompt()
+
+
+TOOL_SPEC = [
+  {
+    "type": "function",
+    "function": {
+      "name": "get_system_overview",
+      "description": "Snapshot of CPU/RAM/disk plus top processes by CPU and memory.",
+      "parameters": {
+        "type": "object",
+        "properties": { "top_n": { "type": "integer", "minimum": 1, "maximum": 50, "default": 5 } }
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "list_processes",
+      "description": "List processes with cpu%, memory MB, exe path, and cmdline.",
+      "parameters": {
+        "type": "object",
+        "properties": {
+          "sort_by": { "type": "string", "enum": ["cpu","mem","name"], "default": "cpu" },
+          "top_n":   { "type": "integer", "minimum": 1, "maximum": 100, "default": 10 }
+        }
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "process_detail",
+      "description": "Deep dive on a single process (read-only).",
+      "parameters": {
+        "type": "object",
+        "properties": { "pid": { "type": "integer" } },
+        "required": ["pid"]
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "disk_usage",
+      "description": "Per-volume capacity, used, free, percent used.",
+      "parameters": { "type": "object", "properties": {} }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "network_activity",
+      "description": "List TCP/UDP connections with pid and process name.",
+      "parameters": {
+        "type": "object",
+        "properties": {
+          "only_established": { "type": "boolean", "default": True },
+          "top_n": { "type": "integer", "minimum": 1, "maximum": 200, "default": 50 }
+        }
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "startup_items",
+      "description": "Read-only startup entries from registry and Startup folders.",
+      "parameters": { "type": "object", "properties": {} }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+        "name": "find_files",
+        "description": "Search for files by name/pattern on Windows (read-only). Returns matching file paths with size and modified time.",
+        "parameters": {
+        "type": "object",
+        "properties": {
+            "query": { "type": "string", "description": "Filename or pattern, e.g., 'jobs.xls' or '*.xlsx'." },
+            "roots": {
+            "type": "array",
+            "items": { "type": "string" },
+            "description": "Optional list of root directories to search. Defaults to user profile and common libraries."
+            },
+            "max_results": { "type": "integer", "default": 50, "minimum": 1, "maximum": 1000 },
+            "timeout_seconds": { "type": "integer", "default": 8, "minimum": 1, "maximum": 60 },
+            "use_glob": { "type": "boolean", "default": True, "description": "If true, treat query like a glob (*.xlsx). If false, do substring match." }
+        },
+        "required": ["query"]
+        }
+    }  
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "list_large_files",
+      "description": "Find largest files and (optionally) folders under given roots. Read-only, bounded by timeout.",
+      "parameters": {
+        "type": "object",
+        "properties": {
+          "top_n": { "type": "integer", "minimum": 1, "maximum": 200, "default": 20 },
+          "include_folders": { "type": "boolean", "default": False },
+          "roots": { "type": "array", "items": { "type": "string" } },
+          "timeout_seconds": { "type": "integer", "minimum": 2, "maximum": 60, "default": 10 },
+          "max_depth": { "type": "integer", "minimum": 1, "maximum": 32, "default": 1, "description": "Deepest folder level (below each root) to report." },
+          "min_size_mb": { "type": "integer", "minimum": 0, "default": 0, "description": "Only report folders at least this large." }
+        }
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "wifi_info",
+      "description": "List nearby Wi-Fi networks with SSID, BSSID, signal percent, channel, auth and encryption.",
+      "parameters": {
+        "type": "object",
+        "properties": {
+          "timeout_seconds": { "type": "integer", "minimum": 2, "maximum": 20, "default": 6 }
+        }
+      }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "get_system_info",
+      "description": "Windows system info: version, uptime, CPU, memory, GPU names. Read-only.",
+      "parameters": { "type": "object", "properties": {} }
+    }
+  },
+  {
+    "type": "function",
+    "function": {
+      "name": "list_scheduled_tasks",
+      "description": "List Windows Scheduled Tasks (read-only): name, path, enabled, state, next/last run, triggers, actions.",
+      "parameters": {
+        "type": "object",
+        "properties": {
+          "name_pattern": { "type": "string", "description": "Case-insensitive substring or regex to match TaskName." },
+          "include_disabled": { "type": "boolean", "default": True },
+          "folder": { "type": "string", "description": "Filter by TaskPath folder, e.g. '\\\\Microsoft\\\\Windows'." },
+          "max_results": { "type": "integer", "minimum": 1, "maximum": 1000, "default": 200 },
+          "timeout_seconds": { "type": "integer", "minimum": 2, "maximum": 30, "default": 6 }
+        }
+      }
+    }
+  }
+
+]
@@ -1,7 +1,10 @@
 import os, fnmatch, time, stat
-from typing import List, Dict, Any, Iterable
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 
+from LocalMind.utils.file_index import SKIP_DIRS, get_file_index
+from LocalMind.utils.walker import CancelToken, Walker
+
 def _default_roots() -> List[str]:
     # Reasonable defaults: user profile + common libraries
     roots = []
@@ -26,16 +29,14 @@ def _default_roots() -> List[str]:
             seen.add(r.lower())
     return out
 
-def _iter_dirs(root: str) -> Iterable[str]:
-    # Robust walk: ignore reparse points & system dirs that explode traversal cost
-    skip_dirs = { "$Recycle.Bin", "System Volume Information", "Windows\\WinSxS" }
-    for dirpath, dirnames, _ in os.walk(root, topdown=True, followlinks=False):
-        low = dirpath.lower()
-        if any(s.lower() in low for s in skip_dirs):
-            # prune
-            dirnames[:] = []
-            continue
-        yield dirpath
+def _make_prune(roots: List[str]):
+    # Also prune subdirectories that are themselves roots: they are walked from
+    # their own seed, so overlapping roots (profile + C:\) are listed once.
+    root_keys = {os.path.normcase(os.path.normpath(r)) for r in roots}
+    def prune(path: str) -> bool:
+        low = path.lower()
+        return any(s in low for s in SKIP_DIRS) or os.path.normcase(path) in root_keys
+    return prune
 
 def _match_name(name: str, query: str, use_glob: bool) -> bool:
     name_l = name.lower()
@@ -44,9 +45,10 @@ def _match_name(name: str, query: str, use_glob: bool) -> bool:
         return fnmatch.fnmatch(name_l, q)
     return q in name_l
 
-def _file_info(fullpath: str) -> Dict[str, Any]:
+def _file_info(entry: os.DirEntry) -> Dict[str, Any]:
+    fullpath = entry.path
     try:
-        st = os.stat(fullpath)
+        st = entry.stat(follow_symlinks=False)
         # skip directories
         if stat.S_ISDIR(st.st_mode):
             return {}
@@ -69,6 +71,60 @@ def _confidence(name: str, query: str, use_glob: bool) -> float:
         return max(0.6, 1.0 - (len(n) - len(q)) * 0.01)
     return 0.5
 
+def _index_roots() -> List[str]:
+    env = os.getenv("LOCALMIND_INDEX_ROOTS")
+    if env:
+        return [r for r in env.split(os.pathsep) if r and os.path.isdir(r)]
+    return _default_roots()
+
+def _index_search(query: str, roots: List[str], max_results: int,
+                  use_glob: bool) -> Tuple[List[Dict[str, Any]], List[str], Dict[str, Any]]:
+    """
+    Answer from the filename index where it covers the requested roots.
+    Returns (hits, roots still needing a live walk, index report).
+    """
+    idx = get_file_index()
+    if idx is None:
+        return [], roots, {"used": False, "reason": "disabled"}
+    try:
+        idx.start_background(_index_roots())
+        indexed, live, age = idx.split_roots(roots)
+        hits = []
+        for row in idx.query(query, use_glob, indexed, max_results) if indexed else []:
+            hits.append({
+                "path": row["path"],
+                "size_bytes": row["size_bytes"],
+                "modified_utc": datetime.utcfromtimestamp(row["mtime"] or 0).isoformat() + "Z",
+                "confidence": _confidence(row["name"], query, use_glob),
+            })
+        return hits, live, {"used": bool(indexed), "indexed_roots": indexed,
+                            "live_roots": live, "age_seconds": age}
+    except Exception as e:
+        return [], roots, {"used": False, "reason": f"index error: {e}"}
+
+def _live_search(query: str, roots: List[str], max_results: int, timeout_seconds: int,
+                 use_glob: bool, t0: float, hits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    roots = [r for r in roots if os.path.isdir(r)]
+    walker = Walker(roots, token=CancelToken(deadline=t0 + timeout_seconds), prune=_make_prune(roots))
+    for batch in walker:
+        for entry in batch.entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            name = entry.name
+            if _match_name(name, query, use_glob):
+                info = _file_info(entry)
+                if info:
+                    info["confidence"] = _confidence(name, query, use_glob)
+                    hits.append(info)
+                    if len(hits) >= max_results:
+                        break
+        if len(hits) >= max_results:
+            break
+    return walker.stats.as_dict()
+
 def find_files(query: str, roots: List[str] = None, max_results: int = 50,
                timeout_seconds: int = 8, use_glob: bool = True) -> Dict[str, Any]:
     if not query or not isinstance(query, str):
@@ -76,56 +132,36 @@ def find_files(query: str, roots: List[str] = None, max_results: int = 50,
 
     roots = roots or _default_roots()
     t0 = time.monotonic()
-    hits: List[Dict[str, Any]] = []
-    scanned_dirs = 0
+    walk_stats: Dict[str, Any] = {}
 
+    # 1) Indexed roots answer from the on-disk index; 2) the rest are walked live
+    hits, live_roots, index_report = _index_search(query, roots, max_results, use_glob)
     try:
-        for root in roots:
-            if time.monotonic() - t0 > timeout_seconds:
-                break
-            if not os.path.isdir(root):
-                continue
-            for dirpath in _iter_dirs(root):
-                scanned_dirs += 1
-                if time.monotonic() - t0 > timeout_seconds:
-                    break
-                try:
-                    with os.scandir(dirpath) as it:
-                        for entry in it:
-                            if time.monotonic() - t0 > timeout_seconds:
-                                break
-                            if not entry.is_file(follow_symlinks=False):
-                                continue
-                            name = entry.name
-                            if _match_name(name, query, use_glob):
-                                info = _file_info(entry.path)
-                                if info:
-                                    info["confidence"] = _confidence(name, query, use_glob)
-                                    hits.append(info)
-                                    if len(hits) >= max_results:
-                                        break
-                        if len(hits) >= max_results:
-                            break
-                except PermissionError:
-                    continue
-                except Exception:
-                    continue
-                if len(hits) >= max_results:
-                    break
-            if len(hits) >= max_results:
-                break
+        if live_roots and len(hits) < max_results:
+            walk_stats = _live_search(query, live_roots, max_results, timeout_seconds,
+                                      use_glob, t0, hits)
     except Exception as e:
-        return {"ok": False, "error": str(e), "scanned_dirs": scanned_dirs, "roots": roots}
+        return {"ok": False, "error": str(e), "scanned_dirs": walk_stats.get("dirs", 0), "roots": roots}
 
+    # overlapping roots (profile + system drive) can yield the same file twice
+    seen, unique = set(), []
+    for h in hits:
+        low = h["path"].lower()
+        if low not in seen:
+            seen.add(low); unique.append(h)
+    hits = unique
     # sort: higher confidence, then newest modified
     hits.sort(key=lambda x: (x.get("confidence", 0.0), x.get("modified_utc", "")), reverse=True)
+    hits = hits[:max_results]
     elapsed = round(time.monotonic() - t0, 3)
     return {
         "ok": True,
         "query": query,
         "roots": roots,
         "elapsed_seconds": elapsed,
-        "scanned_dirs": scanned_dirs,
+        "scanned_dirs": walk_stats.get("dirs", 0),
+        "walk": walk_stats,
+        "index": index_report,
         "results_count": len(hits),
         "results": hits
-    }
\ No newline at end of file
+    }
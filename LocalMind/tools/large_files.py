@@ -1,7 +1,9 @@
-import os, time, stat
+import os, stat, heapq
 from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+from LocalMind.utils.walker import CancelToken, Walker
+
 DEFAULT_EXCLUDES = {
     r"C:\Windows\WinSxS",
     r"C:\Windows\SoftwareDistribution",
@@ -36,125 +38,159 @@ def _fmt_utc(ts: float) -> str:
     except Exception:
         return ""
 
-def _largest_files(roots: List[str], top_n: int, timeout: int) -> List[Dict[str, Any]]:
-    t0 = time.monotonic()
+def _make_prune(roots: List[str]):
+    # Skip excluded system dirs, and subdirectories that are themselves roots
+    # (they are walked from their own seed, so overlapping roots are listed once).
+    excludes = tuple(ex.lower() for ex in DEFAULT_EXCLUDES)
+    root_keys = {os.path.normcase(os.path.normpath(r)) for r in roots}
+    def prune(path: str) -> bool:
+        return path.lower().startswith(excludes) or os.path.normcase(path) in root_keys
+    return prune
+
+class _FolderTree:
+    """
+    Per-directory byte counts collected during the walk, rolled up bottom-up
+    (post-order) once it ends. Each node is [own_bytes, expected_children,
+    partial]; a total is partial when the deadline stopped the walk
+    before the directory or one of its descendants was fully listed.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, list] = {}
+
+    def add(self, batch, own_bytes: int, child_dirs: int) -> None:
+        self.nodes[batch.path] = [own_bytes, child_dirs, bool(batch.truncated)]
+
+    def rollup(self) -> Dict[str, Tuple[int, bool]]:
+        totals: Dict[str, int] = {}
+        seen_children: Dict[str, int] = {}
+        partial: Dict[str, bool] = {}
+        # deepest first, so every child is final before its parent is read
+        order = sorted(self.nodes, key=lambda p: p.rstrip(os.sep).count(os.sep), reverse=True)
+        for path in order:
+            own, expected, cut = self.nodes[path]
+            total = totals.get(path, 0) + own
+            part = partial.get(path, False) or cut or seen_children.get(path, 0) < expected
+            totals[path], partial[path] = total, part
+            parent = os.path.dirname(path)
+            if parent != path and parent in self.nodes:
+                totals[parent] = totals.get(parent, 0) + total
+                seen_children[parent] = seen_children.get(parent, 0) + 1
+                if part:
+                    partial[parent] = True
+        return {p: (totals[p], partial[p]) for p in order}
+
+def _scan(roots: List[str], top_n: int, timeout: int,
+          folders: bool = False) -> Tuple[List[Dict[str, Any]], "_FolderTree", Dict[str, Any]]:
+    # Min-heap of the top_n largest files seen so far: memory stays O(top_n)
+    # however many files the volume holds. heap[0] is the smallest kept file.
     heap: List[Tuple[int, str, float]] = []  # (size, path, mtime)
-    files: List[Tuple[int, str, float]] = []
-
-    def add(path: str, st: os.stat_result):
-        files.append((int(st.st_size), path, float(st.st_mtime)))
-
-    for root in roots:
-        if time.monotonic() - t0 > timeout: break
-        for dirpath, dirnames, filenames in os.walk(root, topdown=True, followlinks=False):
-            if time.monotonic() - t0 > timeout: break
-            # prune excluded dirs
-            low = dirpath.lower()
-            if any(low.startswith(ex.lower()) for ex in DEFAULT_EXCLUDES):
-                dirnames[:] = []
-                continue
+    tree = _FolderTree() if folders else None
+    scanned_files = 0
+    scanned_bytes = 0
+    excludes = tuple(ex.lower() for ex in DEFAULT_EXCLUDES)
+
+    walker = Walker(roots, token=CancelToken(timeout=timeout), prune=_make_prune(roots), prestat=True)
+    for batch in walker:
+        own = 0
+        child_dirs = 0
+        for entry in batch.entries:
             try:
-                for name in filenames:
-                    if time.monotonic() - t0 > timeout: break
-                    full = os.path.join(dirpath, name)
-                    try:
-                        st = os.stat(full)
-                        if not stat.S_ISREG(st.st_mode):
-                            continue
-                        add(full, st)
-                    except Exception:
-                        continue
+                if not entry.is_file(follow_symlinks=False):
+                    # nested roots are walked from their own seed but still roll up into this dir
+                    if tree and entry.is_dir(follow_symlinks=False) and not entry.path.lower().startswith(excludes):
+                        child_dirs += 1
+                    continue
+                st = entry.stat(follow_symlinks=False)  # cached from the scandir worker
+                if not stat.S_ISREG(st.st_mode):
+                    continue
             except Exception:
                 continue
+            size = int(st.st_size)
+            own += size
+            if len(heap) < top_n:
+                heapq.heappush(heap, (size, entry.path, float(st.st_mtime)))
+            elif size > heap[0][0]:
+                heapq.heapreplace(heap, (size, entry.path, float(st.st_mtime)))
+            scanned_files += 1
+        scanned_bytes += own
+        if tree:
+            tree.add(batch, own, child_dirs)
 
-    # sort once at end (faster than pushing to heap repeatedly given bounded time)
-    files.sort(key=lambda x: x[0], reverse=True)
-    out = []
-    for size, path, mtime in files[:top_n]:
-        out.append({
+    walk = walker.stats.as_dict()
+    files = []
+    for size, path, mtime in sorted(heap, reverse=True):
+        files.append({
             "path": path,
             "size_bytes": size,
             "modified_utc": _fmt_utc(mtime)
         })
-    return out
+    stats = {
+        "scanned_files": scanned_files,
+        "scanned_bytes": scanned_bytes,
+        "bytes_per_s": int(scanned_bytes / max(walker.stats.elapsed, 1e-6)),
+        "complete": walk["complete"],
+        "walk": walk,
+    }
+    return files, tree, stats
 
-def _dir_size_bounded(path: str, t0: float, timeout: int) -> int:
-    total = 0
-    for dirpath, dirnames, filenames in os.walk(path, topdown=True, followlinks=False):
-        if time.monotonic() - t0 > timeout: return total
-        low = dirpath.lower()
-        if any(low.startswith(ex.lower()) for ex in DEFAULT_EXCLUDES):
-            dirnames[:] = []
-            continue
-        for name in filenames:
-            full = os.path.join(dirpath, name)
-            try:
-                st = os.stat(full)
-                if stat.S_ISREG(st.st_mode):
-                    total += int(st.st_size)
-            except Exception:
-                continue
-    return total
-
-def _largest_folders(roots: List[str], top_n: int, timeout: int) -> List[Dict[str, Any]]:
-    t0 = time.monotonic()
-    candidates: List[str] = []
-    # Shallow discovery first (one level down per root)
-    for root in roots:
-        if time.monotonic() - t0 > timeout: break
-        try:
-            with os.scandir(root) as it:
-                for e in it:
-                    if time.monotonic() - t0 > timeout: break
-                    if e.is_dir(follow_symlinks=False):
-                        candidates.append(e.path)
-        except Exception:
-            continue
+def _components(path: str) -> int:
+    return os.path.normcase(path).rstrip(os.sep).count(os.sep)
 
-    # Compute sizes with global timeout
-    sized: List[Tuple[int, str]] = []
-    for d in candidates:
-        if time.monotonic() - t0 > timeout: break
-        try:
-            sz = _dir_size_bounded(d, t0, timeout)
-            sized.append((sz, d))
-        except Exception:
-            continue
+def _outer_roots(roots: List[str]) -> List[str]:
+    # requested roots not inside another requested root
+    keys = [os.path.normcase(r).rstrip(os.sep) + os.sep for r in roots]
+    return [r for r, k in zip(roots, keys) if not any(k != o and k.startswith(o) for o in keys)]
 
-    sized.sort(key=lambda x: x[0], reverse=True)
+def _largest_folders(tree: _FolderTree, roots: List[str], top_n: int, max_depth: int,
+                     min_size_mb: int) -> List[Dict[str, Any]]:
+    # Depth is relative to the outermost requested root, so a nested root (the
+    # profile under C:\, Documents under the profile) is a candidate of its
+    # parent like any other folder; outermost roots themselves are not listed.
+    min_bytes = int(min_size_mb) * 1024 * 1024
+    outer = [(os.path.normcase(r).rstrip(os.sep) + os.sep, _components(r)) for r in _outer_roots(roots)]
+    def depth(path: str) -> int:
+        key = os.path.normcase(path).rstrip(os.sep) + os.sep
+        return next((_components(path) - base for prefix, base in outer if key.startswith(prefix)), 0)
+    sized = tree.rollup()
+    candidates = ((total, path, part) for path, (total, part) in sized.items()
+                  if total >= min_bytes and 1 <= depth(path) <= max_depth)
     out = []
-    for sz, d in sized[:top_n]:
+    for total, path, part in heapq.nlargest(top_n, candidates):
+        row = {"path": path, "size_bytes": int(total)}
         try:
-            st = os.stat(d)
-            out.append({
-                "path": d,
-                "size_bytes": int(sz),
-                "modified_utc": _fmt_utc(st.st_mtime)
-            })
+            row["modified_utc"] = _fmt_utc(os.stat(path).st_mtime)
         except Exception:
-            out.append({
-                "path": d, "size_bytes": int(sz)
-            })
+            pass
+        if part:
+            row["partial"] = True
+        out.append(row)
     return out
 
 def list_large_files(top_n: int = 20,
                      include_folders: bool = False,
                      roots: List[str] = None,
-                     timeout_seconds: int = 10) -> Dict[str, Any]:
-    roots = roots or _default_roots()
+                     timeout_seconds: int = 10,
+                     max_depth: int = 1,
+                     min_size_mb: int = 0) -> Dict[str, Any]:
+    roots = [os.path.normpath(r) for r in (roots or _default_roots())]
     try:
-        files = _largest_files(roots, top_n, timeout_seconds)
-        folders = _largest_folders(roots, top_n, timeout_seconds) if include_folders else []
+        # one walk feeds both the file heap and the folder tree
+        files, tree, file_stats = _scan(roots, top_n, timeout_seconds, folders=include_folders)
+        folders = _largest_folders(tree, roots, top_n, max_depth, min_size_mb) if include_folders else []
         return {
             "ok": True,
             "params": {
                 "top_n": top_n,
                 "include_folders": include_folders,
                 "roots": roots,
-                "timeout_seconds": timeout_seconds
+                "timeout_seconds": timeout_seconds,
+                "max_depth": max_depth,
+                "min_size_mb": min_size_mb
             },
             "files": files,
-            "folders": folders
+            "folders": folders,
+            "scan": file_stats
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
\ No newline at end of file
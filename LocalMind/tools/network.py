@@ -1,9 +1,12 @@
 import psutil
 from typing import List, Dict, Any
 
+from LocalMind.utils.proc_snapshot import get_process_table
+
 def network_activity(only_established: bool = True, top_n: int = 50) -> List[Dict[str, Any]]:
     states_ok = {"ESTABLISHED"} if only_established else None
     rows = []
+    table = get_process_table()
     proc_name_cache = {}
     for c in psutil.net_connections(kind="inet"):
         if states_ok and c.status not in states_ok:
@@ -11,14 +14,15 @@ def network_activity(only_established: bool = True, top_n: int = 50) -> List[Dic
         pid = c.pid
         name = None
         if pid:
-            if pid in proc_name_cache:
+            name = table.name(pid)
+            if name is None:
+                # process started after the snapshot
+                if pid not in proc_name_cache:
+                    try:
+                        proc_name_cache[pid] = psutil.Process(pid).name()
+                    except Exception:
+                        proc_name_cache[pid] = None
                 name = proc_name_cache[pid]
-            else:
-                try:
-                    name = psutil.Process(pid).name()
-                except Exception:
-                    name = None
-                proc_name_cache[pid] = name
         rows.append({
             "pid": pid,
             "process_name": name,
@@ -29,6 +33,3 @@ def network_activity(only_established: bool = True, top_n: int = 50) -> List[Dic
         if len(rows) >= top_n:
             break
     return rows
-
-
-print(network_activity(True, 10))
\ No newline at end of file
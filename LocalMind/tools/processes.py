@@ -1,26 +1,33 @@
 import psutil
 from typing import List, Dict, Any
 
+from LocalMind.utils.proc_snapshot import get_process_table
+
 def list_processes(sort_by: str = "cpu", top_n: int = 200) -> List[Dict[str, Any]]:
+    # Shared snapshot (cpu deltas from the sampler); exe/user/cmdline only for returned rows
+    table = get_process_table()
+    key = {"cpu": "cpu_percent", "mem": "rss", "name": "name"}[sort_by]
     rows = []
-    for p in psutil.process_iter(["pid","name","cpu_percent","memory_info","exe","username","cmdline"]):
-        info = p.info
+    for r in table.top(key, top_n, reverse=(key != "name")):
+        pid = r["pid"]
         rows.append({
-            "pid": info.get("pid"),
-            "name": info.get("name"),
-            "cpu_percent": info.get("cpu_percent", 0.0),
-            "memory_mb": round((info.get("memory_info").rss if info.get("memory_info") else 0)/ (1024*1024), 1),
-            "exe": info.get("exe"),
-            "user": info.get("username"),
-            "cmdline": " ".join(info.get("cmdline") or [])[:400]
+            "pid": pid,
+            "name": r["name"],
+            "cpu_percent": r["cpu_percent"] or 0.0,
+            "memory_mb": round((r["rss"] or 0) / (1024*1024), 1),
+            "exe": table.lazy(pid, "exe"),
+            "user": table.lazy(pid, "username"),
+            "cmdline": (table.lazy(pid, "cmdline") or "")[:400]
         })
-    key = {"cpu": "cpu_percent", "mem": "memory_mb", "name": "name"}[sort_by]
-    rows.sort(key=lambda x: (x[key] or 0) if key != "name" else (x[key] or ""), reverse=(key!="name"))
-    return rows[:top_n]
+    return rows
 
 def process_detail(pid: int) -> Dict[str, Any]:
     import datetime
     p = psutil.Process(pid)
+    table = get_process_table()
+    # a pid newer than the snapshot is read from its own Process below; rebuilding
+    # the shared table would reset every process's cpu baseline
+    row = table.rows.get(pid)
     with p.oneshot():
         open_files = [{"path": f.path, "fd": f.fd} for f in (p.open_files() or [])][:50]
         conns = [{"laddr": f"{c.laddr.ip}:{c.laddr.port}" if c.laddr else None,
@@ -28,17 +35,18 @@ def process_detail(pid: int) -> Dict[str, Any]:
                   "status": c.status} for c in (p.connections(kind="inet") or [])][:50]
         info = {
             "pid": pid,
-            "name": p.name(),
-            "exe": p.exe() if p.exe() else None,
-            "username": p.username(),
+            "name": row["name"] if row else p.name(),
+            "exe": table.lazy(pid, "exe") if row else (p.exe() or None),
+            "username": table.lazy(pid, "username") if row else p.username(),
             "create_time": datetime.datetime.fromtimestamp(p.create_time()).isoformat(),
-            "cpu_percent": p.cpu_percent(interval=0.3),
+            "cpu_percent": row["cpu_percent"] if row else p.cpu_percent(interval=0.3),
             "memory_mb": round(p.memory_info().rss/ (1024*1024), 1),
             "num_threads": p.num_threads(),
-            "parent_pid": (p.parent().pid if p.parent() else None),
-            "children_pids": [c.pid for c in p.children(recursive=False)],
+            "parent_pid": row["ppid"] if row else (p.parent().pid if p.parent() else None),
+            # children from the shared table instead of another full process scan
+            "children_pids": [r["pid"] for r in table.rows.values() if r["ppid"] == pid],
             "open_files": open_files,
             "connections": conns,
-            "cmdline": " ".join(p.cmdline())[:800]
+            "cmdline": ((table.lazy(pid, "cmdline") or "") if row else " ".join(p.cmdline()))[:800]
         }
-    return info
\ No newline at end of file
+    return info
@@ -1,10 +1,11 @@
 from typing import List, Dict, Any
-import os, winreg, pathlib
+import os, pathlib
 
 HKLM_RUN = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
 HKCU_RUN = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
 
 def _read_run_key(root, path) -> List[Dict[str, Any]]:
+    import winreg  # Windows-only; imported here so the module loads anywhere
     out = []
     try:
         key = winreg.OpenKey(root, path)
@@ -30,6 +31,10 @@ def _startup_folders() -> List[str]:
     return [f for f in folders if f and os.path.isdir(f)]
 
 def startup_items() -> List[Dict[str, Any]]:
+    try:
+        import winreg
+    except ImportError:
+        raise RuntimeError("startup_items needs the Windows registry (winreg)") from None
     items = []
     items += _read_run_key(winreg.HKEY_LOCAL_MACHINE, HKLM_RUN)
     items += _read_run_key(winreg.HKEY_CURRENT_USER, HKCU_RUN)
@@ -1,5 +1,6 @@
 import platform, psutil, time, subprocess, json
 from datetime import datetime
+from functools import lru_cache
 
 def _fmt_utc(ts: float) -> str:
     try:
@@ -16,14 +17,17 @@ def _ps_once(cmd: str, timeout: int = 4) -> str:
         return ""
     return cp.stdout.strip()
 
+# hardware names cannot change while we run: spawn PowerShell once per process
+@lru_cache(maxsize=1)
 def _cpu_name() -> str:
     out = _ps_once('Get-CimInstance -ClassName Win32_Processor | Select-Object -ExpandProperty Name')
     return out.splitlines()[0].strip() if out else (platform.processor() or "")
 
-def _gpu_names() -> list:
+@lru_cache(maxsize=1)
+def _gpu_names() -> tuple:
     out = _ps_once('Get-CimInstance Win32_VideoController | Select-Object -ExpandProperty Name')
     names = [l.strip() for l in out.splitlines() if l.strip()] if out else []
-    return names
+    return tuple(names)
 
 def get_system_info():
     try:
@@ -51,7 +55,7 @@ def get_system_info():
                 "cpu_name": _cpu_name(),
                 "cpu_physical_cores": psutil.cpu_count(logical=False) or 0,
                 "cpu_logical_cores": psutil.cpu_count(logical=True) or 0,
-                "gpus": _gpu_names(),
+                "gpus": list(_gpu_names()),
             },
             "memory": {
                 "total_bytes": int(vm.total),
@@ -1,33 +1,39 @@
 import psutil, time
 from typing import Dict, Any
 
+from LocalMind.utils.proc_snapshot import ProcessTable, get_process_table
+from LocalMind.utils.telemetry import get_sampler
+
+def _proc_row(table: ProcessTable, row: Dict[str, Any]) -> Dict[str, Any]:
+    pid = row["pid"]
+    return {
+        "pid": pid,
+        "name": row.get("name"),
+        "cpu_percent": row.get("cpu_percent", 0.0),
+        "memory_mb": round((row.get("rss") or 0) / (1024*1024), 1),
+        # only looked up for the rows we actually return
+        "exe": table.lazy(pid, "exe"),
+        "user": table.lazy(pid, "username")
+    }
+
 def get_system_overview(top_n: int = 5) -> Dict[str, Any]:
-    psutil.cpu_percent(None)  # prime
-    time.sleep(0.3)           # short sample window
-    cpu = psutil.cpu_percent(interval=0.7)
-    vm = psutil.virtual_memory()
+    # CPU and per-process deltas come from the background sampler (no sleeping here)
+    snap = get_sampler().latest() or {}
+    cpu = snap.get("cpu_percent")
+    if cpu is None:
+        cpu = psutil.cpu_percent(None)
+    vm = snap.get("memory") or psutil.virtual_memory()
     disks = {p.mountpoint: psutil.disk_usage(p.mountpoint)._asdict()
              for p in psutil.disk_partitions(all=False)
              if p.fstype and "cdrom" not in p.opts}
 
-    procs = []
-    for p in psutil.process_iter(["pid","name","cpu_percent","memory_info","exe","username"]):
-        info = p.info
-        procs.append({
-            "pid": info.get("pid"),
-            "name": info.get("name"),
-            "cpu_percent": info.get("cpu_percent", 0.0),
-            "memory_mb": round((info.get("memory_info").rss if info.get("memory_info") else 0)/ (1024*1024), 1),
-            "exe": info.get("exe"),
-            "user": info.get("username")
-        })
-    top_cpu = sorted(procs, key=lambda x: x["cpu_percent"] or 0, reverse=True)[:top_n]
-    top_mem = sorted(procs, key=lambda x: x["memory_mb"] or 0, reverse=True)[:top_n]
+    table = get_process_table()
     return {
         "cpu_percent": cpu,
         "memory": {"total_mb": round(vm.total/1_048_576,1), "used_mb": round(vm.used/1_048_576,1),
                    "percent": vm.percent},
         "disks": disks,
-        "top_cpu_processes": top_cpu,
-        "top_mem_processes": top_mem
+        "top_cpu_processes": [_proc_row(table, r) for r in table.top("cpu_percent", top_n)],
+        "top_mem_processes": [_proc_row(table, r) for r in table.top("rss", top_n)],
+        "sample_age_seconds": round(time.time() - snap["ts"], 2) if snap else None
     }
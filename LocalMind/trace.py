@@ -0,0 +1,276 @@
+import asyncio, atexit, json, os, threading, time, uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Compact JSONL trace of agent turns, and a replay of recorded turns.
+#
+# LOCALMIND_TRACE=trace.jsonl appends one line per event, without indentation:
+#   {"kind": "turn", "turn", "ts", "messages", "tools", "budget_s", "max_rounds"}   transcript the turn started from
+#   {"kind": "llm",  "turn", "ts", "round", "n_messages", "response", "timing"}    or "error" instead of response
+#   {"kind": "tool", "turn", "ts", "round", "id", "name", "arguments", "result"}   result carries elapsed_ms
+#   {"kind": "done", "turn", "ts", "stopped", "answer", "timing"}
+# Lines are serialized where the event happens and written through one
+# buffered file, flushed at the end of each turn; with no trace configured
+# the agent's hooks are no-ops.
+#
+#   python -m LocalMind.trace replay trace.jsonl                  # recorded model and tools, no waiting
+#   python -m LocalMind.trace replay trace.jsonl --live-tools     # recorded model, tools run for real
+#   python -m LocalMind.trace replay trace.jsonl --realtime --repeat 5
+#
+# Replay feeds each turn's starting transcript through the agent loop with
+# the recorded model responses, so everything but the model (tool dispatch,
+# compaction, bookkeeping) runs for real and can be profiled repeatably.
+
+TRACE_PATH = os.getenv("LOCALMIND_TRACE", "")
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class Recorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def write(self, kind: str, turn: str, **fields) -> None:
+        line = _dumps({"kind": kind, "turn": turn, "ts": round(time.time(), 3), **fields}) + "\n"
+        with self._lock:
+            if self._f:
+                self._f.write(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._f:
+                self._f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f:
+                self._f.close()
+                self._f = None
+
+
+class TurnTrace:
+    """The agent's hooks for one turn."""
+
+    def __init__(self, rec: Recorder, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]],
+                 budget_s: float, max_rounds: int):
+        self.rec, self.id = rec, uuid.uuid4().hex[:12]
+        rec.write("turn", self.id, messages=messages, budget_s=budget_s, max_rounds=max_rounds,
+                  tools=[t["function"]["name"] for t in tools])
+
+    def llm(self, rnd: int, n_messages: int, response: Optional[Dict[str, Any]], timing: Optional[Dict[str, Any]],
+            error: Optional[str] = None) -> None:
+        if error:
+            self.rec.write("llm", self.id, round=rnd, n_messages=n_messages, error=error, timing=timing)
+        else:
+            self.rec.write("llm", self.id, round=rnd, n_messages=n_messages, response=response, timing=timing)
+
+    def tool(self, rnd: int, call: Dict[str, Any], result: Dict[str, Any]) -> None:
+        self.rec.write("tool", self.id, round=rnd, id=call["id"], name=call["name"],
+                       arguments=call.get("arguments") or "{}", result=result)
+
+    def done(self, stopped: str, answer: str, timing: Dict[str, Any]) -> None:
+        self.rec.write("done", self.id, stopped=stopped, answer=answer, timing=timing)
+        self.rec.flush()
+
+
+class _NoTrace:
+    def llm(self, *a, **k) -> None: pass
+    def tool(self, *a, **k) -> None: pass
+    def done(self, *a, **k) -> None: pass
+
+NO_TRACE = _NoTrace()
+
+_RECORDER: Optional[Recorder] = None
+_OPENED = False
+_OPEN_LOCK = threading.Lock()
+
+def recorder() -> Optional[Recorder]:
+    """The process-wide recorder (LOCALMIND_TRACE), opened on first use; None when tracing is off."""
+    global _RECORDER, _OPENED
+    if not _OPENED:
+        with _OPEN_LOCK:
+            if not _OPENED:
+                _RECORDER = Recorder(TRACE_PATH) if TRACE_PATH else None
+                _OPENED = True
+    return _RECORDER
+
+def set_recorder(rec: Optional[Recorder]) -> None:
+    global _RECORDER, _OPENED
+    with _OPEN_LOCK:
+        _RECORDER, _OPENED = rec, True
+
+def start_turn(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], budget_s: float, max_rounds: int):
+    rec = recorder()
+    # the list is copied, the messages are not: they are never mutated once appended
+    return TurnTrace(rec, list(messages), tools, budget_s, max_rounds) if rec else NO_TRACE
+
+
+# ---------- replay ----------
+
+class ReplayError(RuntimeError):
+    pass
+
+
+def load(path: str) -> List[Dict[str, Any]]:
+    """Turns of a trace file in recording order: {"turn", "llm": [...], "tools": [...], "done"}."""
+    turns: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                raise ReplayError(f"{path}:{n}: not a JSON line")
+            if ev["kind"] == "turn":
+                turns[ev["turn"]] = {"turn": ev, "llm": [], "tools": [], "done": None}
+            elif ev["turn"] in turns:   # events of a turn that started before the file did are skipped
+                t = turns[ev["turn"]]
+                if ev["kind"] == "llm":
+                    t["llm"].append(ev)
+                elif ev["kind"] == "tool":
+                    t["tools"].append(ev)
+                elif ev["kind"] == "done":
+                    t["done"] = ev
+    return list(turns.values())
+
+
+class ReplayClient:
+    """Stands in for AsyncOllama: answers the agent with the turn's recorded responses, in order."""
+
+    def __init__(self, records: List[Dict[str, Any]], realtime: bool = False):
+        self.records: Deque[Dict[str, Any]] = deque(records)
+        self.realtime = realtime
+        self.diverged = 0   # calls whose transcript length differs from the recording
+
+    async def chat_stream(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]):
+        if not self.records:
+            raise ReplayError("the agent made more model calls than were recorded")
+        rec = self.records.popleft()
+        if rec.get("n_messages") != len(messages):
+            self.diverged += 1
+        timing = rec.get("timing") or {}
+        if rec.get("error"):
+            raise ReplayError(f"recorded model call failed: {rec['error']}")
+        if self.realtime and timing.get("prefill_ms"):
+            await asyncio.sleep(timing["prefill_ms"] / 1000)
+        content = ((rec["response"].get("choices") or [{}])[0].get("message") or {}).get("content")
+        if content:
+            yield {"type": "token", "content": content}
+        if self.realtime and timing.get("generation_ms"):
+            await asyncio.sleep(timing["generation_ms"] / 1000)
+        yield {"type": "done", "response": rec["response"]}
+
+
+class RecordedTools:
+    """Stands in for dispatch_tool_call_async with the turn's recorded results, matched on name and arguments."""
+
+    def __init__(self, records: List[Dict[str, Any]], realtime: bool = False):
+        self.results: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        for r in records:
+            self.results.setdefault((r["name"], r["arguments"]), deque()).append(r["result"])
+        self.realtime = realtime
+        self.missed = 0
+
+    async def __call__(self, name: str, arguments: Any, use_cache: bool = True,
+                       max_timeout: Optional[float] = None) -> Dict[str, Any]:
+        key = (name, arguments if isinstance(arguments, str) else _dumps(arguments))
+        queue = self.results.get(key)
+        if not queue:
+            self.missed += 1
+            return {"ok": False, "error": f"replay: no recorded result for {name}({key[1]})", "elapsed_ms": 0.0}
+        result, t0 = dict(queue.popleft()), time.perf_counter()
+        if self.realtime and result.get("elapsed_ms"):
+            await asyncio.sleep(result["elapsed_ms"] / 1000)
+        result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)   # this replay's, not the recording's
+        return result
+
+
+async def replay_turn(t: Dict[str, Any], live_tools: bool = False, realtime: bool = False,
+                      use_cache: bool = True) -> Dict[str, Any]:
+    from LocalMind.agent import Agent
+    from LocalMind.router import Router
+    from LocalMind.tool_spec import TOOL_SPEC
+    head = t["turn"]
+    offered = set(head.get("tools") or [])
+    route = ((t["done"] or {}).get("timing") or {}).get("route")
+    client = ReplayClient(t["llm"], realtime)
+    tools = None if live_tools else RecordedTools(t["tools"], realtime)
+    agent = Agent(client=client, tools=[s for s in TOOL_SPEC if s["function"]["name"] in offered],
+                  budget_s=head.get("budget_s") or 3600, max_rounds=head.get("max_rounds", 6),
+                  use_cache=use_cache, dispatch=tools, router=Router(route["mode"] if route else "off"),
+                  prefetch_tools=False)
+    out: Dict[str, Any] = {"turn": head["turn"], "recorded": t["done"] and
+                           {"stopped": t["done"]["stopped"], "total_ms": t["done"]["timing"]["total_ms"]}}
+    try:
+        done = await agent.complete(list(head["messages"]))
+    except ReplayError as e:
+        out.update(error=str(e))
+        return out
+    timing = done["timing"]
+    out.update(stopped=done["stopped"], total_ms=timing["total_ms"], rounds=timing["rounds"],
+               llm_ms=round(sum(l["total_ms"] or 0 for l in timing["llm"]), 1),
+               tools_ms=round(sum(x["elapsed_ms"] or 0 for x in timing["tools"]), 1),
+               normalization_ms=timing["normalization_ms"],
+               same_answer=bool(t["done"]) and done["answer"] == t["done"]["answer"],
+               diverged_calls=client.diverged, unmatched_tools=tools.missed if tools else 0)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m LocalMind.trace", description="Replay a LOCALMIND_TRACE file.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay", help="re-run recorded turns against the recorded model responses")
+    rp.add_argument("path")
+    rp.add_argument("--turn", action="append", help="only turns whose id starts with this (repeatable)")
+    rp.add_argument("--live-tools", action="store_true", help="run the tools instead of using recorded results")
+    rp.add_argument("--no-cache", action="store_true", help="with --live-tools, bypass memoized tool results")
+    rp.add_argument("--realtime", action="store_true", help="wait as long as the recorded model and tools took")
+    rp.add_argument("--repeat", type=int, default=1, help="replay each turn this many times, report the fastest")
+    rp.add_argument("--json", help="also write the per-turn results here")
+    opts = ap.parse_args(argv)
+
+    set_recorder(None)   # a replay is not recorded again
+    turns = [t for t in load(opts.path) if not opts.turn or any(t["turn"]["turn"].startswith(p) for p in opts.turn)]
+
+    async def _all() -> List[Dict[str, Any]]:
+        from LocalMind.llm import async_client
+        results = []
+        try:
+            for t in turns:
+                runs = [await replay_turn(t, opts.live_tools, opts.realtime, not opts.no_cache) for _ in range(max(1, opts.repeat))]
+                results.append(min(runs, key=lambda r: r.get("total_ms", float("inf"))))
+        finally:
+            await async_client.aclose()
+        return results
+
+    results = asyncio.run(_all())
+    failed = 0
+    for r in results:
+        rec = r["recorded"] or {}
+        if "error" in r:
+            failed += 1
+            print(f"{r['turn']}  error: {r['error']}")
+            continue
+        mismatch = not r["same_answer"] or r["diverged_calls"] or r["unmatched_tools"]
+        failed += bool(mismatch)
+        print(f"{r['turn']}  {r['stopped']:<10} {r['rounds']} round(s)  replay {r['total_ms']} ms"
+              f" (recorded {rec.get('total_ms')} ms)  model {r['llm_ms']} ms  tools {r['tools_ms']} ms"
+              f"  normalization {r['normalization_ms']} ms"
+              + ("" if not mismatch else f"  DIVERGED (answer same={r['same_answer']}, calls={r['diverged_calls']},"
+                                         f" unmatched tools={r['unmatched_tools']})"))
+    print(f"{len(results)} turn(s) replayed, {failed} diverged or failed")
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -57,7 +57,7 @@ def normalize_args(tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
     a = dict(args or {})
     # Common coercions
     for k in list(a.keys()):
-        if k in ("top_n","timeout_seconds","max_results"):
+        if k in ("top_n","timeout_seconds","max_results","max_depth","min_size_mb"):
             try: a[k] = int(a[k])
             except Exception: pass
         if k in ("only_established","include_folders","include_disabled"):
@@ -72,6 +72,8 @@ def normalize_args(tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         a["timeout_seconds"] = max(5, min(int(a.get("timeout_seconds", 15)), 120))
         if "include_folders" not in a:
             a["include_folders"] = False
+        a["max_depth"] = max(1, min(int(a.get("max_depth", 1)), 32))
+        a["min_size_mb"] = max(0, int(a.get("min_size_mb", 0)))
 
     if tool_name == "find_files":
         roots = _parse_array_messy(a.get("roots") or [])
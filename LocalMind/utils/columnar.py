@@ -0,0 +1,38 @@
+import os
+from typing import Any, Dict, List
+
+# Header + rows encoding for tabular tool results. A list of N dicts repeats
+# every key N times ("memory_mb":, "process_name":, ...); the columnar form
+# names each column once:
+#   [{"pid": 4, "name": "System"}, {"pid": 88, "name": "Registry"}]
+#   -> {"columns": ["pid", "name"], "rows": [[4, "System"], [88, "Registry"]]}
+# It stays valid JSON, so the model reads it like any other tool result.
+
+MODE = os.getenv("LOCALMIND_COLUMNAR", "auto")            # auto | always | off
+MIN_ROWS = int(os.getenv("LOCALMIND_COLUMNAR_MIN_ROWS", "8"))
+
+
+def is_table(rows: Any) -> bool:
+    return isinstance(rows, list) and bool(rows) and all(isinstance(r, dict) for r in rows)
+
+def to_columns(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    cols: Dict[str, None] = {}
+    for r in rows:
+        for k in r:
+            cols.setdefault(k, None)
+    names = list(cols)
+    return {"columns": names, "rows": [[r.get(c) for c in names] for r in rows]}
+
+def should_encode(rows: Any, mode: str = None, min_rows: int = None) -> bool:
+    mode = mode or MODE
+    if mode == "off" or not is_table(rows):
+        return False
+    return mode == "always" or len(rows) >= (MIN_ROWS if min_rows is None else min_rows)
+
+def encode(data: Any, mode: str = None, min_rows: int = None) -> Any:
+    """Columnar-encode every top-level row list of a tool result that qualifies."""
+    if isinstance(data, list):
+        return to_columns(data) if should_encode(data, mode, min_rows) else data
+    if not isinstance(data, dict):
+        return data
+    return {k: to_columns(v) if should_encode(v, mode, min_rows) else v for k, v in data.items()}
@@ -0,0 +1,325 @@
+import os, sqlite3, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from LocalMind.utils.walker import Batch, CancelToken, Walker
+
+# On-disk filename index backing find_files.
+# Layout: one row per directory (with the mtime seen at its last scan) and one
+# row per file keyed by its directory id. A directory whose mtime is NULL has
+# been discovered but not scanned yet, which lets an interrupted build resume.
+# Refreshes only re-list directories whose mtime changed; note that editing a
+# file in place does not bump its directory's mtime, so size/mtime of existing
+# files can lag until the directory itself changes.
+
+INDEX_ENABLED = os.getenv("LOCALMIND_FILE_INDEX", "1") == "1"
+REFRESH_INTERVAL = float(os.getenv("LOCALMIND_INDEX_INTERVAL", "300"))
+COMMIT_EVERY = 500  # directories per transaction while scanning
+
+# system dirs that explode traversal cost; the live walk in find_files prunes the same
+SKIP_DIRS = ("$recycle.bin", "system volume information", "windows\\winsxs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    built_at REAL,
+    refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    parent_id INTEGER,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent_id);
+CREATE INDEX IF NOT EXISTS dirs_pending ON dirs(mtime) WHERE mtime IS NULL;
+CREATE TABLE IF NOT EXISTS files (
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    lname TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    PRIMARY KEY (dir_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_lname ON files(lname);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+"""
+
+def _default_index_path() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".localmind")
+    return os.getenv("LOCALMIND_INDEX_PATH") or os.path.join(base, "LocalMind", "file_index.sqlite")
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+def _skipped(path: str) -> bool:
+    low = path.lower()
+    return any(s in low for s in SKIP_DIRS)
+
+def _ext(lname: str) -> str:
+    i = lname.rfind(".")
+    return lname[i + 1:] if i > 0 else ""
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _glob_to_sqlite(q: str) -> str:
+    # fnmatch negation is [!..]; SQLite GLOB uses [^..]
+    return q.replace("[!", "[^")
+
+def outermost_roots(roots: Iterable[str]) -> List[str]:
+    """Drop roots nested inside another root so overlapping trees are only visited once."""
+    keyed = sorted(((_key(r), r) for r in roots if r), key=lambda kv: len(kv[0]))
+    out: List[Tuple[str, str]] = []
+    for k, r in keyed:
+        if any(k == ok or k.startswith(ok.rstrip(os.sep) + os.sep) for ok, _ in out):
+            continue
+        out.append((k, r))
+    return [r for _, r in out]
+
+
+class FileIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or _default_index_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()       # serializes writers (refresh)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ---------- roots / coverage ----------
+
+    def add_roots(self, roots: Iterable[str]) -> None:
+        with self._connect() as db:
+            for r in outermost_roots(roots):
+                if not os.path.isdir(r):
+                    continue
+                k = _key(r)
+                db.execute("INSERT OR IGNORE INTO roots(key, path) VALUES (?, ?)", (k, r))
+                db.execute("INSERT OR IGNORE INTO dirs(key, path, parent_id, mtime) VALUES (?, ?, NULL, NULL)", (k, r))
+
+    def _roots(self, db: sqlite3.Connection) -> List[Tuple[str, str, Optional[float], Optional[float]]]:
+        return db.execute("SELECT key, path, built_at, refreshed_at FROM roots").fetchall()
+
+    def split_roots(self, roots: List[str]) -> Tuple[List[str], List[str], Optional[float]]:
+        """
+        Return (indexed, unindexed, age_seconds). A root counts as indexed once
+        the index root covering it has finished its first full build.
+        """
+        with self._connect() as db:
+            built = [(k, ref) for k, _, b, ref in self._roots(db) if b is not None]
+        indexed, live, oldest = [], [], None
+        for r in roots:
+            k = _key(r)
+            cover = [ref for ik, ref in built if k == ik or k.startswith(ik.rstrip(os.sep) + os.sep)]
+            if cover:
+                indexed.append(r)
+                ref = max(cover)
+                oldest = ref if oldest is None else min(oldest, ref)
+            else:
+                live.append(r)
+        age = round(time.time() - oldest, 1) if oldest is not None else None
+        return indexed, live, age
+
+    # ---------- query ----------
+
+    def query(self, query: str, use_glob: bool, roots: List[str], limit: int) -> List[Dict[str, Any]]:
+        q = query.lower()
+        if use_glob:
+            if q.startswith("*.") and not any(c in q[2:] for c in "*?["):
+                where, params = "f.ext = ?", [q[2:]]
+            elif not any(c in q for c in "*?["):
+                where, params = "f.lname = ?", [q]
+            else:
+                where, params = "f.lname GLOB ?", [_glob_to_sqlite(q)]
+        else:
+            where, params = "instr(f.lname, ?) > 0", [q]
+
+        scopes, sparams = [], []
+        for r in outermost_roots(roots):
+            k = _key(r)
+            scopes.append("(d.key = ? OR d.key LIKE ? ESCAPE '\\')")
+            sparams += [k, _like_escape(k.rstrip(os.sep) + os.sep) + "%"]
+        if not scopes:
+            return []
+
+        sql = (
+            "SELECT d.path, f.name, f.size, f.mtime FROM files f JOIN dirs d ON d.id = f.dir_id "
+            f"WHERE {where} AND ({' OR '.join(scopes)}) ORDER BY f.mtime DESC LIMIT ?"
+        )
+        with self._connect() as db:
+            rows = db.execute(sql, params + sparams + [int(limit)]).fetchall()
+        return [{"path": os.path.join(d, n), "name": n, "size_bytes": int(s or 0), "mtime": m}
+                for d, n, s, m in rows]
+
+    # ---------- refresh ----------
+
+    def refresh(self, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Scan pending directories and re-list directories whose mtime changed.
+        Safe to interrupt: progress is committed every COMMIT_EVERY directories.
+        """
+        with self._lock:
+            t0 = time.monotonic()
+            stats = {"checked_dirs": 0, "scanned_dirs": 0, "removed_dirs": 0, "complete": True}
+            db = self._connect()
+            try:
+                # 1) Which directories need listing? Pending ones and those whose mtime moved.
+                known = set()
+                ids: Dict[str, int] = {}
+                pre_mtime: Dict[str, float] = {}   # mtime read before listing, stored once listed
+                seeds: List[str] = []
+                gone: List[str] = []
+                for did, key, path, mtime in db.execute("SELECT id, key, path, mtime FROM dirs"):
+                    stats["checked_dirs"] += 1
+                    known.add(key)
+                    try:
+                        cur = os.stat(path).st_mtime
+                    except OSError:
+                        gone.append(key)
+                        continue
+                    if mtime is None or cur != mtime:
+                        ids[key] = did; pre_mtime[key] = cur; seeds.append(path)
+                for key in gone:
+                    self._remove_tree(db, key)
+                    stats["removed_dirs"] += 1
+
+                # 2) List them in parallel; descend only into directories the index has not seen
+                token = CancelToken(deadline=deadline)
+                walker = Walker(seeds, token=token, prestat=True,
+                                prune=lambda p: _skipped(p) or _key(p) in known)
+                pending = 0
+                for batch in walker:
+                    if self._stop.is_set():
+                        break
+                    self._apply_batch(db, batch, ids, pre_mtime, stats)
+                    pending += 1
+                    if pending >= COMMIT_EVERY:
+                        db.commit(); pending = 0
+                stats["complete"] = walker.stats.complete and not self._stop.is_set()
+                stats["walk"] = walker.stats.as_dict()
+                db.commit()
+
+                now = time.time()
+                for k, rpath, built, _ in self._roots(db):
+                    left = db.execute(
+                        "SELECT 1 FROM dirs WHERE mtime IS NULL AND (key = ? OR key LIKE ? ESCAPE '\\') LIMIT 1",
+                        (k, _like_escape(k.rstrip(os.sep) + os.sep) + "%")).fetchone()
+                    if left is None:
+                        db.execute("UPDATE roots SET built_at = COALESCE(built_at, ?), refreshed_at = ? WHERE key = ?",
+                                   (now, now, k))
+                db.commit()
+            finally:
+                db.close()
+            stats["elapsed_seconds"] = round(time.monotonic() - t0, 3)
+            return stats
+
+    def _apply_batch(self, db: sqlite3.Connection, batch: Batch, ids: Dict[str, int],
+                     pre_mtime: Dict[str, float], stats: Dict[str, Any]) -> None:
+        key = _key(batch.path)
+        did = ids.pop(key, None)
+        if did is None:
+            return  # parent vanished or was removed meanwhile
+        mtime = pre_mtime.pop(key, None)
+        if batch.error:
+            if not os.path.isdir(batch.path):
+                self._remove_tree(db, key)
+                stats["removed_dirs"] += 1
+            elif mtime is not None:
+                # Permission denied etc.: remember the mtime so we do not retry every refresh
+                db.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (mtime, did))
+            return
+
+        files, subdirs = [], {}
+        for e in batch.entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if not _skipped(e.path):
+                        subdirs[_key(e.path)] = e
+                elif e.is_file(follow_symlinks=False):
+                    st = e.stat(follow_symlinks=False)
+                    ln = e.name.lower()
+                    files.append((did, e.name, ln, _ext(ln), int(st.st_size), float(st.st_mtime)))
+            except OSError:
+                continue
+
+        stats["scanned_dirs"] += 1
+        db.execute("DELETE FROM files WHERE dir_id = ?", (did,))
+        db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", files)
+        db.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (mtime, did))
+
+        known = {k for (k,) in db.execute("SELECT key FROM dirs WHERE parent_id = ?", (did,))}
+        for k, e in subdirs.items():
+            if k in known:
+                known.discard(k)
+                continue
+            cur = db.execute("INSERT OR IGNORE INTO dirs(key, path, parent_id, mtime) VALUES (?, ?, ?, NULL)",
+                             (k, e.path, did))
+            if cur.rowcount:
+                ids[k] = cur.lastrowid
+                try:
+                    pre_mtime[k] = e.stat(follow_symlinks=False).st_mtime
+                except OSError:
+                    pass
+        for k in known:  # subdirectories that disappeared
+            self._remove_tree(db, k)
+            stats["removed_dirs"] += 1
+
+    def _remove_tree(self, db: sqlite3.Connection, key: str) -> None:
+        like = _like_escape(key.rstrip(os.sep) + os.sep) + "%"
+        db.execute("DELETE FROM files WHERE dir_id IN (SELECT id FROM dirs WHERE key = ? OR key LIKE ? ESCAPE '\\')",
+                   (key, like))
+        db.execute("DELETE FROM dirs WHERE key = ? OR key LIKE ? ESCAPE '\\'", (key, like))
+
+    # ---------- background indexer ----------
+
+    def start_background(self, roots: Iterable[str], interval: float = REFRESH_INTERVAL) -> None:
+        """Register roots and keep them refreshed from a daemon thread (idempotent)."""
+        self.add_roots(roots)
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    stats = self.refresh()
+                    if os.getenv("LOCALMIND_DEBUG", "0") == "1":
+                        print(f"[file_index] refresh {stats}")
+                except Exception as e:
+                    if os.getenv("LOCALMIND_DEBUG", "0") == "1":
+                        print(f"[file_index] refresh failed: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="localmind-file-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_INDEX: Optional[FileIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+def get_file_index() -> Optional[FileIndex]:
+    """Process-wide index, or None when disabled/unavailable."""
+    global _INDEX
+    if not INDEX_ENABLED:
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            try:
+                _INDEX = FileIndex()
+            except Exception as e:
+                if os.getenv("LOCALMIND_DEBUG", "0") == "1":
+                    print(f"[file_index] unavailable: {e}")
+                return None
+        return _INDEX
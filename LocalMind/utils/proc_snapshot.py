@@ -0,0 +1,162 @@
+import os, threading, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+from LocalMind import metrics
+
+# One compact process table per tick, shared by list_processes,
+# get_system_overview, network_activity and process_detail. Cheap columns are
+# collected for every process; exe/username/cmdline (slow, and often
+# AccessDenied for protected processes on Windows) are fetched on demand and
+# memoized for the lifetime of the process.
+
+PROC_TTL = float(os.getenv("LOCALMIND_PROC_TTL", "2.0"))
+LAZY_FIELDS = ("exe", "username", "cmdline")
+
+
+class ProcessTable:
+    def __init__(self, rows: Dict[int, Dict[str, Any]], procs: Dict[int, psutil.Process], ts: float):
+        self.rows = rows      # pid -> {pid, ppid, name, rss, cpu_percent, create_time}
+        self._procs = procs   # pid -> psutil.Process, for lazy lookups
+        self.ts = ts
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.ts
+
+    def top(self, key: str, n: int, reverse: bool = True) -> List[Dict[str, Any]]:
+        rows = self.rows.values()
+        if key == "name":
+            return sorted(rows, key=lambda r: r["name"] or "", reverse=reverse)[:n]
+        return sorted(rows, key=lambda r: r[key] or 0, reverse=reverse)[:n]
+
+    def name(self, pid: int) -> Optional[str]:
+        row = self.rows.get(pid)
+        return row["name"] if row else None
+
+    def lazy(self, pid: int, field: str) -> Any:
+        """exe / username / cmdline for pid, fetched once per process lifetime."""
+        row = self.rows.get(pid)
+        if row is None:
+            return None
+        return _CACHE.lazy(pid, row.get("create_time"), field, self._procs.get(pid))
+
+
+def build_process_table() -> ProcessTable:
+    """Enumerate processes once. cpu_percent is the delta since the previous build/sample."""
+    rows: Dict[int, Dict[str, Any]] = {}
+    procs: Dict[int, psutil.Process] = {}
+    # process_iter() hands back the same cached Process objects on every call
+    # (dropping ones whose pid was reused), so cpu_percent(None) is a per-tick delta.
+    for p in psutil.process_iter(["name", "ppid", "memory_info", "create_time"]):
+        try:
+            cpu = p.cpu_percent(None)
+        except psutil.NoSuchProcess:
+            continue
+        except psutil.AccessDenied:
+            cpu = None      # protected process: listed, with no cpu figure (top() sorts None as 0)
+        mi = p.info.get("memory_info")
+        rows[p.pid] = {
+            "pid": p.pid,
+            "ppid": p.info.get("ppid"),
+            "name": p.info.get("name"),
+            "rss": mi.rss if mi else 0,
+            "cpu_percent": cpu,
+            "create_time": p.info.get("create_time"),
+        }
+        procs[p.pid] = p
+    return ProcessTable(rows, procs, time.time())
+
+
+class ProcessSnapshotCache:
+    def __init__(self, ttl: float = PROC_TTL):
+        self.ttl = ttl
+        self.table: Optional[ProcessTable] = None
+        self._lazy: Dict[Tuple[int, Any], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.lazy_hits = self.lazy_misses = 0
+
+    def publish(self, table: ProcessTable) -> None:
+        with self._lock:
+            self.table = table
+            # forget lazy fields of processes that have exited
+            live = {(pid, r.get("create_time")) for pid, r in table.rows.items()}
+            for k in [k for k in self._lazy if k not in live]:
+                del self._lazy[k]
+
+    def get(self, max_age: Optional[float] = None) -> ProcessTable:
+        ttl = self.ttl if max_age is None else max_age
+        t = self.table
+        if t is not None and t.age <= ttl:
+            self.hits += 1
+            return t
+        self.misses += 1
+        t = build_process_table()
+        self.publish(t)
+        return t
+
+    def lazy(self, pid: int, create_time: Any, field: str, proc: Optional[psutil.Process]) -> Any:
+        key = (pid, create_time)
+        with self._lock:    # publish() prunes _lazy from the sampler thread
+            slot = self._lazy.get(key)
+            if slot is not None and field in slot:
+                self.lazy_hits += 1
+                return slot[field]
+            self.lazy_misses += 1
+        val = None
+        try:
+            p = proc or psutil.Process(pid)
+            if field == "exe":
+                val = p.exe() or None
+            elif field == "username":
+                val = p.username()
+            elif field == "cmdline":
+                val = " ".join(p.cmdline() or [])
+        except Exception:
+            val = None
+        with self._lock:
+            self._lazy.setdefault(key, {})[field] = val
+        return val
+
+    def stats(self) -> Dict[str, Any]:
+        t = self.table
+        total = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "lazy_hits": self.lazy_hits,
+            "lazy_misses": self.lazy_misses,
+            "processes": len(t.rows) if t else 0,
+            "age_seconds": round(t.age, 2) if t else None,
+        }
+
+
+_CACHE = ProcessSnapshotCache()
+
+def get_process_cache() -> ProcessSnapshotCache:
+    return _CACHE
+
+def _collect():
+    st = _CACHE.stats()
+    return [
+        ("localmind_process_table_requests_total", "counter", "Process table lookups by outcome.",
+         [({"outcome": "hit"}, st["hits"]), ({"outcome": "miss"}, st["misses"])]),
+        ("localmind_process_table_hit_ratio", "gauge", "Process table hits / lookups.", [({}, st["hit_rate"])]),
+        ("localmind_process_lazy_fields_total", "counter", "exe/username/cmdline lookups by outcome.",
+         [({"outcome": "hit"}, st["lazy_hits"]), ({"outcome": "miss"}, st["lazy_misses"])]),
+        ("localmind_process_table_processes", "gauge", "Processes in the current table.", [({}, st["processes"])]),
+    ]
+
+metrics.register_collector(_collect)
+
+def get_process_table(max_age: Optional[float] = None) -> ProcessTable:
+    """Shared process table, at most PROC_TTL seconds old."""
+    if _CACHE.table is None:
+        # the sampler publishes the first table once it has real cpu deltas
+        from LocalMind.utils.telemetry import get_sampler
+        get_sampler().latest()
+    return _CACHE.get(max_age)
@@ -0,0 +1,76 @@
+import os, threading, time
+from typing import Any, Dict, Optional
+
+import psutil
+
+from LocalMind.utils.proc_snapshot import build_process_table, get_process_cache
+
+# Background CPU/RAM sampler. psutil's cpu_percent() is a delta between two
+# calls, so instead of sleeping inside every tool call we keep one thread that
+# samples at a fixed interval and let tools read the latest deltas instantly.
+
+SAMPLE_INTERVAL = float(os.getenv("LOCALMIND_SAMPLE_INTERVAL", "1.0"))
+
+
+class TelemetrySampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = max(0.1, interval)
+        self._latest: Optional[Dict[str, Any]] = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "TelemetrySampler":
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="localmind-telemetry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        self._tick(prime=True)
+        while not self._stop.wait(self.interval):
+            try:
+                self._tick()
+            except Exception as e:
+                if os.getenv("LOCALMIND_DEBUG", "0") == "1":
+                    print(f"[telemetry] sample failed: {e}")
+
+    def _tick(self, prime: bool = False) -> None:
+        cpu = psutil.cpu_percent(None)
+        vm = psutil.virtual_memory()
+        table = build_process_table()
+        if prime:
+            return  # first cpu_percent() calls only establish the baseline
+        get_process_cache().publish(table)
+        self._latest = {
+            "ts": time.time(),
+            "interval": self.interval,
+            "cpu_percent": cpu,
+            "memory": vm,
+        }
+        self._ready.set()
+
+    def latest(self, wait: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Most recent sample; blocks (once, right after start) until the first delta exists."""
+        if not self._ready.is_set():
+            self.start()
+            self._ready.wait(self.interval * 2 + 1 if wait is None else wait)
+        return self._latest
+
+
+_SAMPLER: Optional[TelemetrySampler] = None
+_SAMPLER_LOCK = threading.Lock()
+
+def get_sampler() -> TelemetrySampler:
+    global _SAMPLER
+    with _SAMPLER_LOCK:
+        if _SAMPLER is None:
+            _SAMPLER = TelemetrySampler().start()
+        return _SAMPLER
@@ -0,0 +1,154 @@
+import json, os, threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from LocalMind import metrics
+
+# Memoizes tool results keyed on (tool name, normalized args). Each tool has
+# its own TTL: live views (processes, sockets) for a couple of seconds, slow
+# inventories (startup items, scheduled tasks) for minutes. Hardware names,
+# which cannot change while we run, are memoized inside system_info.py;
+# its result also carries memory use and uptime, so it gets 30 seconds.
+# Entries are evicted least-recently-used once MAX_ENTRIES is reached.
+
+TOOL_TTLS: Dict[str, float] = {
+    "get_system_overview": 2,
+    "list_processes":      2,
+    "process_detail":      2,
+    "network_activity":    2,
+    "disk_usage":          10,
+    "wifi_info":           10,
+    "get_system_info":     30,    # cpu/gpu names inside are cached for the process lifetime
+    "find_files":          30,
+    "list_large_files":    120,
+    "startup_items":       300,
+    "list_scheduled_tasks":300,
+}
+
+ENABLED = os.getenv("LOCALMIND_TOOL_CACHE", "1") == "1"
+MAX_ENTRIES = int(os.getenv("LOCALMIND_TOOL_CACHE_SIZE", "256"))
+
+
+class ToolCache:
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = MAX_ENTRIES):
+        self.ttls = dict(TOOL_TTLS if ttls is None else ttls)
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(name: str, args: Dict[str, Any]) -> Tuple[str, str]:
+        return name, json.dumps(args, sort_keys=True, default=str)
+
+    def ttl(self, name: str) -> float:
+        return self.ttls.get(name, 0)
+
+    def _count(self, name: str, what: str) -> None:
+        s = self._stats.setdefault(name, {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0})
+        s[what] += 1
+
+    def _lookup(self, k: Tuple[str, str]) -> Optional[Tuple[float, Dict[str, Any]]]:
+        item = self._data.get(k)
+        if item is None:
+            return None
+        if time.monotonic() - item[0] > self.ttl(k[0]):
+            del self._data[k]
+            return None
+        self._data.move_to_end(k)
+        return item
+
+    def _store(self, k: Tuple[str, str], value: Dict[str, Any]) -> None:
+        self._data[k] = (time.monotonic(), value)
+        self._data.move_to_end(k)
+        while len(self._data) > self.max_entries:
+            old, _ = self._data.popitem(last=False)
+            self._count(old[0], "evictions")
+
+    def get_or_call(self, name: str, args: Dict[str, Any], fn: Callable[[], Dict[str, Any]],
+                    use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Cached fn() for (name, args). Concurrent misses on the same key run fn once;
+        only successful results ({"ok": false} is not) are stored. Hits are returned
+        as a shallow copy carrying cached_age_seconds. use_cache=False skips the
+        lookup but still stores the fresh result.
+        """
+        k = self.key(name, args)
+        if not use_cache or self.ttl(name) <= 0:
+            with self._lock:
+                self._count(name, "bypassed")
+            out = fn()
+            if self.ttl(name) > 0 and isinstance(out, dict) and out.get("ok") is not False:
+                with self._lock:
+                    self._store(k, out)   # a forced refresh still feeds later cached calls
+                out = dict(out)
+            return out
+
+        while True:
+            with self._lock:
+                item = self._lookup(k)
+                if item is not None:
+                    self._count(name, "hits")
+                    out = dict(item[1])
+                    out["cached_age_seconds"] = round(time.monotonic() - item[0], 2)
+                    return out
+                waiter = self._inflight.get(k)
+                if waiter is None:
+                    self._count(name, "misses")
+                    self._inflight[k] = threading.Event()
+                    break
+            waiter.wait()   # another thread is computing this key; then re-check
+
+        try:
+            out = fn()
+            if isinstance(out, dict) and out.get("ok") is not False:
+                with self._lock:
+                    self._store(k, out)
+                out = dict(out)
+            return out
+        finally:
+            with self._lock:
+                self._inflight.pop(k).set()
+
+    def clear(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            for k in [k for k in self._data if name is None or k[0] == name]:
+                del self._data[k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_tool = {n: dict(s) for n, s in self._stats.items()}
+            entries = len(self._data)
+        hits = sum(s["hits"] for s in per_tool.values())
+        misses = sum(s["misses"] for s in per_tool.values())
+        return {
+            "enabled": ENABLED,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "tools": per_tool,
+        }
+
+
+_CACHE = ToolCache()
+
+def get_tool_cache() -> ToolCache:
+    return _CACHE
+
+def _collect():
+    st = _CACHE.stats()
+    per = sorted(st["tools"].items())
+    return [
+        ("localmind_tool_cache_requests_total", "counter", "Tool cache lookups by outcome.",
+         [({"tool": n, "outcome": o}, s[k]) for n, s in per
+          for o, k in (("hit", "hits"), ("miss", "misses"), ("bypass", "bypassed"))]),
+        ("localmind_tool_cache_evictions_total", "counter", "Tool cache LRU evictions.",
+         [({"tool": n}, s["evictions"]) for n, s in per]),
+        ("localmind_tool_cache_hit_ratio", "gauge", "Tool cache hits / (hits + misses).", [({}, st["hit_rate"])]),
+        ("localmind_tool_cache_entries", "gauge", "Tool results currently cached.", [({}, st["entries"])]),
+    ]
+
+metrics.register_collector(_collect)
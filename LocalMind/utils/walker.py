@@ -0,0 +1,227 @@
+import os, queue, threading, time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Shared parallel directory walker used by find_files, the filename index and
+# list_large_files. Each worker owns a deque of pending directories: it pops
+# from its own tail (depth-first, cache friendly) and steals from the head of
+# other workers' deques when it runs dry. Listings are streamed to the single
+# consumer as one batch of os.DirEntry objects per directory.
+
+DEFAULT_WORKERS = int(os.getenv("LOCALMIND_WALK_WORKERS", "8"))
+
+
+class CancelToken:
+    """Cancellation flag plus an optional wall-clock deadline (time.monotonic based)."""
+
+    def __init__(self, timeout: Optional[float] = None, deadline: Optional[float] = None):
+        if deadline is None and timeout is not None:
+            deadline = time.monotonic() + timeout
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or self.expired
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+
+class Batch(NamedTuple):
+    path: str
+    depth: int                 # 0 for the walk roots
+    entries: List[os.DirEntry]
+    error: Optional[str]       # set when the directory could not be listed
+    truncated: bool = False    # listing stopped early on cancel/deadline
+
+
+class WalkStats:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.complete = False  # True when every reachable directory was listed
+        self._dirs = [0] * workers
+        self._entries = [0] * workers
+        self._errors = [0] * workers
+
+    @property
+    def dirs(self) -> int: return sum(self._dirs)
+
+    @property
+    def entries(self) -> int: return sum(self._entries)
+
+    @property
+    def errors(self) -> int: return sum(self._errors)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        el = max(self.elapsed, 1e-6)
+        return {
+            "workers": self.workers,
+            "dirs": self.dirs,
+            "entries": self.entries,
+            "errors": self.errors,
+            "complete": self.complete,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "dirs_per_s": round(self.dirs / el, 1),
+            "entries_per_s": round(self.entries / el, 1),
+        }
+
+
+class Walker:
+    """
+    walker = Walker(roots, token=CancelToken(timeout=10), prune=skip_fn)
+    for batch in walker:
+        ...
+    walker.stats.as_dict()
+
+    prune(path) -> True skips a subdirectory (it is neither listed nor descended);
+    the roots themselves are always listed. A Walker is single-use.
+    prestat=True makes workers call DirEntry.stat() on regular files so the
+    (cached) result is free for the consumer.
+    """
+
+    def __init__(self, roots: Iterable[str], token: Optional[CancelToken] = None,
+                 workers: Optional[int] = None, prune: Optional[Callable[[str], bool]] = None,
+                 prestat: bool = False, max_pending_batches: int = 1024):
+        self.roots = [r for r in roots if r]
+        self.token = token or CancelToken()
+        self.nworkers = max(1, workers or DEFAULT_WORKERS)
+        self.prune = prune
+        self.prestat = prestat
+        self.stats = WalkStats(self.nworkers)
+        self._out: "queue.Queue[Optional[Batch]]" = queue.Queue(maxsize=max_pending_batches)
+        self._deques: List[Deque] = [deque() for _ in range(self.nworkers)]
+        self._outstanding = 0          # queued + in-progress directories
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._truncated = False        # a listing or the queue was abandoned on cancel
+
+    # ---------- worker side ----------
+
+    def _push(self, wid: int, items: List[tuple]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._outstanding += len(items)
+            self._deques[wid].extend(items)
+            self._idle.notify_all()
+
+    def _take(self, wid: int) -> Optional[tuple]:
+        own = self._deques[wid]
+        while True:
+            if self._stop.is_set() or self.token.cancelled:
+                return None
+            try:
+                return own.pop()
+            except IndexError:
+                pass
+            for i in range(1, self.nworkers):
+                try:
+                    return self._deques[(wid + i) % self.nworkers].popleft()
+                except IndexError:
+                    continue
+            with self._lock:
+                if self._outstanding == 0:
+                    return None
+                self._idle.wait(0.05)
+
+    def _done_one(self) -> None:
+        with self._lock:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._idle.notify_all()
+
+    def _emit(self, batch: Optional[Batch]) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._out.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _work(self, wid: int) -> None:
+        check_every = 256
+        while True:
+            item = self._take(wid)
+            if item is None:
+                return
+            path, depth = item
+            try:
+                entries, subdirs, err, cut = [], [], None, False
+                try:
+                    with os.scandir(path) as it:
+                        for n, e in enumerate(it):
+                            if n % check_every == 0 and self.token.cancelled:
+                                self._truncated = cut = True
+                                break
+                            entries.append(e)
+                            try:
+                                if e.is_dir(follow_symlinks=False):
+                                    if not (self.prune and self.prune(e.path)):
+                                        subdirs.append((e.path, depth + 1))
+                                elif self.prestat and e.is_file(follow_symlinks=False):
+                                    e.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                except OSError as ex:
+                    err = f"{ex.__class__.__name__}: {ex}"
+                    self.stats._errors[wid] += 1
+                self.stats._dirs[wid] += 1
+                self.stats._entries[wid] += len(entries)
+                # emit before queueing children so a parent's batch always precedes its children's
+                if not self._emit(Batch(path, depth, entries, err, cut)):
+                    return
+                if self.token.cancelled:
+                    self._truncated = self._truncated or bool(subdirs)
+                else:
+                    self._push(wid, subdirs)
+            finally:
+                self._done_one()
+
+    # ---------- consumer side ----------
+
+    def __iter__(self) -> Iterator[Batch]:
+        for i, s in enumerate((r, 0) for r in self.roots):
+            self._push(i % self.nworkers, [s])
+        threads = [threading.Thread(target=self._work, args=(i,), name=f"localmind-walk-{i}", daemon=True)
+                   for i in range(self.nworkers)]
+        for t in threads:
+            t.start()
+
+        def drain():
+            for t in threads:
+                t.join()
+            self.stats.complete = self._outstanding == 0 and not self._truncated
+            self._emit(None)
+
+        threading.Thread(target=drain, name="localmind-walk-drain", daemon=True).start()
+        try:
+            while True:
+                batch = self._out.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            # consumer stopped early (break/exception): release the workers
+            self._stop.set()
+            self.stats.finished = time.monotonic()
+
+
+def walk(roots: Iterable[str], **kwargs) -> Iterator[Batch]:
+    """Convenience generator over Walker(roots, **kwargs)."""
+    return iter(Walker(roots, **kwargs))
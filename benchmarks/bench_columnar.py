@@ -0,0 +1,122 @@
+"""
+Row-per-dict vs columnar encoding of tabular tool results.
+
+    python benchmarks/bench_columnar.py                    # size/token estimates only
+    python benchmarks/bench_columnar.py --ollama http://127.0.0.1:11434 --model llama3.1:8b
+
+With --ollama every tool result is sent as the tool message of a one-tool
+turn (system, user, assistant tool_call, tool) and the real prompt token
+count (prompt_eval_count) plus end-to-end turn latency are measured.
+Results are synthetic but shaped like the real tools' output, seeded so
+runs are comparable.
+"""
+import argparse, json, os, random, statistics, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LocalMind.guards.limits import compact_tool_result
+
+NO_BUDGET = 10 ** 9
+
+
+def synthetic_results(seed: int = 7):
+    rnd = random.Random(seed)
+    names = ["chrome.exe", "svchost.exe", "Code.exe", "explorer.exe", "OneDrive.exe", "Teams.exe",
+             "RuntimeBroker.exe", "MsMpEng.exe", "ollama.exe", "python.exe", "dwm.exe", "SearchHost.exe"]
+    procs = [{"pid": rnd.randint(100, 60000), "name": rnd.choice(names),
+              "cpu_percent": round(rnd.random() * 12, 1), "memory_mb": round(rnd.random() * 900, 1),
+              "exe": f"C:\\Program Files\\App{i}\\{rnd.choice(names)}", "user": "DESKTOP-1\\alex",
+              "cmdline": f"\"C:\\Program Files\\App{i}\\app.exe\" --type=renderer --id={i}"} for i in range(200)]
+    procs.sort(key=lambda r: -r["cpu_percent"])
+    conns = [{"pid": rnd.randint(100, 60000), "process_name": rnd.choice(names),
+              "laddr": f"192.168.1.23:{rnd.randint(49152, 65535)}",
+              "raddr": f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}:443",
+              "status": "ESTABLISHED"} for _ in range(120)]
+    files = [{"path": f"C:\\Users\\alex\\Documents\\Projects\\report_{i:03d}.docx",
+              "size_bytes": rnd.randint(10_000, 5_000_000),
+              "modified_utc": f"2025-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}T10:00:00Z",
+              "confidence": round(rnd.random(), 2)} for i in range(50)]
+    large = {"ok": True,
+             "files": [{"path": f"D:\\Media\\Video\\clip_{i:03d}.mp4", "size_bytes": rnd.randint(10 ** 8, 10 ** 10),
+                        "modified_utc": "2025-03-01T12:00:00Z"} for i in range(40)],
+             "folders": [{"path": f"D:\\Media\\Folder{i}", "size_bytes": rnd.randint(10 ** 9, 10 ** 11)}
+                         for i in range(40)]}
+    tasks = [{"TaskName": f"Task{i}", "TaskPath": "\\Microsoft\\Windows\\Maintenance\\", "State": "Ready",
+              "Enabled": True, "Author": "Microsoft Corporation", "Description": "Performs periodic maintenance.",
+              "LastRunTime": "2025-10-01T03:00:00", "NextRunTime": "2025-10-02T03:00:00", "LastTaskResult": 0,
+              "Triggers": ["Daily at 03:00"], "Actions": ["%windir%\\system32\\rundll32.exe"]} for i in range(150)]
+    return {
+        "list_processes":       {"ok": True, "result": procs},
+        "network_activity":     {"ok": True, "result": conns},
+        "find_files":           {"ok": True, "query": "report", "results_count": len(files), "results": files},
+        "list_large_files":     large,
+        "list_scheduled_tasks": {"ok": True, "source": "powershell", "results_count": len(tasks), "tasks": tasks},
+    }
+
+
+def ollama_turn(url: str, model: str, tool: str, content: str, nonce: int):
+    import requests
+    messages = [
+        # nonce keeps Ollama from reusing the KV cache of the previous run
+        {"role": "system", "content": f"You are LocalMind, a read-only Windows system assistant. run={nonce}"},
+        {"role": "user", "content": "Summarize what this shows in two sentences."},
+        {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": tool, "arguments": {}}}]},
+        {"role": "tool", "content": content},
+    ]
+    t0 = time.perf_counter()
+    r = requests.post(f"{url}/api/chat", json={"model": model, "messages": messages, "stream": False,
+                                               "options": {"temperature": 0, "num_predict": 64}}, timeout=600)
+    r.raise_for_status()
+    body = r.json()
+    return {"prompt_tokens": body.get("prompt_eval_count"), "turn_seconds": time.perf_counter() - t0}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--ollama", help="Ollama base URL; omit to skip model measurements")
+    ap.add_argument("--model", default="llama3.1:8b")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget", type=int, default=0, help="token budget (0 = no compaction, encoding only)")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    budget = args.budget or NO_BUDGET
+    rows, nonce = [], 0
+    for tool, out in synthetic_results().items():
+        row = {"tool": tool}
+        for mode in ("off", "auto"):
+            text, st = compact_tool_result(tool, out, budget=budget, columnar_mode=mode)
+            row[f"{mode}_bytes"], row[f"{mode}_est_tokens"] = st["bytes_out"], st["tokens_out"]
+            row[f"{mode}_rows"] = st.get("rows_kept", sum(len(v) for v in out.values() if isinstance(v, list)))
+            if args.ollama:
+                runs = []
+                for _ in range(args.repeat):
+                    nonce += 1
+                    runs.append(ollama_turn(args.ollama, args.model, tool, text, nonce))
+                row[f"{mode}_prompt_tokens"] = runs[0]["prompt_tokens"]
+                row[f"{mode}_turn_s"] = round(statistics.median(r["turn_seconds"] for r in runs), 2)
+        rows.append(row)
+
+    hdr = f"{'tool':22} {'bytes row/col':>15} {'est tok row/col':>17} {'saved':>6}"
+    if args.budget:
+        hdr += f" {'rows kept row/col':>18}"
+    if args.ollama:
+        hdr += f" {'prompt tok row/col':>19} {'turn s row/col':>15}"
+    print(hdr)
+    for r in rows:
+        saved = 1 - r["auto_est_tokens"] / r["off_est_tokens"]
+        line = (f"{r['tool']:22} {r['off_bytes']:>7}/{r['auto_bytes']:<7} "
+                f"{r['off_est_tokens']:>8}/{r['auto_est_tokens']:<8} {saved:>6.0%}")
+        if args.budget:
+            line += f" {str(r['off_rows']):>8}/{str(r['auto_rows']):<9}"
+        if args.ollama:
+            line += (f" {str(r['off_prompt_tokens']):>9}/{str(r['auto_prompt_tokens']):<9}"
+                     f" {r['off_turn_s']:>7}/{r['auto_turn_s']:<7}")
+        print(line)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model if args.ollama else None, "budget": args.budget, "rows": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
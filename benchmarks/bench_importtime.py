@@ -0,0 +1,81 @@
+"""
+Cold-start guard: `python -X importtime` budget for the CLI entry module.
+
+    python benchmarks/bench_importtime.py                  # LocalMind.cli, default budget
+    python benchmarks/bench_importtime.py --budget-ms 80 --runs 9
+    python benchmarks/bench_importtime.py --module server --budget-ms 1500 --forbid psutil
+
+Exits non-zero when the median cumulative import time of --module exceeds
+--budget-ms, or when importing it pulls in a module that must stay lazy
+(tools, psutil, winreg, rich, requests, ... for the CLI).
+"""
+import argparse, json, os, re, statistics, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# must not be imported until a question is asked / a tool is dispatched
+CLI_FORBIDDEN = ["rich", "requests", "psutil", "winreg", "aiohttp", "asyncio", "LocalMind.tools"]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def importtime(module: str):
+    """[(self_us, cumulative_us, depth, name)] from one fresh interpreter."""
+    cp = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                        cwd=ROOT, capture_output=True, text=True)
+    if cp.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{cp.stderr[-2000:]}")
+    rows = []
+    for line in cp.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    return rows
+
+def loaded_modules(module: str):
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    cp = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return json.loads(cp.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--module", default="LocalMind.cli")
+    ap.add_argument("--budget-ms", type=float, default=150.0)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--forbid", action="append", default=None,
+                    help="module (prefix) that must not be imported; defaults to the CLI list")
+    ap.add_argument("--top", type=int, default=10, help="show the N slowest imports")
+    args = ap.parse_args()
+
+    totals, last = [], []
+    for _ in range(max(1, args.runs)):
+        last = importtime(args.module)
+        own = [r for r in last if r[3] == args.module]
+        totals.append(own[-1][1] / 1000 if own else 0.0)
+    median = statistics.median(totals)
+
+    print(f"{args.module}: median {median:.1f} ms over {len(totals)} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+    print(f"slowest imports (self time, last run):")
+    for self_us, cum_us, depth, name in sorted(last, key=lambda r: -r[0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cum_us / 1000:8.1f} ms cumulative  {name}")
+
+    forbidden = args.forbid if args.forbid is not None else (CLI_FORBIDDEN if args.module == "LocalMind.cli" else [])
+    mods = loaded_modules(args.module)
+    leaked = sorted({f for f in forbidden for m in mods if m == f or m.startswith(f + ".")})
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: {median:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if leaked:
+        print(f"FAIL: importing {args.module} loads {', '.join(leaked)} (must stay lazy)")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Hit rate and latency of the fast-path router (LocalMind/router.py).
+
+    python benchmarks/bench_router.py                                 # fake model, 800 ms prefill, 20 tok/s
+    python benchmarks/bench_router.py --fake-args "--prefill-ms 5000 --tokens-per-s 8"
+    python benchmarks/bench_router.py --ollama http://127.0.0.1:11434 # a real model
+
+Runs a fixed mix of routable and open-ended questions through the agent
+loop once per router mode (off, template, summarize), against
+benchmarks/fake_ollama.py by default, and reports the router's hit rate
+and the turn latency of routed questions with and without the router. Tools
+run for real in every mode, so the differences are the model calls. The
+saving the router estimates for itself (model calls skipped x its average
+agent-loop call) is printed next to the measured one.
+"""
+import argparse, asyncio, json, os, shlex, statistics, subprocess, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault("LOCALMIND_DEBUG", "0")
+os.environ.setdefault("LOCALMIND_FILE_INDEX", "0")
+
+from loadgen import free_port, stop, wait_http
+
+ROUTABLE = ["How full are my disks?", "Is my SSD almost full?", "What is using the most memory?",
+            "top 5 memory processes", "What's hogging my CPU?", "What CPU do I have?", "What's my uptime?"]
+OPEN_ENDED = ["Why is my disk full?", "Which programs are on the network?", "How is my system doing?",
+              "What can you do?", "Find large files in my Downloads folder"]
+
+
+async def run_mode(mode: str, questions, repeat: int):
+    from LocalMind.agent import Agent
+    from LocalMind.router import Router
+    from LocalMind.tool_spec import SYSTEM_PROMPT
+    router = Router(mode)
+    rows = []
+    for _ in range(repeat):
+        for q in questions:
+            done = await Agent(router=router).complete([{"role": "system", "content": SYSTEM_PROMPT},
+                                                       {"role": "user", "content": q}])
+            t = done["timing"]
+            rows.append({"question": q, "ms": t["total_ms"], "llm_calls": len(t["llm"]), "route": t.get("route")})
+    return rows, router.stats()
+
+
+async def run_all(opts):
+    from LocalMind.llm import async_client
+    questions = OPEN_ENDED + ROUTABLE   # agent turns first, so the router has a call time to price savings at
+    out = {}
+    try:
+        for mode in ("off", "template", "summarize"):
+            out[mode] = await run_mode(mode, questions, opts.repeat)
+    finally:
+        await async_client.aclose()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--ollama", help="model server to use instead of a spawned fake_ollama.py")
+    ap.add_argument("--fake-args", default="--prefill-ms 800 --tokens-per-s 20",
+                    help="fake_ollama.py arguments (latency model)")
+    ap.add_argument("--repeat", type=int, default=3, help="passes over the question set per mode")
+    ap.add_argument("--json", help="also write the results here")
+    opts = ap.parse_args()
+
+    procs = []
+    if not opts.ollama:
+        port = free_port()
+        procs.append(subprocess.Popen([sys.executable, os.path.join(HERE, "fake_ollama.py"), "--port", str(port),
+                                       *shlex.split(opts.fake_args)], stdout=subprocess.DEVNULL))
+        wait_http(f"http://127.0.0.1:{port}/api/version", procs[0])
+        opts.ollama = f"http://127.0.0.1:{port}"
+    os.environ["OLLAMA_URL"] = opts.ollama   # read when LocalMind.llm is first imported
+    try:
+        results = asyncio.run(run_all(opts))
+    finally:
+        stop(procs)
+
+    routable = set(ROUTABLE)
+    base = {q: statistics.median(r["ms"] for r in results["off"][0] if r["question"] == q) for q in routable}
+    print(f"{len(ROUTABLE)} routable + {len(OPEN_ENDED)} open-ended questions, {opts.repeat} pass(es), model at {opts.ollama}")
+    print(f"{'mode':<10} {'hit rate':>8} {'routed p50':>11} {'off p50':>9} {'saved/turn':>11} {'est/turn':>9} {'llm calls':>9}")
+    report = {}
+    for mode, (rows, st) in results.items():
+        routed = [r for r in rows if r["route"]]
+        p50 = statistics.median(r["ms"] for r in routed) if routed else None
+        off = statistics.median(base[r["question"]] for r in routed) if routed else None
+        saved = statistics.mean(base[r["question"]] - r["ms"] for r in routed) if routed else None
+        est = st["saved_ms_est"] / st["hits"] if st["hits"] and st["avg_llm_call_ms"] is not None else None
+        missed = sorted({r["question"] for r in rows if not r["route"] and r["question"] in routable})
+        report[mode] = {"hit_rate": st["hit_rate"], "routed_p50_ms": p50, "off_p50_ms": off, "saved_ms_per_turn": saved,
+                        "router_estimate_ms_per_turn": est, "llm_calls": sum(r["llm_calls"] for r in rows),
+                        "routable_missed": missed, "stats": st}
+        fmt = lambda v: "-" if v is None else f"{v:.0f} ms"
+        print(f"{mode:<10} {st['hit_rate'] if st['hit_rate'] is not None else '-':>8} {fmt(p50):>11} {fmt(off):>9}"
+              f" {fmt(saved):>11} {fmt(est):>9} {report[mode]['llm_calls']:>9}")
+        if mode != "off" and missed:
+            print(f"  routable but not routed: {', '.join(missed)}")
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Prompt size and latency with and without per-question tool selection (LocalMind/tool_select.py).
+
+    python benchmarks/bench_tool_select.py                                   # fake model, CPU-like prefill
+    python benchmarks/bench_tool_select.py --fake-args "--prefill-ms 300 --prefill-ms-per-1k 1500"
+    python benchmarks/bench_tool_select.py --ollama http://127.0.0.1:11434   # a real model
+
+Runs a fixed question set through the agent loop twice, offering the full
+TOOL_SPEC and then the per-question selection, against
+benchmarks/fake_ollama.py by default (prefill proportional to prompt
+tokens). Both modes run once with the fake's prefix cache on (a prompt
+whose system message and tools match the previous one skips their
+prefill, as Ollama's KV cache does) and once with --no-prefix-cache (for
+templates that render the tools after the history, so they are prefilled
+on every call). Pruning can only win in the second case; in the first it
+trades fewer tokens for cache misses whenever consecutive questions are
+offered different tools. Reports prompt tokens per model call (from the
+server's usage), prefix-cache hits, time to first token, turn latency, and
+whether the tool each question needs was offered. Router and prefetch are
+off, so the difference is the prompt.
+"""
+import argparse, asyncio, json, os, shlex, statistics, subprocess, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault("LOCALMIND_DEBUG", "0")
+os.environ.setdefault("LOCALMIND_FILE_INDEX", "0")
+os.environ.setdefault("LOCALMIND_WARMUP", "0")
+
+from loadgen import free_port, stop, wait_http
+
+# question -> the tool a good answer needs (None: no tool)
+QUESTIONS = {
+    "How full are my disks?": "disk_usage",
+    "What is using the most memory?": "list_processes",
+    "Why is my computer so slow right now?": "list_processes",
+    "Which programs are on the network?": "network_activity",
+    "Give me an overview of the system health.": "get_system_overview",
+    "Find large files in my Downloads folder": "list_large_files",
+    "What runs at startup?": "startup_items",
+    "What GPU do I have?": "get_system_info",
+    "Is my wifi signal weak?": "wifi_info",
+    "What can you do?": None,
+}
+
+
+async def run_mode(select: bool, repeat: int):
+    from LocalMind.agent import Agent
+    from LocalMind.router import Router
+    from LocalMind.tool_spec import SYSTEM_PROMPT
+    rows = []
+    for _ in range(repeat):
+        for q in QUESTIONS:
+            agent = Agent(router=Router("off"), prefetch_tools=False, select_tools=select)
+            done = await agent.complete([{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": q}])
+            t = done["timing"]
+            rows.append({"question": q, "ms": t["total_ms"], "llm": t["llm"], "tool_select": t.get("tool_select"),
+                         "tools": [x["name"] for x in t["tools"]]})
+    return rows
+
+
+def coverage():
+    """Share of questions whose needed tool is in the selection, and the average number offered."""
+    from LocalMind import tool_select
+    from LocalMind.tool_spec import TOOL_SPEC
+    hit, sizes = 0, []
+    for q, tool in QUESTIONS.items():
+        names = {t["function"]["name"] for t in tool_select.select([{"role": "user", "content": q}], TOOL_SPEC)}
+        hit += tool is None or tool in names
+        sizes.append(len(names))
+    return hit / len(QUESTIONS), statistics.mean(sizes), len(TOOL_SPEC)
+
+
+def run_cache_mode(opts, prefix_cache: bool):
+    """Both selection modes against one model server; returns (results, prefix hits or None)."""
+    import urllib.request
+    procs, url = [], opts.ollama
+    if not url:
+        port = free_port()
+        procs.append(subprocess.Popen([sys.executable, os.path.join(HERE, "fake_ollama.py"), "--port", str(port),
+                                       *shlex.split(opts.fake_args), *([] if prefix_cache else ["--no-prefix-cache"])],
+                                      stdout=subprocess.DEVNULL))
+        url = f"http://127.0.0.1:{port}"
+        wait_http(url + "/api/version", procs[0])
+    from LocalMind.llm import pool
+    pool._POOL = pool.BackendPool([url])   # this run's model server
+    try:
+        results, hits = {}, {}
+        for mode, select in (("full", False), ("selected", True)):
+            if procs:
+                with urllib.request.urlopen(url + "/_stats") as r:
+                    before = json.load(r)["prefix_hits"]
+            results[mode] = asyncio.run(run_mode_closing(select, opts.repeat))
+            if procs:
+                with urllib.request.urlopen(url + "/_stats") as r:
+                    hits[mode] = json.load(r)["prefix_hits"] - before
+        return results, hits
+    finally:
+        stop(procs)
+
+
+async def run_mode_closing(select: bool, repeat: int):
+    from LocalMind.llm import async_client
+    try:
+        return await run_mode(select, repeat)
+    finally:
+        await async_client.aclose()
+
+
+def summarize(rows, hits):
+    calls = [l for r in rows for l in r["llm"]]
+    tokens = [l["usage"]["prompt_tokens"] for l in calls if l.get("usage")]
+    ttft = [l["prefill_ms"] for l in calls if l.get("prefill_ms") is not None]
+    return {"calls": len(calls), "prefix_hits": hits,
+            "prompt_tokens_per_call": statistics.mean(tokens) if tokens else None,
+            "ttft_p50_ms": statistics.median(ttft), "turn_p50_ms": statistics.median(r["ms"] for r in rows),
+            "turn_mean_ms": statistics.mean(r["ms"] for r in rows),
+            "widened": sum(1 for r in rows if (r["tool_select"] or {}).get("widened"))}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--ollama", help="model server to use instead of a spawned fake_ollama.py (run once, as it is)")
+    ap.add_argument("--fake-args", default="--prefill-ms 150 --prefill-ms-per-1k 600 --tokens-per-s 40",
+                    help="fake_ollama.py arguments (latency model); the prefix cache is toggled by the benchmark")
+    ap.add_argument("--repeat", type=int, default=3, help="passes over the question set per mode")
+    ap.add_argument("--json", help="also write the results here")
+    opts = ap.parse_args()
+
+    caches = [("as is", None)] if opts.ollama else [("on", True), ("off", False)]
+    cov, offered, total = coverage()
+    print(f"{len(QUESTIONS)} questions, {opts.repeat} pass(es), model at {opts.ollama or 'fake_ollama.py'}")
+    print(f"selection: {offered:.1f} of {total} tools offered on average, needed tool offered for {cov:.0%} of questions")
+    print(f"{'prefix cache':<13} {'mode':<9} {'prompt tok/call':>15} {'cache hits':>11} {'ttft p50':>9}"
+          f" {'turn p50':>9} {'turn mean':>10} {'widened':>8}")
+    report = {"coverage": cov, "avg_tools_offered": offered, "tools_total": total}
+    for label, cache in caches:
+        results, hits = run_cache_mode(opts, cache)
+        report[f"prefix_cache_{label.replace(' ', '_')}"] = modes = {
+            mode: summarize(rows, hits.get(mode)) for mode, rows in results.items()}
+        for mode, m in modes.items():
+            tok = "-" if m["prompt_tokens_per_call"] is None else f"{m['prompt_tokens_per_call']:.0f}"
+            hit = "-" if m["prefix_hits"] is None else f"{m['prefix_hits']}/{m['calls']}"
+            print(f"{label:<13} {mode:<9} {tok:>15} {hit:>11} {m['ttft_p50_ms']:>6.0f} ms {m['turn_p50_ms']:>6.0f} ms"
+                  f" {m['turn_mean_ms']:>7.0f} ms {m['widened']:>8}")
+        full, sel = modes["full"], modes["selected"]
+        if full["prompt_tokens_per_call"] and sel["prompt_tokens_per_call"]:
+            diff = full["turn_mean_ms"] - sel["turn_mean_ms"]
+            print(f"{'':<13} selection: {1 - sel['prompt_tokens_per_call'] / full['prompt_tokens_per_call']:.0%}"
+                  f" fewer prompt tokens, turns {abs(diff):.0f} ms {'faster' if diff >= 0 else 'slower'} on average")
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Throughput and peak memory of the tools on synthetic inputs, against a stored baseline.
+
+    python benchmarks/bench_tools.py                                 # run, compare to baseline.json
+    python benchmarks/bench_tools.py --save-baseline                 # record a new baseline
+    python benchmarks/bench_tools.py --only list_processes --scales 1k,10k,50k
+    python benchmarks/bench_tools.py --tree-files 50000 --json out.json
+
+Directory trees (wide, deep, many small files, a few huge sparse files) are
+generated in a temp dir; processes and sockets come from a fake psutil at
+each --scales size; netsh / schtasks / PowerShell answer from fixtures (see
+fixtures.py). Each case reports the best and median time over --repeat
+runs, items/s (from the best run) and the tracemalloc peak of one extra run.
+A case regresses when its median items/s drops by more than --tolerance, or
+peak memory grows by more than --mem-tolerance, against the baseline; the
+exit status is then 1. Run-to-run noise on a shared VM is around 40% for the
+short cases, hence the 50% default and the median. Cases whose run
+parameters differ from the baseline's (--tree-files for the tree cases) are
+not compared, and a baseline from another machine only gives ratios to
+look at, never a failure: record one here with --save-baseline before
+changing the code.
+"""
+import argparse, json, os, platform, shutil, statistics, sys, tempfile, time, tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault("LOCALMIND_FILE_INDEX", "0")   # find_files walks live; the index has its own cases
+os.environ.setdefault("LOCALMIND_DEBUG", "0")
+
+import fixtures
+from LocalMind.utils import proc_snapshot
+from LocalMind.utils.arg_normalize import normalize_args
+from LocalMind.utils.file_index import FileIndex
+from LocalMind.tools.file_search import find_files
+from LocalMind.tools.large_files import list_large_files
+from LocalMind.tools.network import network_activity
+from LocalMind.tools.processes import list_processes
+from LocalMind.tools.scheduled_tasks import list_scheduled_tasks
+from LocalMind.tools import system_info
+from LocalMind.tools.wifi import wifi_info
+
+BASELINE = os.path.join(HERE, "baseline.json")
+SCALES = {"1k": 1_000, "10k": 10_000, "50k": 50_000}
+
+
+def measure(fn, setup, repeat: int):
+    """
+    fn(run_no, state) -> items processed, state = setup(run_no) built outside
+    the timed region. Returns (best seconds, median seconds, items, peak bytes).
+    """
+    prep = lambda i: setup(i) if setup else None
+    fn(-1, prep(-1))   # warm-up: imports, lru caches, filesystem cache
+    times, items = [], 0
+    for i in range(repeat):
+        state = prep(i)
+        t0 = time.perf_counter()
+        items = fn(i, state)
+        times.append(time.perf_counter() - t0)
+    state = prep(repeat)
+    tracemalloc.start()
+    fn(repeat, state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), statistics.median(times), items, peak
+
+
+# ---------- cases: name -> (unit, fn(run_no, state) -> items, setup(run_no) -> state) ----------
+
+def tree_cases(root: str, tree_files: int):
+    cases = {}
+    for shape in fixtures.TREE_SHAPES:
+        t = fixtures.make_tree(root, shape, tree_files)
+        n = t["files"]
+
+        def ff(run, _, t=t, n=n):
+            out = find_files(f"{fixtures.NEEDLE}*", roots=[t["root"]], max_results=50, timeout_seconds=600)
+            assert out["ok"] and out["results_count"] >= 1, out.get("error")
+            return n
+
+        def lf(run, _, t=t, n=n):
+            out = list_large_files(top_n=20, roots=[t["root"]], timeout_seconds=600)
+            assert out["ok"] and out["scan"]["complete"], out.get("error")
+            return n
+
+        def lff(run, _, t=t, n=n):
+            out = list_large_files(top_n=20, include_folders=True, roots=[t["root"]], timeout_seconds=600, max_depth=4)
+            assert out["ok"], out.get("error")
+            return n
+
+        def new_index(run, shape=shape, t=t):
+            ix = FileIndex(os.path.join(root, f"index_{shape}_{run + 1}.db"))
+            ix.add_roots([t["root"]])
+            return ix
+
+        def idx(run, ix, t=t, n=n):
+            ix.refresh()
+            assert ix.query(f"{fixtures.NEEDLE}*", True, [t["root"]], 50)
+            return n
+
+        cases[f"find_files/{shape}"] = ("files", ff, None)
+        cases[f"list_large_files/{shape}"] = ("files", lf, None)
+        cases[f"list_large_files+folders/{shape}"] = ("files", lff, None)
+        cases[f"file_index_refresh/{shape}"] = ("files", idx, new_index)
+    return cases
+
+def process_cases(scales):
+    cases = {}
+    for label in scales:
+        n = SCALES[label]
+
+        def fake(run, n=n):
+            # a new epoch per run gives every process a new identity, so exe/user/cmdline start cold
+            return fixtures.FakePsutil(n, epoch=1.7e9 + (run + 2) * 1e6)
+
+        def table(run, ps, n=n):
+            with ps.installed():
+                proc_snapshot.build_process_table()
+            return n
+
+        def lp(run, ps, n=n):
+            with ps.installed():
+                proc_snapshot.get_process_cache().publish(proc_snapshot.build_process_table())
+                rows = list_processes(sort_by="mem", top_n=200)
+            assert len(rows) == min(n, 200)
+            return n
+
+        def net(run, ps, n=n):
+            with ps.installed():
+                proc_snapshot.get_process_cache().publish(proc_snapshot.build_process_table())
+                network_activity(only_established=False, top_n=n)
+            return n
+
+        cases[f"process_table/{label}"] = ("processes", table, fake)
+        cases[f"list_processes/{label}"] = ("processes", lp, fake)
+        cases[f"network_activity/{label}"] = ("connections", net, fake)
+    return cases
+
+def command_cases():
+    wifi, ps, sch = fixtures.FakeCommands(networks=200), fixtures.FakeCommands(tasks=1000), \
+        fixtures.FakeCommands(tasks=1000, powershell_tasks=False)
+
+    def w(run, _):
+        with wifi.installed():
+            out = wifi_info()
+        assert out["ok"] and out["results_count"] == 200, out
+        return 200
+
+    def tasks(cmds, source):
+        def run_(run, _):
+            with cmds.installed():
+                out = list_scheduled_tasks(max_results=1000)
+            assert out["ok"] and out["source"] == source and out["results_count"] > 0, out.get("error")
+            return 1000
+        return run_
+
+    def info(run, _):
+        system_info._cpu_name.cache_clear()
+        system_info._gpu_names.cache_clear()
+        with ps.installed():
+            out = system_info.get_system_info()
+        assert out.get("ok", True), out
+        return 1
+
+    return {"wifi_info/netsh": ("networks", w, None),
+            "list_scheduled_tasks/powershell": ("tasks", tasks(ps, "powershell"), None),
+            "list_scheduled_tasks/schtasks": ("tasks", tasks(sch, "schtasks"), None),
+            "get_system_info/powershell": ("calls", info, None)}
+
+def normalize_cases(root: str):
+    d1, d2 = os.path.join(root, "wide"), os.path.join(root, "deep")
+    shapes = [
+        ("list_large_files", {"roots": json.dumps([d1, d2]), "top_n": "20", "include_folders": "true"}),
+        ("list_large_files", {"roots": repr([d1, d2]), "max_depth": 40, "timeout_seconds": "300"}),
+        ("find_files", {"query": "*.log", "roots": f"{d1}, {d2}"}),
+        ("network_activity", {"only_established": "no", "top_n": "500"}),
+        ("list_scheduled_tasks", {"max_results": "5000"}),
+    ]
+    calls = 2000
+
+    def norm(run, _):
+        for _ in range(calls // len(shapes)):
+            for name, args in shapes:
+                normalize_args(name, args)
+        return calls
+    return {"normalize_args/mixed": ("calls", norm, None)}
+
+
+TREE_CASES = ("find_files/", "list_large_files/", "list_large_files+folders/", "file_index_refresh/")
+
+def _median_rate(r):
+    return r["items"] / r["median_seconds"] if r.get("items") and r.get("median_seconds") else None
+
+def compare(results, baseline, tolerance, mem_tolerance, skip=()):
+    """Mark each result against the baseline; returns the names that regressed (skip: prefixes not compared)."""
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            r["vs_baseline"] = "new"
+            continue
+        if name.startswith(tuple(skip)):
+            r["vs_baseline"] = "not comparable"
+            continue
+        rate, base_rate = _median_rate(r), _median_rate(b)
+        speed = rate / base_rate if rate and base_rate else None
+        mem = r["peak_kb"] / b["peak_kb"] if b.get("peak_kb") else None
+        r["speed_ratio"], r["mem_ratio"] = speed and round(speed, 2), mem and round(mem, 2)
+        bad = []
+        if speed is not None and speed < 1 - tolerance:
+            bad.append(f"{(1 - speed):.0%} slower")
+        if mem is not None and mem > 1 + mem_tolerance and r["peak_kb"] - b["peak_kb"] > 256:
+            bad.append(f"{(mem - 1):.0%} more memory")
+        r["vs_baseline"] = ", ".join(bad) or "ok"
+        if bad:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--only", action="append", help="run cases whose name starts with this (repeatable)")
+    ap.add_argument("--scales", default="1k,10k,50k", help=f"fake process/socket table sizes ({', '.join(SCALES)})")
+    ap.add_argument("--tree-files", type=int, default=20_000, help="files per synthetic tree")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed median slowdown (0.5 = 50%%)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.5, help="allowed peak memory growth")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        ap.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    root = tempfile.mkdtemp(prefix="localmind-bench-")
+    try:
+        want = lambda name: not args.only or any(name.startswith(o) for o in args.only)
+        cases = {}
+        if any(want(k) for k in ("find_files", "list_large_files", "file_index_refresh", "normalize_args")):
+            t0 = time.perf_counter()
+            cases.update(tree_cases(root, args.tree_files))
+            print(f"synthetic trees: {len(fixtures.TREE_SHAPES)} x {args.tree_files} files in "
+                  f"{time.perf_counter() - t0:.1f}s under {root}")
+            cases.update(normalize_cases(root))
+        cases.update(process_cases(scales))
+        cases.update(command_cases())
+
+        results = {}
+        print(f"{'case':36} {'best s':>9} {'median s':>9} {'items/s':>12} {'peak KiB':>10}")
+        for name, (unit, fn, setup) in cases.items():
+            if not want(name):
+                continue
+            best, median, items, peak = measure(fn, setup, args.repeat)
+            results[name] = r = {"unit": unit, "items": items, "seconds": round(best, 4),
+                                 "median_seconds": round(median, 4), "items_per_s": round(items / max(best, 1e-9), 1),
+                                 "peak_kb": round(peak / 1024, 1)}
+            print(f"{name:36} {best:>9.4f} {median:>9.4f} {r['items_per_s']:>12,.0f} {r['peak_kb']:>10,.0f}  {unit}",
+                  flush=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.node(),
+            "tree_files": args.tree_files, "repeat": args.repeat}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        regressions = []
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        bmeta = base.get("meta", {})
+        skip = []
+        if bmeta.get("tree_files") != args.tree_files:
+            skip += TREE_CASES
+            print(f"note: baseline used --tree-files {bmeta.get('tree_files')}; tree cases are not compared")
+        regressions = compare(results, base.get("results", {}), args.tolerance, args.mem_tolerance, skip)
+        if (bmeta.get("machine"), bmeta.get("platform")) != (meta["machine"], meta["platform"]):
+            print(f"note: baseline was recorded on {bmeta.get('machine')} ({bmeta.get('platform')}); "
+                  f"ratios are informational: record one here with --save-baseline")
+            regressions = []
+        print(f"\nvs {os.path.relpath(args.baseline)} (tolerance {args.tolerance:.0%}):")
+        for name, r in results.items():
+            print(f"  {name:36} {r['vs_baseline']:>18}  speed x{r.get('speed_ratio') or '-'}"
+                  f"  memory x{r.get('mem_ratio') or '-'}")
+        print("FAIL: " + ", ".join(regressions) if regressions else "OK")
+    else:
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        regressions = []
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
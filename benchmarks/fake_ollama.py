@@ -0,0 +1,383 @@
+"""
+Stand-in for Ollama's OpenAI-compatible API, for load tests without a model.
+
+    python benchmarks/fake_ollama.py                                  # :11435, default script
+    python benchmarks/fake_ollama.py --port 11435 --port 11436        # two independent backends
+    python benchmarks/fake_ollama.py --prefill-ms 800 --tokens-per-s 25 --parallel 4
+    python benchmarks/fake_ollama.py --script my_script.json --seed 3
+
+Serves POST /v1/chat/completions, streaming (SSE chunks, usage when asked
+via stream_options) and non-streaming. What the "model" says comes from a
+script: the first rule whose regex matches the last user message picks a
+list of rounds, and the round is the number of assistant messages since
+that user message. A round is either {"tool_calls": [{"name", "arguments"}]}
+or {"content": "..."}; past the last round, or when the request offers no
+tools, the rule's last content round is used.
+
+    {"rules": [{"match": "disk|drive", "rounds": [
+        {"tool_calls": [{"name": "disk_usage", "arguments": {}}]},
+        {"content": "Your C: drive is 62% full."}]}]}
+
+Latency: prefill = --prefill-ms + --prefill-ms-per-1k x prompt tokens / 1000,
+then tokens at --tokens-per-s, all scaled by +-jitter. --parallel caps the
+requests being "evaluated" at once (like OLLAMA_NUM_PARALLEL); others queue.
+GET /api/tags, /api/version and /_stats (counters, queue, max in flight)
+are there for health checks and for checking where requests went.
+
+Model residency, for warmup and keep-alive tests: with --load-ms the model
+starts unloaded, the request that finds it unloaded waits --load-ms first,
+and it unloads after keep_alive of idleness (the request's keep_alive on the
+native APIs, --keep-alive-s otherwise). A prompt whose system message and
+tools match the previous request's skips their per-1k prefill (KV cache
+prefix reuse; --no-prefix-cache turns that off, as for chat templates that
+render the tools after the history). The native POST /api/chat (stream=false only), POST
+/api/generate (no prompt: load / pin / unload) and GET /api/ps are served too.
+"""
+import argparse, asyncio, json, random, re, time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+CHARS_PER_TOKEN = 4
+
+DEFAULT_SCRIPT = {"rules": [
+    {"match": r"disk|drive|storage|space", "rounds": [
+        {"tool_calls": [{"name": "disk_usage", "arguments": {}}]},
+        {"content": "Your system drive is about two thirds full; the other volumes have plenty of room."}]},
+    {"match": r"process|memory|ram|cpu|slow", "rounds": [
+        {"tool_calls": [{"name": "list_processes", "arguments": {"sort_by": "mem", "top_n": 10}}]},
+        {"content": "The browser and the editor use the most memory; nothing looks stuck."}]},
+    {"match": r"network|connect|internet|socket", "rounds": [
+        {"tool_calls": [{"name": "network_activity", "arguments": {"only_established": True, "top_n": 20}}]},
+        {"content": "There are a handful of established HTTPS connections, all from known applications."}]},
+    {"match": r"overview|health|status|how is", "rounds": [
+        {"tool_calls": [{"name": "get_system_overview", "arguments": {"top_n": 5}},
+                        {"name": "disk_usage", "arguments": {}}]},
+        {"content": "CPU and memory are fine, and the disks have space left. Nothing needs attention."}]},
+    {"match": r".", "rounds": [
+        {"content": "I can look at disks, processes, network activity, startup items and files. What do you need?"}]},
+]}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class Backend:
+    def __init__(self, port: int, script: Dict[str, Any], opts: argparse.Namespace):
+        self.port, self.opts = port, opts
+        self.rules = [(re.compile(r["match"], re.IGNORECASE), r["rounds"]) for r in script["rules"]]
+        self.rnd = random.Random(f"{opts.seed}:{port}")
+        self.slots = asyncio.Semaphore(opts.parallel) if opts.parallel > 0 else None
+        self.stats = {"port": port, "requests": 0, "streamed": 0, "tool_call_rounds": 0, "answer_rounds": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0, "in_flight": 0, "max_in_flight": 0,
+                      "queued": 0, "errors_injected": 0, "loads": 0, "prefix_hits": 0, "started": time.time()}
+        self.calls = 0
+        self.expires: Optional[float] = None if opts.load_ms else float("inf")   # monotonic; None = not loaded
+        self.busy = 0
+        self.prefix: Optional[str] = None
+        self._loading = asyncio.Lock()
+
+    # ---- what to say ----
+
+    def pick(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        msgs = body.get("messages") or []
+        last_user = max((i for i, m in enumerate(msgs) if m.get("role") == "user"), default=-1)
+        question = (msgs[last_user].get("content") or "") if last_user >= 0 else ""
+        rnd = sum(1 for m in msgs[last_user + 1:] if m.get("role") == "assistant")
+        rounds = next((rs for rx, rs in self.rules if rx.search(question)), [{"content": "OK."}])
+        answer = next((r for r in reversed(rounds) if "content" in r), {"content": "OK."})
+        if rnd >= len(rounds) or ("tool_calls" in rounds[rnd] and not body.get("tools")):
+            return answer
+        return rounds[rnd]
+
+    def message(self, turn: Dict[str, Any]) -> Dict[str, Any]:
+        if "tool_calls" in turn:
+            self.calls += 1
+            return {"role": "assistant", "content": "", "tool_calls": [
+                {"id": f"call_{self.calls}_{i}", "type": "function",
+                 "function": {"name": c["name"], "arguments": json.dumps(c.get("arguments") or {})}}
+                for i, c in enumerate(turn["tool_calls"])]}
+        return {"role": "assistant", "content": turn["content"]}
+
+    # ---- how long it takes ----
+
+    def _jitter(self, seconds: float) -> float:
+        j = self.opts.jitter
+        return max(0.0, seconds * (1 + self.rnd.uniform(-j, j))) if j else seconds
+
+    def prefill_s(self, prompt_tokens: int) -> float:
+        o = self.opts
+        return self._jitter((o.prefill_ms + o.prefill_ms_per_1k * prompt_tokens / 1000) / 1000)
+
+    def token_s(self) -> float:
+        return self._jitter(1 / self.opts.tokens_per_s) if self.opts.tokens_per_s > 0 else 0.0
+
+    # ---- model residency ----
+
+    @property
+    def loaded(self) -> bool:
+        return self.expires is not None and time.monotonic() < self.expires
+
+    async def load(self) -> float:
+        """Seconds spent loading the model for this request (0 when it was loaded)."""
+        async with self._loading:
+            if self.loaded:
+                self.expires = max(self.expires, time.monotonic() + self.opts.keep_alive_s)   # not while in use
+                return 0.0
+            self.stats["loads"] += 1
+            self.prefix = None
+            seconds = self._jitter(self.opts.load_ms / 1000)
+            await asyncio.sleep(seconds)
+            self.expires = time.monotonic() + self.opts.keep_alive_s
+            return seconds
+
+    def touch(self, keep_alive: Any = None) -> None:
+        """A request ended: Ollama keeps the model for that request's keep_alive from now."""
+        ka = self.opts.keep_alive_s if keep_alive is None else _seconds(keep_alive)
+        self.expires = (float("inf") if ka < 0 else time.monotonic() + ka) if self.opts.load_ms else float("inf")
+
+    def uncached_tokens(self, body: Dict[str, Any], prompt_tokens: int) -> int:
+        msgs = body.get("messages") or []
+        head = json.dumps([msgs[0] if msgs and msgs[0].get("role") == "system" else None, body.get("tools")])
+        hit, self.prefix = head == self.prefix and self.opts.prefix_cache, head
+        self.stats["prefix_hits"] += hit
+        return max(0, prompt_tokens - estimate_tokens(head)) if hit else prompt_tokens
+
+    # ---- handlers ----
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["requests"] += 1
+        if self.opts.error_rate and self.rnd.random() < self.opts.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or []) + json.dumps(body.get("tools") or []))
+        message = self.message(self.pick(body))
+        kind = "tool_call_rounds" if "tool_calls" in message else "answer_rounds"
+        self.stats[kind] += 1
+
+        self.stats["queued"] += 1
+        if self.slots:
+            await self.slots.acquire()
+        self.stats["queued"] -= 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        self.busy += 1
+        try:
+            await self.load()
+            await asyncio.sleep(self.prefill_s(self.uncached_tokens(body, prompt_tokens)))
+            if body.get("stream"):
+                return await self._stream(request, body, message, prompt_tokens)
+            pieces = _pieces(message)
+            for _ in pieces:
+                await asyncio.sleep(self.token_s())
+            usage = _usage(prompt_tokens, len(pieces))
+            self._count(usage)
+            return web.json_response({"id": f"chatcmpl-{self.stats['requests']}", "object": "chat.completion",
+                                      "created": int(time.time()), "model": body.get("model"),
+                                      "choices": [{"index": 0, "message": message,
+                                                   "finish_reason": "tool_calls" if "tool_calls" in message else "stop"}],
+                                      "usage": usage})
+        finally:
+            self.busy -= 1
+            self.touch()   # the /v1 API has no keep_alive
+            self.stats["in_flight"] -= 1
+            if self.slots:
+                self.slots.release()
+
+    async def _stream(self, request: web.Request, body: Dict[str, Any], message: Dict[str, Any],
+                      prompt_tokens: int) -> web.StreamResponse:
+        self.stats["streamed"] += 1
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await resp.prepare(request)
+        base = {"id": f"chatcmpl-{self.stats['requests']}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model")}
+
+        async def send(delta: Dict[str, Any], finish: Optional[str] = None, **extra) -> None:
+            chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish}], **extra)
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        pieces = _pieces(message)
+        if "tool_calls" in message:
+            for _ in pieces:   # arguments are "generated" before the call is emitted, as Ollama does
+                await asyncio.sleep(self.token_s())
+            await send({"role": "assistant", "tool_calls": [dict(tc, index=i) for i, tc in enumerate(message["tool_calls"])]})
+            await send({}, "tool_calls")
+        else:
+            for i, piece in enumerate(pieces):
+                await send({"role": "assistant", "content": piece} if i == 0 else {"content": piece})
+                await asyncio.sleep(self.token_s())
+            await send({}, "stop")
+        usage = _usage(prompt_tokens, len(pieces))
+        self._count(usage)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await resp.write(f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n".encode())
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    def _count(self, usage: Dict[str, int]) -> None:
+        self.stats["prompt_tokens"] += usage["prompt_tokens"]
+        self.stats["completion_tokens"] += usage["completion_tokens"]
+
+    async def native_chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("stream", True):
+            return web.json_response({"error": "fake_ollama serves /api/chat with stream=false only"}, status=400)
+        self.stats["requests"] += 1
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or []) + json.dumps(body.get("tools") or []))
+        message = self.message(self.pick(body))
+        if "tool_calls" in message:   # native shape: arguments as an object
+            message["tool_calls"] = [{"function": {"name": tc["function"]["name"],
+                                                   "arguments": json.loads(tc["function"]["arguments"])}}
+                                     for tc in message["tool_calls"]]
+        limit = (body.get("options") or {}).get("num_predict")
+        pieces = _pieces({"content": message.get("content") or "x"})[:limit if limit and limit > 0 else None]
+        if limit and limit > 0 and "content" in message:
+            message["content"] = "".join(pieces)
+        if self.slots:
+            await self.slots.acquire()
+        self.busy += 1
+        try:
+            t0 = time.perf_counter()
+            load_s = await self.load()
+            uncached = self.uncached_tokens(body, prompt_tokens)
+            prefill = self.prefill_s(uncached)
+            await asyncio.sleep(prefill)
+            gen = 0.0
+            for _ in pieces:
+                gen += self.token_s()
+            await asyncio.sleep(gen)
+        finally:
+            self.busy -= 1
+            self.touch(body.get("keep_alive"))
+            if self.slots:
+                self.slots.release()
+        self._count(_usage(prompt_tokens, len(pieces)))
+        ns = lambda s: int(s * 1e9)
+        return web.json_response({"model": body.get("model"), "created_at": _now_iso(), "message": message,
+                                  "done": True, "done_reason": "stop",
+                                  "total_duration": ns(time.perf_counter() - t0), "load_duration": ns(load_s),
+                                  "prompt_eval_count": uncached, "prompt_eval_duration": ns(prefill),
+                                  "eval_count": len(pieces), "eval_duration": ns(gen)})
+
+    async def generate(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("prompt"):
+            return web.json_response({"error": "fake_ollama serves /api/generate without a prompt only"}, status=400)
+        if body.get("keep_alive") is not None and _seconds(body["keep_alive"]) == 0:
+            self.expires = None if self.opts.load_ms else float("inf")
+            reason = "unload"
+        else:
+            self.busy += 1
+            try:
+                await self.load()
+            finally:
+                self.busy -= 1
+            self.touch(body.get("keep_alive"))
+            reason = "load"
+        return web.json_response({"model": body.get("model"), "created_at": _now_iso(), "response": "",
+                                  "done": True, "done_reason": reason})
+
+    async def ps(self, request: web.Request) -> web.Response:
+        if not self.loaded and not self.busy:
+            return web.json_response({"models": []})
+        exp = self.expires if self.busy == 0 else time.monotonic() + self.opts.keep_alive_s
+        until = "forever" if exp == float("inf") else time.strftime(
+            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + exp - time.monotonic()))
+        return web.json_response({"models": [{"name": self.opts.model, "model": self.opts.model, "expires_at": until}]})
+
+    async def tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": self.opts.model, "model": self.opts.model}]})
+
+    async def version(self, request: web.Request) -> web.Response:
+        return web.json_response({"version": "0.0.0-fake"})
+
+    async def stats_view(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats, uptime_s=round(time.time() - self.stats["started"], 1)))
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.add_routes([web.post("/v1/chat/completions", self.chat), web.post("/api/chat", self.native_chat),
+                        web.post("/api/generate", self.generate), web.get("/api/ps", self.ps),
+                        web.get("/api/tags", self.tags), web.get("/api/version", self.version),
+                        web.get("/_stats", self.stats_view)])
+        return app
+
+
+def _pieces(message: Dict[str, Any]) -> List[str]:
+    """The "tokens" a message is generated as: words of the text, or chunks of the call arguments."""
+    if "tool_calls" in message:
+        text = "".join(tc["function"]["name"] + tc["function"]["arguments"] for tc in message["tool_calls"])
+        return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)] or [""]
+    return re.findall(r"\S+\s*", message["content"]) or [""]
+
+def _seconds(keep_alive: Any) -> float:
+    """Ollama keep_alive ("5m", "1h30m", 300, "-1") in seconds; negative means forever."""
+    text = str(keep_alive).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    total = sum(float(n) * units[u] for n, u in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", text))
+    return -total if text.startswith("-") else total
+
+def _now_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+async def serve(ports: List[int], script: Dict[str, Any], opts: argparse.Namespace) -> None:
+    runners = []
+    for port in ports:
+        runner = web.AppRunner(Backend(port, script, opts).app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, opts.host, port).start()
+        runners.append(runner)
+    print(f"fake ollama on {', '.join(f'http://{opts.host}:{p}' for p in ports)} "
+          f"(prefill {opts.prefill_ms:g} ms + {opts.prefill_ms_per_1k:g} ms/1k tokens, "
+          f"{opts.tokens_per_s:g} tok/s, parallel {opts.parallel or 'unlimited'})", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for r in runners:
+            await r.cleanup()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, action="append", help="repeat for several independent backends (default 11435)")
+    ap.add_argument("--script", help="JSON file with {\"rules\": [...]} (default: built-in LocalMind script)")
+    ap.add_argument("--model", default="llama3.1:8b-instruct-q8_0")
+    ap.add_argument("--prefill-ms", type=float, default=300.0, help="fixed time to first token")
+    ap.add_argument("--prefill-ms-per-1k", type=float, default=0.0, help="extra prefill per 1000 prompt tokens")
+    ap.add_argument("--tokens-per-s", type=float, default=30.0, help="generation rate (0 = instant)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="relative +- noise on every delay, e.g. 0.2")
+    ap.add_argument("--parallel", type=int, default=0, help="requests evaluated at once (0 = unlimited)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    ap.add_argument("--load-ms", type=float, default=0.0, help="model load time; 0 = always loaded")
+    ap.add_argument("--no-prefix-cache", dest="prefix_cache", action="store_false",
+                    help="prefill the system prompt and tools on every request")
+    ap.add_argument("--keep-alive-s", type=float, default=300.0,
+                    help="idle seconds before unloading when a request sends no keep_alive (OLLAMA_KEEP_ALIVE)")
+    ap.add_argument("--seed", type=int, default=7)
+    opts = ap.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if opts.script:
+        with open(opts.script, encoding="utf-8") as f:
+            script = json.load(f)
+    try:
+        asyncio.run(serve(opts.port or [11435], script, opts))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Synthetic inputs for the benchmarks: directory trees on disk, a fake psutil
+process/connection table, and canned netsh / schtasks / PowerShell output.
+Everything is seeded, so two runs on the same machine see the same data.
+"""
+import contextlib, csv, io, json, os, random, subprocess
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional
+
+import psutil
+
+# ---------- directory trees ----------
+
+TREE_SHAPES = ("wide", "deep", "small_files", "sparse_huge")
+DEEP_LEVELS = 64
+NEEDLE = "needle_"   # a handful of files per tree carry this prefix, for find_files
+
+
+def _write(path: str, size: int) -> None:
+    with open(path, "wb") as f:
+        if size:
+            f.write(b"x" * size)
+
+def make_tree(root: str, shape: str, files: int, seed: int = 7) -> Dict[str, Any]:
+    """
+    Build one tree under root; returns {"root", "dirs", "files", "bytes"}.
+      wide         one directory holding every file
+      deep         a single chain of DEEP_LEVELS directories, files spread over the levels
+      small_files  ~100 tiny files per directory across a two-level fan-out
+      sparse_huge  a few multi-GB sparse files next to a small mixed tree
+    """
+    rnd = random.Random(f"{seed}:{shape}:{files}")
+    base = os.path.join(root, shape)
+    os.makedirs(base, exist_ok=True)
+    dirs, nfiles, nbytes = 1, 0, 0
+    needles = {rnd.randrange(files) for _ in range(5)} if files else set()
+
+    def add(d: str, i: int, size: int) -> None:
+        nonlocal nfiles, nbytes
+        name = f"{NEEDLE}{i}.log" if i in needles else f"file_{i:06d}.{rnd.choice(('txt', 'dat', 'log', 'jpg'))}"
+        _write(os.path.join(d, name), size)
+        nfiles += 1
+        nbytes += size
+
+    if shape == "wide":
+        for i in range(files):
+            add(base, i, rnd.randint(0, 4096))
+    elif shape == "deep":
+        # one-letter names keep the deepest path well under Windows' MAX_PATH
+        per_level = max(1, -(-files // DEEP_LEVELS))
+        d = base
+        for i in range(files):
+            if i % per_level == 0 and i:
+                d = os.path.join(d, "d")
+                os.mkdir(d)
+                dirs += 1
+            add(d, i, rnd.randint(0, 4096))
+    elif shape == "small_files":
+        per_dir, fan = 100, 32
+        for i in range(files):
+            k = i // per_dir
+            d = os.path.join(base, f"a{k % fan:02d}", f"b{k:05d}")
+            if i % per_dir == 0:
+                os.makedirs(d, exist_ok=True)
+                dirs += 1 + (k < fan)
+            add(d, i, rnd.randint(0, 256))
+    elif shape == "sparse_huge":
+        for i, gib in enumerate((4, 2, 1)):
+            path = os.path.join(base, f"huge_{i}.vhdx")
+            try:
+                with open(path, "wb") as f:
+                    f.truncate(gib << 30)   # sparse where the filesystem allows it
+                nfiles += 1
+                nbytes += gib << 30
+            except OSError:
+                break   # no room for a non-sparse file; the small part still runs
+        sub = os.path.join(base, "mixed")
+        os.mkdir(sub)
+        dirs += 1
+        for i in range(max(0, files - nfiles)):
+            add(sub, i, rnd.randint(0, 1 << 16))
+    else:
+        raise ValueError(f"unknown tree shape: {shape}")
+    return {"root": base, "dirs": dirs, "files": nfiles, "bytes": nbytes}
+
+
+# ---------- fake psutil ----------
+
+pmem = namedtuple("pmem", "rss vms")
+addr = namedtuple("addr", "ip port")
+sconn = namedtuple("sconn", "fd family type laddr raddr status pid")
+
+NAMES = ["chrome.exe", "svchost.exe", "Code.exe", "explorer.exe", "OneDrive.exe", "Teams.exe",
+         "RuntimeBroker.exe", "MsMpEng.exe", "ollama.exe", "python.exe", "dwm.exe", "SearchHost.exe"]
+STATUSES = ["ESTABLISHED"] * 3 + ["LISTEN", "TIME_WAIT", "CLOSE_WAIT"]
+
+
+class FakeProcess:
+    def __init__(self, pid: int, ppid: int, name: str, rss: int, cpu: float, create_time: float, user: str):
+        self.pid = pid
+        self.info: Dict[str, Any] = {}
+        self._ppid, self._name, self._rss, self._cpu = ppid, name, rss, cpu
+        self._create_time, self._user = create_time, user
+
+    def _fields(self) -> Dict[str, Any]:
+        return {"pid": self.pid, "ppid": self._ppid, "name": self._name,
+                "memory_info": pmem(self._rss, self._rss * 2), "create_time": self._create_time}
+
+    def cpu_percent(self, interval: Optional[float] = None) -> float:
+        return self._cpu
+
+    def name(self) -> str:
+        return self._name
+
+    def exe(self) -> str:
+        return f"C:\\Program Files\\Vendor{self.pid % 97}\\{self._name}"
+
+    def username(self) -> str:
+        return self._user
+
+    def cmdline(self) -> List[str]:
+        return [self.exe(), "--type=renderer", f"--id={self.pid}", "--lang=en-US"]
+
+    def memory_info(self) -> pmem:
+        return pmem(self._rss, self._rss * 2)
+
+
+class FakePsutil:
+    """
+    A process and connection table of any size, installed over the real psutil
+    functions the tools call (process_iter, Process, net_connections).
+    """
+
+    def __init__(self, procs: int, conns: Optional[int] = None, seed: int = 7, epoch: float = 1.7e9):
+        rnd = random.Random(f"{seed}:{procs}")
+        self.procs = [FakeProcess(4 + 4 * i, 4 * rnd.randrange(max(1, i)), rnd.choice(NAMES),
+                                  rnd.randint(1, 2000) << 20, round(rnd.random() * 8, 1),
+                                  epoch + i, "DESKTOP-1\\alex" if i % 3 else "NT AUTHORITY\\SYSTEM")
+                      for i in range(procs)]
+        self.by_pid = {p.pid: p for p in self.procs}
+        conns = procs if conns is None else conns
+        # ~5% of sockets belong to pids newer than the table (the psutil.Process fallback path)
+        self.conns = [sconn(-1, 2, 1, addr("192.168.1.23", 49152 + i % 16000),
+                            addr(f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.0.{rnd.randint(1, 254)}", 443),
+                            rnd.choice(STATUSES),
+                            rnd.choice(self.procs).pid if self.procs and rnd.random() > 0.05 else 10 ** 6 + i)
+                      for i in range(conns)]
+
+    def process_iter(self, attrs=None, ad_value=None) -> Iterator[FakeProcess]:
+        for p in self.procs:
+            f = p._fields()
+            p.info = {a: f.get(a, ad_value) for a in attrs} if attrs else f
+            yield p
+
+    def Process(self, pid: int) -> FakeProcess:
+        try:
+            return self.by_pid[pid]
+        except KeyError:
+            raise psutil.NoSuchProcess(pid)
+
+    def net_connections(self, kind: str = "inet") -> List[sconn]:
+        return list(self.conns)
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["FakePsutil"]:
+        saved = {k: getattr(psutil, k) for k in ("process_iter", "Process", "net_connections")}
+        psutil.process_iter, psutil.Process, psutil.net_connections = self.process_iter, self.Process, self.net_connections
+        try:
+            yield self
+        finally:
+            for k, v in saved.items():
+                setattr(psutil, k, v)
+
+
+# ---------- netsh / schtasks / PowerShell output ----------
+
+def netsh_networks(n: int, seed: int = 7) -> str:
+    rnd = random.Random(f"{seed}:netsh:{n}")
+    out = ["", "Interface name : Wi-Fi", f"There are {n} networks currently visible.", ""]
+    for i in range(n):
+        out += [f"SSID {i + 1} : Network-{i:04d}", "    Network type            : Infrastructure",
+                f"    Authentication          : {rnd.choice(['WPA2-Personal', 'WPA3-Personal', 'Open'])}",
+                "    Encryption              : CCMP"]
+        for b in range(rnd.randint(1, 3)):
+            out += [f"    BSSID {b + 1}                 : {':'.join(f'{rnd.randrange(256):02x}' for _ in range(6))}",
+                    f"         Signal             : {rnd.randint(5, 99)}%",
+                    "         Radio type         : 802.11ax",
+                    f"         Channel            : {rnd.choice([1, 6, 11, 36, 44, 149])}", ""]
+    return "\r\n".join(out)
+
+def _tasks(n: int, seed: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(f"{seed}:tasks:{n}")
+    return [{"TaskName": f"Task{i:05d}", "TaskPath": f"\\Microsoft\\Windows\\Group{i % 40}\\",
+             "State": rnd.choice(["Ready", "Disabled", "Running"]), "Enabled": rnd.random() > 0.2,
+             "Author": "Microsoft Corporation", "Description": "Performs periodic maintenance of the system.",
+             "LastRunTime": "2025-10-01T03:00:00", "NextRunTime": "2025-10-02T03:00:00",
+             "LastTaskResult": rnd.choice([0, 0, 0, 267011, 2147942402]),
+             "Triggers": ["MSFT_TaskDailyTrigger"], "Actions": ["%windir%\\system32\\rundll32.exe"]}
+            for i in range(n)]
+
+def powershell_tasks_json(n: int, seed: int = 7) -> str:
+    return json.dumps(_tasks(n, seed), indent=4)   # ConvertTo-Json output is indented
+
+def schtasks_csv(n: int, seed: int = 7) -> str:
+    buf = io.StringIO()
+    w = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+    w.writerow(["HostName", "TaskName", "Next Run Time", "Status", "Logon Mode", "Last Run Time",
+                "Last Result", "Author", "Task To Run", "Enabled"])
+    for t in _tasks(n, seed):
+        w.writerow(["DESKTOP-1", t["TaskPath"] + t["TaskName"], "10/2/2025 3:00:00 AM", t["State"],
+                    "Interactive/Background", "10/1/2025 3:00:00 AM", t["LastTaskResult"], t["Author"],
+                    t["Actions"][0], "Yes" if t["Enabled"] else "No"])
+    return "\ufeff" + buf.getvalue()
+
+CPU_NAME = "AMD Ryzen 7 7840U w/ Radeon 780M Graphics"
+GPU_NAMES = "AMD Radeon 780M Graphics\r\nMicrosoft Basic Display Adapter"
+
+
+class FakeCommands:
+    """
+    subprocess.run stand-in answering netsh, schtasks and PowerShell with the
+    fixtures above. powershell_tasks=False makes Get-ScheduledTask fail, so
+    list_scheduled_tasks takes its schtasks CSV fallback.
+    """
+
+    def __init__(self, networks: int = 40, tasks: int = 300, powershell_tasks: bool = True):
+        self.outputs = {"netsh": netsh_networks(networks), "schtasks": schtasks_csv(tasks),
+                        "Get-ScheduledTask": powershell_tasks_json(tasks),
+                        "Win32_Processor": CPU_NAME, "Win32_VideoController": GPU_NAMES}
+        self.powershell_tasks = powershell_tasks
+
+    def run(self, args, **kwargs) -> subprocess.CompletedProcess:
+        prog = os.path.basename(args[0]).lower()
+        if prog == "powershell":
+            script = args[-1]
+            for key in ("Get-ScheduledTask", "Win32_Processor", "Win32_VideoController"):
+                if key in script:
+                    if key == "Get-ScheduledTask" and not self.powershell_tasks:
+                        break
+                    return subprocess.CompletedProcess(args, 0, self.outputs[key], "")
+            return subprocess.CompletedProcess(args, 1, "", "powershell: not available in this fixture")
+        if prog in self.outputs:
+            return subprocess.CompletedProcess(args, 0, self.outputs[prog], "")
+        raise FileNotFoundError(args[0])
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["FakeCommands"]:
+        saved = subprocess.run
+        subprocess.run = self.run
+        try:
+            yield self
+        finally:
+            subprocess.run = saved
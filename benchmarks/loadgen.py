@@ -0,0 +1,237 @@
+"""
+Load generator for server.py: N concurrent sessions posting chat turns.
+
+    python benchmarks/loadgen.py --spawn --sessions 16 --duration 30            # fake model + server, then load
+    python benchmarks/loadgen.py --spawn --fake-args "--prefill-ms 800 --parallel 4" --stream
+    python benchmarks/loadgen.py --spawn --backends 3 --fake-args "--parallel 2"   # server load-balancing 3 fakes
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000 --sessions 8 --requests 200 --json out.json
+
+Each session opens with its first question (which creates a server-side
+session) and sends --turns follow-ups on it with session_id, then starts a
+new session; sessions run back to back until --duration seconds or
+--requests turns in total. With --stream the turns go to /chat/stream and
+time to first token (first token or tool_start event) is reported too.
+
+--spawn starts benchmarks/fake_ollama.py and `uvicorn server:app` on free
+local ports (server env: OLLAMA_URLS pointing at the fake's --backends
+ports, plus anything in --server-env), so a run needs no model and no
+running server; where the model calls went is reported per backend. Reports
+p50/p95/p99/max turn latency, turns/s, and errors by kind (HTTP status,
+"error" SSE event, connection failure); the exit status is 1 if any turn
+failed.
+"""
+import argparse, asyncio, json, os, shlex, socket, subprocess, sys, time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+QUESTIONS = ["How full are my disks?", "What is using the most memory?", "Which programs are on the network?",
+             "Give me an overview of the system health.", "What can you do?"]
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * p // 100) - 1))
+    return sorted_values[int(k)]
+
+
+class Load:
+    def __init__(self, opts: argparse.Namespace):
+        self.opts = opts
+        self.latencies: List[float] = []
+        self.ttft: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.stopped: Dict[str, int] = {}
+        self.started = 0
+        self.end_at = 0.0
+
+    def _more(self) -> bool:
+        if self.opts.requests:
+            if self.started >= self.opts.requests:
+                return False
+        elif time.monotonic() >= self.end_at:
+            return False
+        self.started += 1
+        return True
+
+    def _error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def _turn(self, http: aiohttp.ClientSession, body: Dict[str, Any]) -> Optional[str]:
+        """One chat turn; records latency and returns the session id, or None on failure."""
+        url = self.opts.url.rstrip("/") + ("/chat/stream" if self.opts.stream else "/chat")
+        t0 = time.perf_counter()
+        try:
+            async with http.post(url, json=body) as r:
+                if r.status != 200:
+                    await r.read()
+                    self._error(f"http_{r.status}")
+                    return None
+                if not self.opts.stream:
+                    data = await r.json()
+                else:
+                    data, first, event = None, None, ""
+                    async for raw in r.content:
+                        line = raw.decode("utf-8").rstrip("\r\n")
+                        if line.startswith("event: "):
+                            event = line[7:]
+                            if first is None and event in ("token", "tool_start"):
+                                first = time.perf_counter() - t0
+                        elif line.startswith("data: ") and event in ("done", "error"):
+                            data = json.loads(line[6:])
+                            if event == "error":
+                                self._error("sse_error")
+                                return None
+                    if data is None:
+                        self._error("stream_incomplete")
+                        return None
+                    if first is not None:
+                        self.ttft.append(first)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._error(e.__class__.__name__)
+            return None
+        self.latencies.append(time.perf_counter() - t0)
+        stopped = data.get("stopped", "answer")
+        self.stopped[stopped] = self.stopped.get(stopped, 0) + 1
+        return data.get("session_id")
+
+    async def _worker(self, http: aiohttp.ClientSession, n: int) -> None:
+        i = n
+        while self._more():
+            q = QUESTIONS[i % len(QUESTIONS)]
+            sid = await self._turn(http, {"message": q})
+            for t in range(self.opts.turns):
+                if sid is None or not self._more():
+                    break
+                sid = await self._turn(http, {"session_id": sid, "message": QUESTIONS[(i + t + 1) % len(QUESTIONS)]})
+            i += self.opts.sessions
+
+    async def run(self) -> Dict[str, Any]:
+        timeout = aiohttp.ClientTimeout(total=self.opts.timeout)
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0), timeout=timeout) as http:
+            t0 = time.perf_counter()
+            self.end_at = time.monotonic() + self.opts.duration
+            await asyncio.gather(*[self._worker(http, n) for n in range(self.opts.sessions)])
+            elapsed = time.perf_counter() - t0
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        lat, ttft = sorted(self.latencies), sorted(self.ttft)
+        ms = lambda v: None if v is None else round(v * 1000, 1)
+        out = {"sessions": self.opts.sessions, "stream": self.opts.stream, "elapsed_s": round(elapsed, 2),
+               "turns_ok": len(lat), "turns_failed": sum(self.errors.values()), "errors": self.errors,
+               "stopped": self.stopped, "turns_per_s": round(len(lat) / elapsed, 2) if elapsed else None,
+               "latency_ms": {f"p{p}": ms(percentile(lat, p)) for p in (50, 95, 99)}}
+        out["latency_ms"]["max"] = ms(lat[-1] if lat else None)
+        if self.opts.stream:
+            out["ttft_ms"] = {f"p{p}": ms(percentile(ttft, p)) for p in (50, 95, 99)}
+        return out
+
+
+# ---------- --spawn ----------
+
+def free_port() -> int:
+    """A TCP port on 127.0.0.1 that nothing listens on (also used by the other benchmarks)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_http(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    """Wait until url answers, failing early if proc (the process serving it) exits."""
+    import urllib.request
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if proc.poll() is not None:
+            raise SystemExit(f"{' '.join(proc.args)} exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout:g}s")
+
+def spawn(opts: argparse.Namespace) -> List[subprocess.Popen]:
+    fake_ports, server_port = [free_port() for _ in range(max(1, opts.backends))], free_port()
+    fake_urls = [f"http://127.0.0.1:{p}" for p in fake_ports]
+    fake = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_ollama.py"),
+                             *(a for p in fake_ports for a in ("--port", str(p))),
+                             *shlex.split(opts.fake_args)], stdout=subprocess.DEVNULL)
+    procs = [fake]
+    try:
+        for url in fake_urls:
+            wait_http(url + "/api/version", fake)
+        env = dict(os.environ, OLLAMA_URL=fake_urls[0], OLLAMA_URLS=",".join(fake_urls), LOCALMIND_DEBUG="0")
+        env.update(kv.split("=", 1) for kv in opts.server_env)
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(server_port),
+                                   "--log-level", "warning"], cwd=ROOT, env=env)
+        procs.append(server)
+        wait_http(f"http://127.0.0.1:{server_port}/metrics", server)
+    except BaseException:
+        stop(procs)
+        raise
+    opts.url = f"http://127.0.0.1:{server_port}"
+    opts.fake_urls = fake_urls
+    return procs
+
+def stop(procs: List[subprocess.Popen]) -> None:
+    for p in reversed(procs):
+        p.terminate()
+        try:
+            p.wait(10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8000", help="server to load (ignored with --spawn)")
+    ap.add_argument("--sessions", type=int, default=8, help="concurrent sessions")
+    ap.add_argument("--turns", type=int, default=2, help="follow-up turns per session after the first")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds to run (unless --requests)")
+    ap.add_argument("--requests", type=int, default=0, help="stop after this many turns in total")
+    ap.add_argument("--stream", action="store_true", help="use /chat/stream and report time to first token")
+    ap.add_argument("--timeout", type=float, default=300.0, help="per-turn client timeout")
+    ap.add_argument("--spawn", action="store_true", help="start fake_ollama.py and the server locally")
+    ap.add_argument("--backends", type=int, default=1, help="fake model servers the spawned server balances over")
+    ap.add_argument("--fake-args", default="", help="extra fake_ollama.py arguments, e.g. \"--prefill-ms 800\"")
+    ap.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                    help="extra server environment with --spawn, e.g. LOCALMIND_MAX_CONCURRENT=4")
+    ap.add_argument("--json", help="also write the report here")
+    opts = ap.parse_args()
+
+    procs = spawn(opts) if opts.spawn else []
+    try:
+        report = asyncio.run(Load(opts).run())
+        if opts.spawn:
+            import urllib.request
+            report["model_servers"] = []
+            for url in opts.fake_urls:
+                with urllib.request.urlopen(url + "/_stats") as r:
+                    report["model_servers"].append(json.load(r))
+    finally:
+        stop(procs)
+
+    lat = report["latency_ms"]
+    print(f"{report['sessions']} sessions, {report['elapsed_s']}s: {report['turns_ok']} turns ok, "
+          f"{report['turns_failed']} failed, {report['turns_per_s']} turns/s")
+    print(f"latency ms  p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    if opts.stream:
+        t = report["ttft_ms"]
+        print(f"first token ms  p50 {t['p50']}  p95 {t['p95']}  p99 {t['p99']}")
+    if report["errors"]:
+        print("errors: " + ", ".join(f"{k}={v}" for k, v in sorted(report["errors"].items())))
+    for m in report.get("model_servers", []):
+        print(f"model server :{m['port']}: {m['requests']} requests, max {m['max_in_flight']} in flight")
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report["turns_failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
 import json
 import os
 
 # ---- import your existing logic ----
 # Adjust these if your package name casing differs
-from LocalMind.llm.ollama_client import Ollama
-from LocalMind.mcp_server import dispatch_tool_call
-from LocalMind.cli import SYSTEM_PROMPT, TOOL_SPEC  # reuse your prompt/spec
+from LocalMind import metrics
+from LocalMind.llm import async_client, lifecycle
+from LocalMind.llm.pool import get_pool
+from LocalMind.agent import Agent   # the tool loop shared with the CLI
+from LocalMind.tool_spec import SYSTEM_PROMPT
+from LocalMind.sessions import Session, SessionStore, UnknownSession
+from LocalMind.utils.telemetry import get_sampler
 
 app = FastAPI(title="LocalMind API")
 
@@ -22,94 +28,163 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# At most MAX_CONCURRENT chats run at once; others wait up to QUEUE_TIMEOUT seconds, then get 503
+MAX_CONCURRENT = int(os.getenv("LOCALMIND_MAX_CONCURRENT", "64"))
+QUEUE_TIMEOUT = float(os.getenv("LOCALMIND_QUEUE_TIMEOUT", "30"))
+_chat_slots = asyncio.Semaphore(MAX_CONCURRENT)
+
+@app.on_event("startup")
+def start_telemetry():
+    # warm the CPU sampler so the first overview/process call has real deltas
+    get_sampler()
+
+@app.on_event("startup")
+async def warm_model():
+    # load the model and prefill the system prompt + tools in the background, then keep it loaded
+    pool = get_pool()
+    if lifecycle.WARMUP:
+        for b in pool.backends:
+            lifecycle.get_lifecycle(b.url).start()
+    if len(pool.backends) > 1:
+        pool.start()   # health checks; with one backend there is nowhere else to send requests
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    for b in get_pool().backends:
+        await lifecycle.get_lifecycle(b.url).stop()
+    await async_client.aclose()
+
+async def _acquire_slot() -> None:
+    try:
+        with metrics.CHATS_QUEUED.track():
+            await asyncio.wait_for(_chat_slots.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.CHATS_REJECTED.inc()
+        raise HTTPException(status_code=503, detail="LocalMind is busy, try again shortly")
+    metrics.CHATS_IN_FLIGHT.inc()
+
+def _release_slot() -> None:
+    metrics.CHATS_IN_FLIGHT.dec()
+    _chat_slots.release()
+
+sessions = SessionStore(SYSTEM_PROMPT)
+
+def _collect_sessions():
+    st = sessions.stats()
+    return [("localmind_sessions_in_memory", "gauge", "Conversations held in memory.", [({}, st["in_memory"])]),
+            ("localmind_chat_slots", "gauge", "Configured concurrent chat limit.", [({}, MAX_CONCURRENT)])]
+
+metrics.register_collector(_collect_sessions)
+
 class ChatRequest(BaseModel):
-    messages: List[Dict[str, Any]]
+    # Either continue a session with only the new user turn ...
+    session_id: Optional[str] = None
+    message: Optional[str] = None
+    # ... or send a whole transcript, which starts (or re-seeds session_id) a session
+    messages: Optional[List[Dict[str, Any]]] = None
+    use_cache: bool = True   # False re-runs every tool instead of serving memoized results
 
 class ChatResponse(BaseModel):
-    messages: List[Dict[str, Any]]
+    session_id: str
+    messages: List[Dict[str, Any]]   # full transcript when the request sent messages, else this turn's
     answer_markdown: str
+    stopped: str = "answer"          # answer | max_rounds | deadline
+    timing: Dict[str, Any] = {}      # per-phase breakdown, see LocalMind/agent.py
+
+def _open_session(req: ChatRequest) -> Session:
+    if req.messages is not None:
+        return sessions.create(req.messages, sid=req.session_id)
+    if not req.message:
+        raise HTTPException(status_code=422, detail="send message (optionally with session_id) or messages")
+    if req.session_id:
+        try:
+            return sessions.get(req.session_id)
+        except UnknownSession:
+            raise HTTPException(status_code=409, detail="unknown session_id; resend the transcript as messages")
+    return sessions.create()
 
-def _extract_tool_invocations(resp_json: Dict[str, Any]):
+def _turn_result(s: Session, start: int, req: ChatRequest, done: Dict[str, Any]) -> Dict[str, Any]:
+    final_text = (s.messages[-1].get("content") or "").strip()
+    messages = s.messages if req.messages is not None else s.messages[start:]
+    return {"session_id": s.id, "messages": messages, "answer_markdown": final_text,
+            "stopped": done.get("stopped", "answer"), "timing": done.get("timing", {})}
+
+def _agent_turn(s: Session, req: ChatRequest) -> AsyncIterator[Dict[str, Any]]:
+    """One user turn on a session; the agent's messages go through the store."""
+    return Agent(use_cache=req.use_cache).run(s.messages, append=lambda m: sessions.append(s, m))
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    s = _open_session(req)
+    async with s.lock:
+        await _acquire_slot()
+        start = len(s.messages)
+        try:
+            if req.message:
+                sessions.append(s, {"role": "user", "content": req.message})
+            done: Dict[str, Any] = {}
+            async for ev in _agent_turn(s, req):
+                done = ev
+            sessions.save(s)
+        except BaseException:
+            sessions.rollback(s, start)
+            raise
+        finally:
+            _release_slot()
+        return ChatResponse(**_turn_result(s, start, req, done))
+
+@app.get("/sessions/{session_id}")
+def get_session(session_id: str):
+    try:
+        s = sessions.get(session_id)
+    except UnknownSession:
+        raise HTTPException(status_code=404, detail="unknown session_id")
+    return {"session_id": s.id, "messages": s.view()}
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    return {"deleted": sessions.delete(session_id)}
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_localmind_chat(s: Session, req: ChatRequest) -> AsyncIterator[str]:
     """
-    Return a list of {"id": str, "name": str, "arguments": str} from different response shapes.
+    Same turn as /chat, emitted as Server-Sent Events:
+    token (assistant text as generated), tool_start, tool_result, done, error.
     """
-    invocations = []
-    msg = (resp_json.get("choices", [{}])[0]
-                  .get("message", {}))
-
-    # 1) OpenAI multi-tool format
-    tc = msg.get("tool_calls") or []
-    for i, t in enumerate(tc):
-        fn = t.get("function", {})
-        invocations.append({
-            "id": t.get("id", f"tool_{i}"),
-            "name": fn.get("name"),
-            "arguments": fn.get("arguments") or "{}",
-        })
-    if invocations:
-        return invocations
-
-    # 2) Older single function_call format
-    fc = msg.get("function_call")
-    if fc and isinstance(fc, dict) and fc.get("name"):
-        invocations.append({
-            "id": "func_0",
-            "name": fc["name"],
-            "arguments": fc.get("arguments") or "{}",
-        })
-        return invocations
-
-    # 3) Plain-text fallback: look for {"name": "...", "parameters": {...}} in content
-    content = msg.get("content") or ""
-    if "{" in content and "}" in content and '''"name"''' in content:
-        import re, json
-        # very small, safe JSON sniffer (first balanced object-ish)
-        match = re.search(r'(\{.*"name"\s*:\s*".*?".*\})', content, re.DOTALL)
-        if match:
-            blob = match.group(1)
-            try:
-                obj = json.loads(blob)
-                name = obj.get("name")
-                args = obj.get("parameters") or obj.get("arguments") or {}
-                invocations.append({
-                    "id": "text_0",
-                    "name": name,
-                    "arguments": json.dumps(args),
-                })
-            except Exception:
-                pass
-    return invocations
-
-def run_localmind_chat(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
-    client = Ollama()
-    messages.insert(0, {"role": "system", "content": SYSTEM_PROMPT})
-
-    # First assistant turn
-    resp = client.chat_with_tools(messages, tools=TOOL_SPEC)
-    msg = (resp.get("choices", [{}])[0] or {}).get("message", {})
-    messages.append(msg)
-
-    # Tool loop
-    while True:
-        calls = _extract_tool_invocations(resp)
-        if not calls:
-            break
-        for tc in calls:
-            out = dispatch_tool_call(tc["name"], tc.get("arguments") or "{}")
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tc["id"],
-                "name": tc["name"],
-                "content": json.dumps(out)[:120000],
-            })
-        resp = client.chat_with_tools(messages, tools=TOOL_SPEC)
-        msg = (resp.get("choices", [{}])[0] or {}).get("message", {})
-        messages.append(msg)
-
-    final_text = (messages[-1].get("content") or "").strip()
-    return {"messages": messages, "answer_markdown": final_text}
+    async with s.lock:
+        try:
+            await _acquire_slot()
+        except HTTPException as e:
+            yield _sse("error", {"error": e.detail})
+            return
+        start, finished = len(s.messages), False
+        try:
+            if req.message:
+                sessions.append(s, {"role": "user", "content": req.message})
+            async for ev in _agent_turn(s, req):
+                kind = ev.pop("type")
+                if kind != "done":
+                    yield _sse(kind, ev)
+                    continue
+                sessions.save(s)
+                finished = True
+                yield _sse("done", _turn_result(s, start, req, ev))
+        except Exception as e:
+            yield _sse("error", {"error": f"{e.__class__.__name__}: {e}"})
+        finally:
+            if not finished:   # error or client disconnect: drop the partial turn
+                sessions.rollback(s, start)
+            _release_slot()
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    result = run_localmind_chat(req.messages)
-    return ChatResponse(**result)
\ No newline at end of file
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    s = _open_session(req)   # 409/422 as a plain HTTP error, before the stream starts
+    return StreamingResponse(stream_localmind_chat(s, req), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Prometheus text exposition format 0.0.4
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,47 @@
+from LocalMind.llm import pool as backend_pool
+from LocalMind.llm.pool import BackendPool
+
+
+def _pool():
+    return BackendPool(["http://a:1", "http://b:2"])
+
+
+def test_abandoned_request_is_neutral():
+    p = _pool()
+    for _ in range(backend_pool.MAX_FAILURES + 1):
+        b = p.acquire(exclude=[p.backends[1]])
+        p.release(b, None)
+    a = p.backends[0]
+    assert (a.state, a.failures, a.outstanding) == ("closed", 0, 0)
+    assert a.stats["abandoned"] == backend_pool.MAX_FAILURES + 1
+    assert a.stats["failed"] == 0
+
+
+def test_abandoned_trial_leaves_circuit_open(monkeypatch):
+    p = _pool()
+    a = p.backends[0]
+    for _ in range(backend_pool.MAX_FAILURES):
+        p.release(p.acquire(exclude=[p.backends[1]]), False)
+    assert a.state == "open" and a.stats["opened"] == 1
+    opened_at = a.opened_at
+    monkeypatch.setattr(backend_pool, "COOLDOWN", 0.0)
+    trial = p.acquire()
+    assert trial is a and a.state == "half_open"
+    p.release(trial, None)
+    assert (a.state, a.opened_at, a.failures) == ("open", opened_at, backend_pool.MAX_FAILURES)
+    assert a.stats["opened"] == 1
+    # the next request is the trial again, and a success closes the circuit
+    trial = p.acquire()
+    assert trial is a and a.state == "half_open"
+    p.release(trial, True)
+    assert (a.state, a.failures) == ("closed", 0)
+
+
+def test_failed_trial_reopens():
+    p = _pool()
+    a = p.backends[0]
+    a.state, a.opened_at = "open", 0.0
+    trial = p.acquire()
+    assert trial is a
+    p.release(trial, False)
+    assert a.state == "open" and a.opened_at > 0